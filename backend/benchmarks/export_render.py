@@ -0,0 +1,93 @@
+"""Measure event-loop latency while CV exports render concurrently.
+
+A ticker task sleeps in short intervals and records how late it wakes up,
+which is how long any other request on the same worker would have waited.
+Exports are rendered either on the event loop itself (how the export routes
+used to work) or in the RenderPool worker processes.
+
+Run from the backend directory:
+    python -m benchmarks.export_render --exports 20 --experiences 40
+    python -m benchmarks.export_render --format html --workers 2
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from models.cv import CVData, CVSection
+from services.export_service import ExportService
+from services.render_pool import RENDER_FORMATS, RenderPool
+
+TICK_SECONDS = 0.005
+
+def sample_cv(experiences: int) -> CVData:
+    description = (
+        "Led the migration of payment services to Kubernetes, cut p95 latency by 40% and "
+        "mentored five engineers while shipping weekly releases across three product teams. "
+    ) * 3
+    return CVData(user_id="benchmark", title="Benchmark CV", template_id="modern-professional", sections=[
+        CVSection(type="personal_info", title="Contact", order=0, content={
+            "full_name": "Alex Example", "email": "alex@example.com", "summary": description
+        }),
+        CVSection(type="experience", title="Experience", order=1, content={"experiences": [
+            {"title": f"Engineer {index}", "company": "Example Corp", "start_date": "2018", "description": description}
+            for index in range(experiences)
+        ]}),
+        CVSection(type="skills", title="Skills", order=2, content={"skills": ["Python", "Go", "Kubernetes"] * 10})
+    ])
+
+async def measure(render, exports: int) -> dict:
+    lags = []
+    stopped = asyncio.Event()
+
+    async def ticker():
+        while not stopped.is_set():
+            expected = time.perf_counter() + TICK_SECONDS
+            await asyncio.sleep(TICK_SECONDS)
+            lags.append(max(time.perf_counter() - expected, 0.0) * 1000)
+
+    task = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    await asyncio.gather(*[render() for _ in range(exports)])
+    elapsed = time.perf_counter() - started
+    stopped.set()
+    await task
+
+    p50, p99 = np.quantile(lags, [0.5, 0.99]).tolist() if lags else (0.0, 0.0)
+    return {"elapsed": elapsed, "p50": p50, "p99": p99, "max": max(lags, default=0.0)}
+
+async def main(exports: int, experiences: int, format: str, workers: int):
+    pool = RenderPool(max_workers=workers)
+    service = ExportService(render_pool=pool)
+    document = service.documents.build(sample_cv(experiences))
+    method = getattr(service, RENDER_FORMATS[format])
+
+    async def on_loop():
+        method(document)
+
+    async def in_pool():
+        await pool.render(format, document)
+
+    await pool.start()
+    method(document)
+
+    print(f"{exports} concurrent {format} exports, {experiences} experience entries, {workers} workers")
+    for label, render in (("event loop", on_loop), ("render pool", in_pool)):
+        result = await measure(render, exports)
+        print(
+            f"{label:<12} total {result['elapsed'] * 1000:8.1f} ms  loop lag p50 {result['p50']:7.1f} ms  "
+            f"p99 {result['p99']:7.1f} ms  max {result['max']:7.1f} ms"
+        )
+
+    await pool.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--exports", type=int, default=20)
+    parser.add_argument("--experiences", type=int, default=40)
+    parser.add_argument("--format", default="pdf", choices=sorted(RENDER_FORMATS))
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.exports, args.experiences, args.format, args.workers))
@@ -0,0 +1,69 @@
+"""Measure HTML and Word export throughput with per-call and precompiled templates.
+
+"recompiled" parses and compiles the export templates on every render, which is
+what the export routes did when the templates were jinja2.Template strings;
+"precompiled" renders through the shared template_environment. The startup
+cost of a fresh Environment is also shown with and without the bytecode cache,
+which is what a newly spawned render worker pays.
+
+Run from the backend directory:
+    python -m benchmarks.export_templates --renders 500 --experiences 10
+"""
+import argparse
+import tempfile
+import time
+
+from jinja2 import Environment, FileSystemBytecodeCache
+
+from benchmarks.export_render import sample_cv
+from services.document_builder import DocumentBuilder
+from services.export_service import template_environment
+from services.theme_compiler import ThemeCompiler
+
+TEMPLATES = {"html": "cv.html", "word": "cv_word.html"}
+
+def fresh_environment(bytecode_cache=None) -> Environment:
+    return template_environment.overlay(cache_size=0, bytecode_cache=bytecode_cache)
+
+def renders_per_second(render, renders: int) -> float:
+    started = time.perf_counter()
+    for _ in range(renders):
+        render()
+    return renders / (time.perf_counter() - started)
+
+def startup_ms(bytecode_cache) -> float:
+    started = time.perf_counter()
+    environment = fresh_environment(bytecode_cache)
+    for name in TEMPLATES.values():
+        environment.get_template(name)
+    return (time.perf_counter() - started) * 1000
+
+def main(renders: int, experiences: int):
+    document = DocumentBuilder().build(sample_cv(experiences))
+    theme = ThemeCompiler(template_environment).get("professional-classic")
+    context = {"title": document.title, "sections": document.sections, "theme": theme}
+    # Only the page is compiled per render; the macros it imports stay cached as before
+    recompiling = template_environment.overlay()
+
+    print(f"{renders} renders per format, {experiences} experience entries")
+    for format, name in TEMPLATES.items():
+        source = recompiling.loader.get_source(recompiling, name)[0]
+        precompiled = template_environment.get_template(name)
+        before = renders_per_second(lambda: recompiling.from_string(source).render(**context), renders)
+        after = renders_per_second(lambda: precompiled.render(**context), renders)
+        print(f"{format:<5} recompiled {before:8.0f}/s  precompiled {after:8.0f}/s  speedup {after / before:5.1f}x")
+
+    with tempfile.TemporaryDirectory() as directory:
+        bytecode_cache = FileSystemBytecodeCache(directory)
+        uncached = startup_ms(None)
+        startup_ms(bytecode_cache)
+        cached = startup_ms(bytecode_cache)
+    print(f"startup compile {uncached:6.1f} ms  from bytecode cache {cached:6.1f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--renders", type=int, default=500)
+    parser.add_argument("--experiences", type=int, default=10)
+    args = parser.parse_args()
+
+    main(args.renders, args.experiences)
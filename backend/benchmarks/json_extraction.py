@@ -0,0 +1,82 @@
+"""Compare the old greedy-regex JSON extraction with the brace-aware extractor.
+
+Builds large LLM-style responses (prose, an example object, a fenced payload with
+long string values full of braces, trailing prose) and measures extraction time
+and how often each approach recovers the payload. The streaming case feeds the
+same response to JSONObjectExtractor in small chunks.
+
+Run from the backend directory:
+    python -m benchmarks.json_extraction --size 200000 --repeat 50
+"""
+import argparse
+import json
+import re
+import statistics
+import time
+
+from services.json_stream import JSONObjectExtractor, extract_json_object
+
+def build_response(size: int) -> str:
+    """Response shaped like real completions, roughly size characters long"""
+    bullet = "Delivered {platform} migration for [core] services, cutting costs by 30%; "
+    content = (bullet * (size // len(bullet) + 1))[:size]
+    payload = {
+        "optimized_content": content,
+        "suggestions": ["Quantify results {e.g. 30%}", "Use action verbs"],
+        "keywords_used": ["python", "aws"],
+        "ats_score": 87
+    }
+    return (
+        'Here is an example of the format: {"ats_score": 0}.\n'
+        f"```json\n{json.dumps(payload, indent=2)}\n```\n"
+        "Let me know if you want changes to the {summary} section."
+    )
+
+def greedy_extract(response: str):
+    """The previous implementation"""
+    match = re.search(r'\{.*\}', response, re.DOTALL)
+    if not match:
+        return None
+    try:
+        return json.loads(match.group())
+    except ValueError:
+        return None
+
+def streamed_extract(response: str, chunk_size: int = 16):
+    extractor = JSONObjectExtractor()
+    for start in range(0, len(response), chunk_size):
+        for source in extractor.feed(response[start:start + chunk_size]):
+            data = json.loads(source)
+            if "optimized_content" in data:
+                return data
+    return None
+
+def measure(name: str, fn, response: str, repeat: int):
+    timings = []
+    recovered = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        data = fn(response)
+        timings.append((time.perf_counter() - started) * 1000)
+        recovered += bool(data and data.get("ats_score") == 87)
+    print(
+        f"{name:>10}: mean {statistics.mean(timings):8.3f} ms  "
+        f"p95 {sorted(timings)[int(len(timings) * 0.95)]:8.3f} ms  "
+        f"recovered {recovered}/{repeat}"
+    )
+
+def main(size: int, repeat: int):
+    response = build_response(size)
+    print(f"Response size: {len(response)} characters")
+
+    measure("greedy", greedy_extract, response, repeat)
+    measure("extractor", lambda text: extract_json_object(text, lambda data: data["optimized_content"]), response, repeat)
+    measure("streamed", streamed_extract, response, repeat)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    main(args.size, args.repeat)
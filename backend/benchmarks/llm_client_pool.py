@@ -0,0 +1,85 @@
+"""Compare per-call LLM client construction with the pooled HTTP backend.
+
+Starts the local LLM stub server and issues the same completions twice: once
+creating a fresh HTTP client per call (what constructing a new chat client per
+request costs), once through a shared HTTPLLMBackend with keep-alive.
+
+Run from the backend directory:
+    python -m benchmarks.llm_client_pool --calls 200 --concurrency 8
+"""
+import argparse
+import asyncio
+import socket
+import statistics
+import time
+
+import uvicorn
+
+from services.llm_backends import HTTPLLMBackend
+from services.llm_stub_server import create_stub_app
+
+SYSTEM_MESSAGE = "You are an ATS expert."
+PROMPT = 'Analyze this CV. Return "overall_score" JSON.'
+
+async def run_calls(backend_factory, calls: int, concurrency: int, close_after: bool):
+    """Issue calls through backends from backend_factory; returns per-call latencies in ms"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def call():
+        async with semaphore:
+            backend = backend_factory()
+            started = time.perf_counter()
+            await backend.complete(SYSTEM_MESSAGE, PROMPT, session_id="benchmark")
+            latencies.append((time.perf_counter() - started) * 1000)
+            if close_after:
+                await backend.close()
+
+    await asyncio.gather(*[call() for _ in range(calls)])
+    return latencies
+
+def report(name: str, latencies, elapsed: float):
+    latencies = sorted(latencies)
+    print(
+        f"{name:>10}: {len(latencies) / elapsed:8.1f} calls/s  "
+        f"mean {statistics.mean(latencies):6.2f} ms  "
+        f"p50 {latencies[len(latencies) // 2]:6.2f} ms  "
+        f"p95 {latencies[int(len(latencies) * 0.95)]:6.2f} ms"
+    )
+
+async def main(calls: int, concurrency: int):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(create_stub_app(), host="127.0.0.1", port=port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    base_url = f"http://127.0.0.1:{port}/v1"
+    shared_backend = HTTPLLMBackend(base_url, max_connections=concurrency)
+
+    try:
+        # Warm up both paths
+        await run_calls(lambda: HTTPLLMBackend(base_url), 10, concurrency, close_after=True)
+        await run_calls(lambda: shared_backend, 10, concurrency, close_after=False)
+
+        started = time.perf_counter()
+        latencies = await run_calls(lambda: HTTPLLMBackend(base_url), calls, concurrency, close_after=True)
+        report("per-call", latencies, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        latencies = await run_calls(lambda: shared_backend, calls, concurrency, close_after=False)
+        report("pooled", latencies, time.perf_counter() - started)
+    finally:
+        await shared_backend.close()
+        server.should_exit = True
+        await server_task
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(main(args.calls, args.concurrency))
@@ -0,0 +1,75 @@
+"""Simulate a provider incident against the multi-provider LLM router.
+
+Two stub providers stand in for real ones: a fast primary and a slower
+secondary. The primary fails every call during the middle phase and recovers
+afterwards. The router is compared with calling the primary alone, reporting
+successes, failures and latency per phase and the router's per-route state.
+
+Run from the backend directory:
+    python -m benchmarks.llm_router --requests 300 --concurrency 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from services.llm_backends import StubLLMBackend
+from services.llm_replay import LatencyProfile
+from services.llm_router import RouterLLMBackend
+
+PHASES = [("healthy", 0.0), ("incident", 1.0), ("recovered", 0.0)]
+
+async def run_phase(backend, primary: StubLLMBackend, error_rate: float, requests: int, concurrency: int):
+    primary.error_rate = error_rate
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    failures = 0
+
+    async def call(index: int):
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await backend.complete("system", f"prompt {index}", "bench")
+                latencies.append((time.perf_counter() - started) * 1000)
+            except Exception:
+                failures += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[call(index) for index in range(requests)])
+    elapsed = time.perf_counter() - started
+    mean = statistics.mean(latencies) if latencies else 0.0
+    return len(latencies) / elapsed, failures, mean
+
+async def main(requests: int, concurrency: int, open_seconds: float):
+    for label in ("primary only", "router"):
+        primary = StubLLMBackend(latency=LatencyProfile("lognormal:0.05,0.3", seed=1), seed=1, model="primary")
+        secondary = StubLLMBackend(latency=LatencyProfile("lognormal:0.15,0.3", seed=2), seed=2, model="secondary")
+        if label == "router":
+            backend = RouterLLMBackend(
+                [("primary", primary), ("secondary", secondary)],
+                open_seconds=open_seconds,
+                seed=1
+            )
+        else:
+            backend = primary
+
+        print(label)
+        for phase, error_rate in PHASES:
+            throughput, failures, mean = await run_phase(backend, primary, error_rate, requests, concurrency)
+            print(f"  {phase:<10} {throughput:8.1f} ok/s  failures {failures:4d}  mean {mean:7.1f} ms")
+            # Let open breakers reach their half-open probe before the next phase
+            await asyncio.sleep(open_seconds)
+
+        if label == "router":
+            for name, stats in backend.stats()["routes"].items():
+                print(f"  {name:<10} {stats}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--open-seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.requests, args.concurrency, args.open_seconds))
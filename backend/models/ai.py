@@ -1,5 +1,6 @@
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Literal
+from datetime import datetime
 
 class AIContentRequest(BaseModel):
     section_type: str  # experience, skills, summary, etc.
@@ -24,4 +25,73 @@ class ATSAnalysisResponse(BaseModel):
     section_scores: Dict[str, int]
     suggestions: List[str]
     missing_keywords: List[str]
-    keyword_density: Dict[str, float]
\ No newline at end of file
+    keyword_density: Dict[str, float]
+    degraded: bool = False  # local fallback served because the LLM missed its deadline
+    
+class CVOptimizationRequest(BaseModel):
+    job_title: str
+    company: Optional[str] = None
+    target_keywords: List[str] = []
+    tone: str = "professional"
+    combined: bool = False  # optimize every section in a single LLM call
+    
+class SectionOptimizationResult(BaseModel):
+    section_index: int  # position of the section in CVData.sections
+    section_type: str
+    title: str
+    result: AIContentResponse
+    
+class CVOptimizationResponse(BaseModel):
+    cv_id: str
+    sections: List[SectionOptimizationResult]
+    
+class CVATSAnalysisRequest(BaseModel):
+    job_description: Optional[str] = None
+    
+class CVATSAnalysisResponse(ATSAnalysisResponse):
+    rescored_sections: List[str] = []  # sections sent to the LLM because they changed
+    reused_sections: List[str] = []  # sections served from stored scores
+    
+class KeywordCoverageRequest(BaseModel):
+    cv_content: str
+    job_description: str
+    
+class KeywordCoverageResponse(BaseModel):
+    required_keywords: List[str]
+    matched_keywords: List[str]
+    missing_keywords: List[str]
+    coverage: float
+    keyword_density: Dict[str, float]
+    
+class AIJobCreate(BaseModel):
+    type: Literal["optimize_content", "analyze_ats"]
+    payload: Dict[str, Any]  # AIContentRequest or ATSAnalysisRequest fields
+    mode: Literal["local", "llm", "hybrid"] = "llm"  # analyze_ats only
+    
+class AIJobResponse(BaseModel):
+    id: str
+    type: str
+    status: str  # queued, running, completed, failed
+    attempts: int
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    
+class JobMatchRequest(BaseModel):
+    job_descriptions: List[str]
+    top_k: int = 3  # best matches that also get a full LLM ATS analysis; 0 for none
+    mode: Literal["llm", "hybrid"] = "llm"
+    
+class JobMatchResult(BaseModel):
+    index: int  # position of the job description in the request
+    match_score: int
+    similarity: float  # TF-IDF cosine similarity of CV and job description
+    keyword_coverage: float
+    matched_keywords: List[str]
+    missing_keywords: List[str]
+    ats_analysis: Optional[ATSAnalysisResponse] = None  # top-k matches only
+    
+class JobMatchResponse(BaseModel):
+    cv_id: str
+    results: List[JobMatchResult]  # best match first
@@ -0,0 +1,37 @@
+from pydantic import BaseModel, Field
+from typing import Annotated, List, Literal, Optional, Union
+
+# Format-agnostic CV document that every export backend renders. Blocks hold plain
+# text; escaping for the output format is the backend's job.
+
+class ContactBlock(BaseModel):
+    kind: Literal["contact"] = "contact"
+    items: List[str] = []
+    summary: Optional[str] = None
+
+class EntryBlock(BaseModel):
+    kind: Literal["entry"] = "entry"
+    variant: str  # experience, education
+    title: str = ""
+    organization: str = ""
+    dates: str = ""
+    description: Optional[str] = None
+
+class TagsBlock(BaseModel):
+    kind: Literal["tags"] = "tags"
+    items: List[str] = []
+
+class TextBlock(BaseModel):
+    kind: Literal["text"] = "text"
+    text: str = ""
+
+DocumentBlock = Annotated[Union[ContactBlock, EntryBlock, TagsBlock, TextBlock], Field(discriminator="kind")]
+
+class DocumentSection(BaseModel):
+    type: str
+    title: str
+    blocks: List[DocumentBlock] = []
+
+class CVDocument(BaseModel):
+    title: str
+    sections: List[DocumentSection] = []
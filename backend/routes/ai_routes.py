@@ -1,88 +1,471 @@
 from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi.responses import StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorClient
-from models.ai import AIContentRequest, AIContentResponse, ATSAnalysisRequest, ATSAnalysisResponse
+from models.ai import (
+    AIContentRequest, AIContentResponse, ATSAnalysisRequest, ATSAnalysisResponse,
+    CVOptimizationRequest, CVOptimizationResponse, CVATSAnalysisRequest, CVATSAnalysisResponse,
+    KeywordCoverageRequest, KeywordCoverageResponse, AIJobCreate, AIJobResponse,
+    JobMatchRequest, JobMatchResponse
+)
+from models.cv import CVData
 from models.user import User
 from auth.auth import get_current_user_dependency
 from services.ai_service import AIService
+from services.ai_job_queue import AIJobQueue
+from services.suggestion_catalog import SuggestionCatalog
+from services.llm_scheduler import SchedulerOverloadedError
+from services.quota_service import QuotaService, QuotaExceededError, QuotaRequestTooLargeError
+from services.usage_ledger import bind_usage_user
 from database import get_database
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Literal, Optional, Tuple
+import asyncio
+import json
 import os
 
 router = APIRouter(prefix="/ai", tags=["ai"])
 
+# Most job descriptions accepted by one /match-jobs request
+MAX_MATCH_JOB_DESCRIPTIONS = int(os.getenv("AI_MATCH_MAX_JOB_DESCRIPTIONS", "100"))
+
 # Initialize AI service
 ai_service = AIService()
 
+# Monthly per-tier allowances (reconciled by the application startup hook)
+quota_service = QuotaService()
+
+# Background job queue (workers are started by the application startup hook);
+# jobs that fail for good give their quota reservation back
+ai_job_queue = AIJobQueue(ai_service, quota_service)
+
+# Precomputed section suggestions per job title (warmed by the application startup hook);
+# titles the catalog cannot match are charged to the caller's suggestion quota
+suggestion_catalog = SuggestionCatalog(ai_service, quota_service)
+
+# Users allowed to see every user's LLM usage and the service metrics; everyone else
+# sees only their own usage
+USAGE_ADMIN_EMAILS = {email.strip().lower() for email in os.getenv("AI_USAGE_ADMIN_EMAILS", "").split(",") if email.strip()}
+
+async def get_ai_user(current_user: User = Depends(get_current_user_dependency)) -> User:
+    """Authenticated user, to whom the request's LLM calls are attributed in the usage ledger"""
+    bind_usage_user(current_user.id)
+    return current_user
+
 @router.post("/optimize-content", response_model=AIContentResponse)
 async def optimize_content(
     request: AIContentRequest,
-    current_user: User = Depends(get_current_user_dependency)
+    current_user: User = Depends(get_ai_user)
 ):
     """Optimize CV content using AI"""
     
     try:
-        # Check user subscription for AI features
-        if current_user.subscription_tier == "free":
-            # Limit AI requests for free users (could be implemented with rate limiting)
-            pass
-        
-        # Optimize content using AI
-        result = await ai_service.optimize_content(request)
+        # Free users spend one monthly optimization before any LLM work, refunded on failure
+        async with quota_service.reservation(current_user.id, current_user.subscription_tier):
+            # Optimize content using AI (the subscription tier sets the request's queue priority)
+            result = await ai_service.optimize_content(
+                request, tier=current_user.subscription_tier, user_id=current_user.id
+            )
         
         return result
         
+    except QuotaExceededError as e:
+        raise _quota_exception(e)
+    except SchedulerOverloadedError as e:
+        raise _overloaded_exception(e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"AI optimization failed: {str(e)}"
         )
 
+@router.post("/optimize-cv/{cv_id}", response_model=CVOptimizationResponse)
+async def optimize_cv(
+    cv_id: str,
+    request: CVOptimizationRequest,
+    db: AsyncIOMotorClient = Depends(get_database),
+    current_user: User = Depends(get_ai_user)
+):
+    """Optimize all visible sections of a CV in one request"""
+    
+    # Get CV data
+    cv_data = await db.cvs.find_one({"id": cv_id, "user_id": current_user.id})
+    if not cv_data:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="CV not found"
+        )
+    
+    try:
+        cv = CVData(**cv_data)
+        # Each optimized section costs one unit, the same as optimizing it on its own
+        units = len(ai_service.optimizable_sections(cv))
+        async with quota_service.reservation(current_user.id, current_user.subscription_tier, units=units):
+            # Sections are optimized concurrently (or in one combined call)
+            return await ai_service.optimize_cv(cv, request, tier=current_user.subscription_tier)
+        
+    except QuotaRequestTooLargeError as e:
+        upgrade = "upgrade to Pro or " if e.tier == "free" else ""
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"Too many sections for your tier: this CV has {e.units} sections to optimize and the "
+                f"{e.tier} tier allows {e.limit} optimizations a month; {upgrade}optimize sections one at a time"
+            )
+        )
+    except QuotaExceededError as e:
+        raise _quota_exception(e)
+    except SchedulerOverloadedError as e:
+        raise _overloaded_exception(e)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"AI CV optimization failed: {str(e)}"
+        )
+
+@router.post("/optimize-content/stream")
+async def optimize_content_stream(
+    request: AIContentRequest,
+    current_user: User = Depends(get_ai_user)
+):
+    """Optimize CV content using AI, streamed as server-sent events"""
+    
+    # The allowance is held while the stream runs and given back unless a result is sent
+    try:
+        reservation = await quota_service.reserve(current_user.id, current_user.subscription_tier)
+    except QuotaExceededError as e:
+        raise _quota_exception(e)
+    
+    return _event_stream_response(
+        ai_service.stream_optimize_content(request, tier=current_user.subscription_tier, user_id=current_user.id),
+        reservation=reservation
+    )
+
 @router.post("/analyze-ats", response_model=ATSAnalysisResponse)
 async def analyze_ats(
     request: ATSAnalysisRequest,
-    current_user: User = Depends(get_current_user_dependency)
+    mode: Literal["local", "llm", "hybrid"] = "llm",
+    current_user: User = Depends(get_ai_user)
 ):
     """Analyze CV for ATS compatibility"""
     
     try:
-        # Analyze ATS compatibility
-        result = await ai_service.analyze_ats_score(request)
+        # Analyze ATS compatibility (local scoring skips the LLM entirely)
+        result = await ai_service.analyze_ats_score(
+            request, mode=mode, tier=current_user.subscription_tier, user_id=current_user.id
+        )
+        
+        return result
+        
+    except SchedulerOverloadedError as e:
+        raise _overloaded_exception(e)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"ATS analysis failed: {str(e)}"
+        )
+
+@router.post("/analyze-ats/stream")
+async def analyze_ats_stream(
+    request: ATSAnalysisRequest,
+    current_user: User = Depends(get_ai_user)
+):
+    """Analyze CV for ATS compatibility, streamed as server-sent events"""
+    
+    return _event_stream_response(
+        ai_service.stream_ats_analysis(request, tier=current_user.subscription_tier, user_id=current_user.id)
+    )
+
+@router.post("/analyze-ats/cv/{cv_id}", response_model=CVATSAnalysisResponse)
+async def analyze_cv_ats(
+    cv_id: str,
+    request: CVATSAnalysisRequest,
+    db: AsyncIOMotorClient = Depends(get_database),
+    current_user: User = Depends(get_ai_user)
+):
+    """Analyze a saved CV section by section, re-scoring only changed sections"""
+    
+    # Get CV data
+    cv_data = await db.cvs.find_one({"id": cv_id, "user_id": current_user.id})
+    if not cv_data:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="CV not found"
+        )
+    
+    try:
+        result = await ai_service.analyze_cv_sections(CVData(**cv_data), request, tier=current_user.subscription_tier)
+        
+        # Keep the CV's stored ATS summary current
+        await db.cvs.update_one(
+            {"id": cv_id, "user_id": current_user.id},
+            {"$set": {"ats_score": result.overall_score, "ats_suggestions": result.suggestions}}
+        )
         
         return result
         
+    except SchedulerOverloadedError as e:
+        raise _overloaded_exception(e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"ATS analysis failed: {str(e)}"
         )
 
+@router.post("/match-jobs/{cv_id}", response_model=JobMatchResponse)
+async def match_jobs(
+    cv_id: str,
+    request: JobMatchRequest,
+    db: AsyncIOMotorClient = Depends(get_database),
+    current_user: User = Depends(get_ai_user)
+):
+    """Rank several job descriptions against a saved CV; only the best matches get an LLM analysis"""
+    
+    if not request.job_descriptions or len(request.job_descriptions) > MAX_MATCH_JOB_DESCRIPTIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Provide between 1 and {MAX_MATCH_JOB_DESCRIPTIONS} job descriptions"
+        )
+    
+    # Get CV data
+    cv_data = await db.cvs.find_one({"id": cv_id, "user_id": current_user.id})
+    if not cv_data:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="CV not found"
+        )
+    
+    try:
+        return await ai_service.match_job_descriptions(CVData(**cv_data), request, tier=current_user.subscription_tier)
+        
+    except SchedulerOverloadedError as e:
+        raise _overloaded_exception(e)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Job matching failed: {str(e)}"
+        )
+
+@router.post("/keyword-coverage", response_model=KeywordCoverageResponse)
+async def keyword_coverage(
+    request: KeywordCoverageRequest,
+    current_user: User = Depends(get_ai_user)
+):
+    """Compute skill keyword coverage of a CV against a job description without the LLM"""
+    
+    return ai_service.keyword_coverage(request.cv_content, request.job_description)
+
 @router.post("/suggestions")
 async def get_ai_suggestions(
     section_type: str,
     job_title: str = None,
-    current_user: User = Depends(get_current_user_dependency)
+    current_user: User = Depends(get_ai_user)
 ):
     """Get AI suggestions for CV sections"""
     
     try:
-        # Create basic content request for suggestions
-        request = AIContentRequest(
-            section_type=section_type,
-            job_title=job_title or "General",
-            existing_content="",
-            target_keywords=[],
-            tone="professional"
+        # Served from the catalog; only titles it cannot match reach the LLM
+        return await suggestion_catalog.get(
+            section_type, job_title, tier=current_user.subscription_tier, user_id=current_user.id
         )
         
-        # Get suggestions
-        result = await ai_service.optimize_content(request)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except QuotaExceededError as e:
+        raise _quota_exception(e)
+    except SchedulerOverloadedError as e:
+        raise _overloaded_exception(e)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get AI suggestions: {str(e)}"
+        )
+
+@router.post("/jobs", response_model=AIJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_ai_job(
+    job: AIJobCreate,
+    current_user: User = Depends(get_ai_user)
+):
+    """Queue a long-running AI request and return its job id immediately"""
+    
+    reservation = None
+    if job.type == "optimize_content":
+        try:
+            reservation = await quota_service.reserve(current_user.id, current_user.subscription_tier)
+        except QuotaExceededError as e:
+            raise _quota_exception(e)
+    
+    try:
+        created = await ai_job_queue.submit(
+            user_id=current_user.id,
+            tier=current_user.subscription_tier,
+            job_type=job.type,
+            payload=job.payload,
+            mode=job.mode,
+            reservation=reservation
+        )
+    except ValueError as e:
+        await quota_service.release(reservation)
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Invalid job payload: {str(e)}"
+        )
+    
+    return AIJobResponse(**created)
+
+@router.get("/jobs/{job_id}", response_model=AIJobResponse)
+async def get_ai_job(
+    job_id: str,
+    current_user: User = Depends(get_ai_user)
+):
+    """Poll the status and result of an AI job"""
+    
+    job = await ai_job_queue.get(job_id, current_user.id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    
+    return AIJobResponse(**job)
+
+@router.get("/jobs/{job_id}/events")
+async def subscribe_ai_job(
+    job_id: str,
+    current_user: User = Depends(get_ai_user)
+):
+    """Subscribe to an AI job's status changes as server-sent events"""
+    
+    job = await ai_job_queue.get(job_id, current_user.id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    
+    async def job_events():
+        last_status = None
+        while True:
+            job = await ai_job_queue.get(job_id, current_user.id)
+            if job is None:
+                yield "error", {"detail": "Job not found"}
+                return
+            
+            if job["status"] != last_status:
+                last_status = job["status"]
+                yield "status", json.loads(AIJobResponse(**job).json())
+            
+            if last_status in ("completed", "failed"):
+                return
+            
+            await ai_job_queue.wait_for_update(job_id, timeout=ai_job_queue.poll_interval)
+    
+    return _event_stream_response(job_events())
+
+@router.get("/metrics")
+async def get_ai_metrics(
+    current_user: User = Depends(get_ai_user)
+):
+    """Get AI service cache and performance counters (admins only)"""
+    
+    # Counters span every user's traffic, so they are not shown to regular users
+    if current_user.email.lower() not in USAGE_ADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="AI metrics are only available to administrators"
+        )
+    
+    return {
+        **ai_service.get_metrics(),
+        "suggestion_catalog": suggestion_catalog.stats(),
+        "quotas": quota_service.stats()
+    }
+
+@router.get("/quota")
+async def get_ai_quota(
+    current_user: User = Depends(get_ai_user)
+):
+    """Used and remaining monthly AI allowance of the current user"""
+    
+    try:
+        return await quota_service.usage(current_user.id, current_user.subscription_tier)
         
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Quota lookup failed: {str(e)}"
+        )
+
+@router.get("/usage")
+async def get_ai_usage(
+    group_by: Literal["user", "tier", "endpoint", "model"] = "endpoint",
+    days: int = 30,
+    current_user: User = Depends(get_ai_user)
+):
+    """LLM calls, tokens and p50/p95 latency grouped by user, tier, endpoint or model"""
+    
+    # Non-admins only ever see their own calls
+    user_id = None if current_user.email.lower() in USAGE_ADMIN_EMAILS else current_user.id
+    
+    try:
+        since = datetime.utcnow() - timedelta(days=max(days, 1))
         return {
-            "suggestions": result.suggestions,
-            "sample_content": result.optimized_content
+            "group_by": group_by,
+            "since": since,
+            "results": await ai_service.usage.summary(group_by, since, user_id=user_id)
         }
         
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to get AI suggestions: {str(e)}"
-        )
\ No newline at end of file
+            detail=f"Usage aggregation failed: {str(e)}"
+        )
+
+
+def _event_stream_response(
+    events: AsyncIterator[Tuple[str, Any]],
+    reservation: Optional[Tuple[str, str, str, int]] = None
+) -> StreamingResponse:
+    """Wrap (event, data) pairs in a server-sent events response
+    
+    A quota reservation is released when the stream ends without sending a result:
+    on an error event, an overloaded scheduler or a client that disconnected.
+    """
+    
+    async def event_stream():
+        completed = False
+        try:
+            async for event, data in events:
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+                completed = completed or event == "result"
+        except SchedulerOverloadedError as e:
+            yield f"event: error\ndata: {json.dumps({'detail': str(e), 'retry_after': e.retry_after})}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+        finally:
+            if not completed:
+                # Shielded so a disconnect cancelling the response still finishes the refund
+                await asyncio.shield(quota_service.release(reservation))
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _overloaded_exception(error: SchedulerOverloadedError) -> HTTPException:
+    """429 response telling the client when to retry"""
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=str(error),
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+def _quota_exception(error: QuotaExceededError) -> HTTPException:
+    """402 response for a used-up monthly allowance"""
+    return HTTPException(
+        status_code=status.HTTP_402_PAYMENT_REQUIRED,
+        detail=str(error)
+    )
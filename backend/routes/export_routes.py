@@ -1,142 +1,59 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Header
 from fastapi.responses import Response
 from motor.motor_asyncio import AsyncIOMotorClient
 from models.cv import CVData
 from models.user import User
 from auth.auth import get_current_user_dependency
 from services.export_service import ExportService
-from services.template_service import TemplateService
+from services.render_pool import RenderTimeoutError
 from database import get_database
+from typing import Optional
 import os
 
 router = APIRouter(prefix="/export", tags=["export"])
 
-# Initialize services
+# Initialize services (render workers are started by the application startup hook)
 export_service = ExportService()
-template_service = TemplateService()
+
+# format -> (media type, file extension, label used in error messages)
+EXPORT_FORMATS = {
+    "pdf": ("application/pdf", "pdf", "PDF"),
+    "html": ("text/html", "html", "HTML"),
+    "word": ("application/msword", "doc", "Word")
+}
 
 @router.get("/{cv_id}/pdf")
 async def export_cv_to_pdf(
     cv_id: str,
+    if_none_match: Optional[str] = Header(None),
     db: AsyncIOMotorClient = Depends(get_database),
     current_user: User = Depends(get_current_user_dependency)
 ):
     """Export CV to PDF format"""
     
-    # Get CV data
-    cv_data = await db.cvs.find_one({"id": cv_id, "user_id": current_user.id})
-    if not cv_data:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="CV not found"
-        )
-    
-    try:
-        # Convert to CVData object
-        cv = CVData(**cv_data)
-        
-        # Get template styles
-        template = template_service.get_template_by_id(cv.template_id)
-        template_styles = template.styles if template else {}
-        
-        # Generate PDF
-        pdf_content = await export_service.export_to_pdf(cv, template_styles)
-        
-        # Return PDF as response
-        filename = f"{cv.title.replace(' ', '_')}.pdf"
-        return Response(
-            content=pdf_content,
-            media_type="application/pdf",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
-        
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"PDF export failed: {str(e)}"
-        )
+    return await _export_response(cv_id, "pdf", if_none_match, db, current_user)
 
 @router.get("/{cv_id}/html")
 async def export_cv_to_html(
     cv_id: str,
+    if_none_match: Optional[str] = Header(None),
     db: AsyncIOMotorClient = Depends(get_database),
     current_user: User = Depends(get_current_user_dependency)
 ):
     """Export CV to HTML format"""
     
-    # Get CV data
-    cv_data = await db.cvs.find_one({"id": cv_id, "user_id": current_user.id})
-    if not cv_data:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="CV not found"
-        )
-    
-    try:
-        # Convert to CVData object
-        cv = CVData(**cv_data)
-        
-        # Get template styles
-        template = template_service.get_template_by_id(cv.template_id)
-        template_styles = template.styles if template else {}
-        
-        # Generate HTML
-        html_content = await export_service.export_to_html(cv, template_styles)
-        
-        # Return HTML as response
-        filename = f"{cv.title.replace(' ', '_')}.html"
-        return Response(
-            content=html_content,
-            media_type="text/html",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
-        
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"HTML export failed: {str(e)}"
-        )
+    return await _export_response(cv_id, "html", if_none_match, db, current_user)
 
 @router.get("/{cv_id}/word")
 async def export_cv_to_word(
     cv_id: str,
+    if_none_match: Optional[str] = Header(None),
     db: AsyncIOMotorClient = Depends(get_database),
     current_user: User = Depends(get_current_user_dependency)
 ):
     """Export CV to Word format (HTML-based)"""
     
-    # Get CV data
-    cv_data = await db.cvs.find_one({"id": cv_id, "user_id": current_user.id})
-    if not cv_data:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="CV not found"
-        )
-    
-    try:
-        # Convert to CVData object
-        cv = CVData(**cv_data)
-        
-        # Get template styles
-        template = template_service.get_template_by_id(cv.template_id)
-        template_styles = template.styles if template else {}
-        
-        # Generate Word-compatible HTML
-        word_html = await export_service.export_to_word_html(cv, template_styles)
-        
-        # Return Word document
-        filename = f"{cv.title.replace(' ', '_')}.doc"
-        return Response(
-            content=word_html,
-            media_type="application/msword",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
-        
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Word export failed: {str(e)}"
-        )
+    return await _export_response(cv_id, "word", if_none_match, db, current_user)
 
 @router.get("/{cv_id}/json")
 async def export_cv_to_json(
@@ -171,4 +88,84 @@ async def export_cv_to_json(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"JSON export failed: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+async def _export_response(
+    cv_id: str,
+    format: str,
+    if_none_match: Optional[str],
+    db: AsyncIOMotorClient,
+    current_user: User
+) -> Response:
+    """Rendered export with a strong ETag; unchanged CVs get a 304 or a cached copy"""
+    media_type, extension, label = EXPORT_FORMATS[format]
+    
+    # Only the fields that identify the export; sections are loaded on a cache miss
+    cv_meta = await db.cvs.find_one(
+        {"id": cv_id, "user_id": current_user.id},
+        {"_id": 0, "title": 1, "template_id": 1, "updated_at": 1}
+    )
+    if not cv_meta:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="CV not found"
+        )
+    
+    headers = {
+        # Clients keep the export but revalidate it on every use
+        "Cache-Control": "private, no-cache"
+    }
+    
+    # CVs stored without updated_at have no version to validate against, so they are
+    # rendered on every request instead of being cached under a key that never repeats
+    updated_at = cv_meta.get("updated_at")
+    key = None
+    if updated_at is not None:
+        key = export_service.export_key(cv_id, updated_at, cv_meta.get("template_id"), format)
+        headers["ETag"] = f'"{key}"'
+        if _etag_matches(if_none_match, key):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    try:
+        content = await export_service.render_cache.get(key) if key else None
+        if content is None:
+            cv_data = await db.cvs.find_one({"id": cv_id, "user_id": current_user.id})
+            if not cv_data:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="CV not found"
+                )
+            
+            # Convert to CVData object
+            cv = CVData(**cv_data)
+            
+            if key is None:
+                content = await export_service.render(format, cv)
+            else:
+                # Keyed on the document actually rendered, in case it changed since the lookup above
+                key, content = await export_service.render_export(format, cv)
+                headers["ETag"] = f'"{key}"'
+        
+        filename = f"{cv_meta.get('title', 'cv').replace(' ', '_')}.{extension}"
+        headers["Content-Disposition"] = f"attachment; filename={filename}"
+        return Response(content=content, media_type=media_type, headers=headers)
+        
+    except HTTPException:
+        raise
+    except RenderTimeoutError as e:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=f"{label} export failed: {str(e)}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"{label} export failed: {str(e)}"
+        )
+
+def _etag_matches(if_none_match: Optional[str], key: str) -> bool:
+    """If-None-Match comparison (weak, as RFC 9110 requires for GET)"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == f'"{key}"' for tag in tags)
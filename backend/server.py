@@ -19,6 +19,10 @@ from middleware import LoggingMiddleware, RateLimitMiddleware
 # Import database
 from database import close_database_connection
 
+# Import background workers
+from routes.ai_routes import ai_service, ai_job_queue, suggestion_catalog, quota_service
+from routes.export_routes import export_service
+
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
@@ -82,8 +86,30 @@ logger = logging.getLogger(__name__)
 @app.on_event("startup")
 async def startup_event():
     logger.info("CraftMyCV API starting up...")
+    
+    await ai_service.usage.start()
+    await quota_service.start()
+    
+    try:
+        await ai_job_queue.start()
+    except Exception as e:
+        logger.error(f"AI job queue failed to start: {str(e)}")
+    
+    await suggestion_catalog.start()
+    await export_service.render_pool.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("CraftMyCV API shutting down...")
+    
+    try:
+        await ai_job_queue.stop()
+    except Exception as e:
+        logger.error(f"AI job queue failed to stop cleanly: {str(e)}")
+    
+    await suggestion_catalog.stop()
+    await export_service.render_pool.stop()
+    await quota_service.stop()
+    await ai_service.usage.stop()
+    await ai_service.close()
     await close_database_connection()
@@ -0,0 +1,149 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, Tuple
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+class AICache:
+    """Two-tier LLM response cache: in-process LRU with TTL backed by a MongoDB TTL collection
+
+    With persistent=False only the in-process tier is used, e.g. for offline benchmarks.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = None,
+        ttl_seconds: int = None,
+        collection_name: str = "ai_response_cache",
+        persistent: bool = True
+    ):
+        self.max_entries = max_entries or int(os.getenv("AI_CACHE_MAX_ENTRIES", "1024"))
+        self.ttl_seconds = ttl_seconds or int(os.getenv("AI_CACHE_TTL_SECONDS", "86400"))
+        self.collection_name = collection_name
+        self.persistent = persistent
+
+        # key -> (expires_at monotonic timestamp, response text)
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._collection = None
+        self._indexes_ready = False
+        self._index_lock = asyncio.Lock()
+
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.errors = 0
+
+    @staticmethod
+    def normalize_prompt(prompt: str) -> str:
+        """Collapse insignificant whitespace so equivalent prompts share a key"""
+        lines = [re.sub(r'[ \t]+', ' ', line).strip() for line in prompt.strip().splitlines()]
+        return "\n".join(lines)
+
+    @classmethod
+    def make_key(cls, model: str, system_message: str, prompt: str) -> str:
+        """Content-addressed key: hash of model + system message + normalized prompt"""
+        digest = hashlib.sha256()
+        for part in (model, system_message, cls.normalize_prompt(prompt)):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\x00')
+        return digest.hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        """Look up a cached response, promoting persistent hits into memory"""
+
+        # In-process tier
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return value
+            del self._entries[key]
+
+        if not self.persistent:
+            self.misses += 1
+            return None
+
+        # Persistent tier
+        try:
+            collection = await self._get_collection()
+            document = await collection.find_one({"key": key})
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"AI cache lookup failed: {str(e)}")
+            document = None
+
+        if document and document["created_at"] > datetime.utcnow() - timedelta(seconds=self.ttl_seconds):
+            self._remember(key, document["response"])
+            self.persistent_hits += 1
+            return document["response"]
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: str):
+        """Store a response in both tiers"""
+        self._remember(key, value)
+        self.writes += 1
+        if not self.persistent:
+            return
+
+        try:
+            collection = await self._get_collection()
+            await collection.update_one(
+                {"key": key},
+                {"$set": {"key": key, "response": value, "created_at": datetime.utcnow()}},
+                upsert=True
+            )
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"AI cache write failed: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring"""
+        lookups = self.memory_hits + self.persistent_hits + self.misses
+        hits = self.memory_hits + self.persistent_hits
+        return {
+            "memory_hits": self.memory_hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "writes": self.writes,
+            "errors": self.errors,
+            "memory_entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds
+        }
+
+    def _remember(self, key: str, value: str):
+        """Insert into the LRU, evicting the least recently used entries"""
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _get_collection(self):
+        """Get the cache collection, creating the TTL index on first use"""
+        if self._collection is None:
+            # Import here so the cache can be constructed without a configured database
+            from database import get_database
+
+            database = await get_database()
+            self._collection = database[self.collection_name]
+
+        if not self._indexes_ready:
+            async with self._index_lock:
+                if not self._indexes_ready:
+                    await self._collection.create_index("key", unique=True)
+                    await self._collection.create_index("created_at", expireAfterSeconds=self.ttl_seconds)
+                    self._indexes_ready = True
+
+        return self._collection
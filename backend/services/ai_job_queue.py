@@ -0,0 +1,311 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+from pymongo import ReturnDocument
+from models.ai import AIContentRequest, ATSAnalysisRequest
+from services.llm_scheduler import TIER_PRIORITY, SchedulerOverloadedError
+from services.usage_ledger import bind_usage_user
+import asyncio
+import logging
+import os
+import uuid
+
+logger = logging.getLogger(__name__)
+
+JOB_TYPES = ("optimize_content", "analyze_ats")
+
+class AIJobQueue:
+    """Durable MongoDB-backed queue executing AIService calls on a pool of asyncio workers
+
+    Workers claim jobs with a lease that is extended while the job runs. A job whose
+    worker died stops being renewed, so its lease expires and another worker resumes it,
+    unless it has used up its attempts: such a job keeps killing its workers, so it is
+    dead-lettered (failed for good) instead of being claimed again.
+    """
+
+    def __init__(
+        self,
+        ai_service,
+        quota_service=None,
+        workers: int = None,
+        lease_seconds: int = None,
+        ttl_seconds: int = None,
+        max_attempts: int = 3,
+        poll_interval: float = 1.0,
+        collection_name: str = "ai_jobs"
+    ):
+        self.ai_service = ai_service
+        self.quota_service = quota_service
+        self.workers = workers or int(os.getenv("AI_JOB_WORKERS", "2"))
+        self.lease_seconds = lease_seconds or int(os.getenv("AI_JOB_LEASE_SECONDS", "60"))
+        self.ttl_seconds = ttl_seconds or int(os.getenv("AI_JOB_TTL_SECONDS", "86400"))
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.collection_name = collection_name
+
+        self.instance_id = str(uuid.uuid4())
+        self._collection = None
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        # One event per waiter, so every subscriber of a job is woken when it finishes
+        self._updates: Dict[str, Set[asyncio.Event]] = {}
+
+    async def start(self):
+        """Create indexes and start the worker pool"""
+        collection = await self._get_collection()
+        await collection.create_index("id", unique=True)
+        await collection.create_index([("status", 1), ("priority", 1), ("created_at", 1)])
+        await collection.create_index("expires_at", expireAfterSeconds=0)
+
+        self._tasks = [
+            asyncio.create_task(self._worker(f"{self.instance_id}:{index}"))
+            for index in range(self.workers)
+        ]
+        logger.info(f"AI job queue started with {self.workers} workers")
+
+    async def stop(self):
+        """Stop the workers and hand their unfinished jobs back to the queue"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        collection = await self._get_collection()
+        await collection.update_many(
+            {"status": "running", "worker_id": {"$regex": f"^{self.instance_id}:"}},
+            {"$set": {"status": "queued", "worker_id": None, "lease_expires_at": None, "updated_at": datetime.utcnow()}}
+        )
+
+    async def submit(
+        self,
+        user_id: str,
+        tier: str,
+        job_type: str,
+        payload: Dict[str, Any],
+        mode: str = "llm",
+        reservation: Optional[Tuple[str, str, str, int]] = None
+    ) -> Dict[str, Any]:
+        """Persist a new job and wake an idle worker
+
+        reservation is the quota the caller reserved for the job; it is released if the
+        job fails for good.
+        """
+        if job_type not in JOB_TYPES:
+            raise ValueError(f"Unknown job type: {job_type}")
+
+        # Validate the payload now rather than failing later in a worker
+        self._build_request(job_type, payload)
+
+        now = datetime.utcnow()
+        job = {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "tier": tier,
+            "priority": TIER_PRIORITY.get(tier, TIER_PRIORITY["free"]),
+            "type": job_type,
+            "mode": mode,
+            "payload": payload,
+            "status": "queued",
+            "attempts": 0,
+            "result": None,
+            "error": None,
+            "quota_reservation": list(reservation) if reservation else None,
+            "worker_id": None,
+            "lease_expires_at": None,
+            "available_at": now,
+            "created_at": now,
+            "updated_at": now,
+            "expires_at": now + timedelta(seconds=self.ttl_seconds)
+        }
+
+        collection = await self._get_collection()
+        await collection.insert_one(dict(job))
+        self._wakeup.set()
+        return job
+
+    async def get(self, job_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job belonging to the user"""
+        collection = await self._get_collection()
+        return await collection.find_one({"id": job_id, "user_id": user_id})
+
+    async def wait_for_update(self, job_id: str, timeout: float):
+        """Wait until this process finishes the job or the timeout passes (callers re-read the job either way)"""
+        event = asyncio.Event()
+        waiters = self._updates.setdefault(job_id, set())
+        waiters.add(event)
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            waiters.discard(event)
+            if not waiters and self._updates.get(job_id) is waiters:
+                del self._updates[job_id]
+
+    async def _worker(self, worker_id: str):
+        """Claim and run jobs until cancelled"""
+        while True:
+            try:
+                job = await self._claim(worker_id)
+            except Exception as e:
+                logger.error(f"AI job claim failed: {str(e)}")
+                job = None
+
+            if job is None:
+                try:
+                    await self._dead_letter()
+                except Exception as e:
+                    logger.error(f"AI job dead-lettering failed: {str(e)}")
+
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._run(job, worker_id)
+
+    async def _claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Atomically claim the highest priority runnable job, including ones with an expired lease"""
+        now = datetime.utcnow()
+        collection = await self._get_collection()
+        return await collection.find_one_and_update(
+            {
+                "$or": [
+                    {"status": "queued", "available_at": {"$lte": now}},
+                    {"status": "running", "lease_expires_at": {"$lt": now}, "attempts": {"$lt": self.max_attempts}}
+                ]
+            },
+            {
+                "$set": {
+                    "status": "running",
+                    "worker_id": worker_id,
+                    "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+                    "updated_at": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("priority", 1), ("created_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _run(self, job: Dict[str, Any], worker_id: str):
+        """Execute a claimed job while renewing its lease"""
+        heartbeat = asyncio.create_task(self._renew_lease(job["id"], worker_id))
+        update: Dict[str, Any]
+
+        try:
+            result = await self._execute(job)
+            update = {"status": "completed", "result": result, "error": None}
+        except SchedulerOverloadedError as e:
+            # Not the job's fault: put it back without spending an attempt
+            update = {
+                "status": "queued",
+                "attempts": job["attempts"] - 1,
+                "available_at": datetime.utcnow() + timedelta(seconds=e.retry_after)
+            }
+        except Exception as e:
+            if job["attempts"] < self.max_attempts:
+                update = {
+                    "status": "queued",
+                    "error": str(e),
+                    "available_at": datetime.utcnow() + timedelta(seconds=2 ** job["attempts"])
+                }
+            else:
+                update = {"status": "failed", "error": str(e)}
+        finally:
+            heartbeat.cancel()
+
+        now = datetime.utcnow()
+        update.update({"worker_id": None, "lease_expires_at": None, "updated_at": now})
+        if update["status"] in ("completed", "failed"):
+            update["expires_at"] = now + timedelta(seconds=self.ttl_seconds)
+
+        try:
+            collection = await self._get_collection()
+            updated = await collection.update_one({"id": job["id"], "worker_id": worker_id}, {"$set": update})
+        except Exception as e:
+            logger.error(f"AI job {job['id']} status update failed: {str(e)}")
+        else:
+            # Only the worker still holding the job refunds it, so the quota is returned once
+            if update["status"] == "failed" and updated.matched_count:
+                await self._refund(job)
+
+        if update["status"] in ("completed", "failed"):
+            self._notify(job["id"])
+
+    async def _dead_letter(self):
+        """Fail jobs whose lease expired on their last attempt, refunding their quota"""
+        collection = await self._get_collection()
+        while True:
+            now = datetime.utcnow()
+            job = await collection.find_one_and_update(
+                {"status": "running", "lease_expires_at": {"$lt": now}, "attempts": {"$gte": self.max_attempts}},
+                {
+                    "$set": {
+                        "status": "failed",
+                        "dead_lettered": True,
+                        "error": f"Abandoned after {self.max_attempts} attempts; its worker stopped responding",
+                        "worker_id": None,
+                        "lease_expires_at": None,
+                        "updated_at": now,
+                        "expires_at": now + timedelta(seconds=self.ttl_seconds)
+                    }
+                }
+            )
+            if job is None:
+                return
+
+            logger.error(f"AI job {job['id']} dead-lettered after {job['attempts']} attempts")
+            await self._refund(job)
+            self._notify(job["id"])
+
+    def _notify(self, job_id: str):
+        for event in self._updates.get(job_id, ()):
+            event.set()
+
+    async def _execute(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the AIService call described by the job"""
+        request = self._build_request(job["type"], job["payload"])
+        bind_usage_user(job["user_id"])
+
+        if job["type"] == "optimize_content":
+            result = await self.ai_service.optimize_content(request, tier=job["tier"], user_id=job["user_id"])
+        else:
+            result = await self.ai_service.analyze_ats_score(
+                request, mode=job["mode"], tier=job["tier"], user_id=job["user_id"]
+            )
+
+        return result.dict()
+
+    async def _renew_lease(self, job_id: str, worker_id: str):
+        """Extend the lease periodically so other workers leave the job alone"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            # A failed renewal is retried on the next beat; the lease outlives two of them
+            try:
+                collection = await self._get_collection()
+                await collection.update_one(
+                    {"id": job_id, "worker_id": worker_id},
+                    {"$set": {"lease_expires_at": datetime.utcnow() + timedelta(seconds=self.lease_seconds)}}
+                )
+            except Exception as e:
+                logger.error(f"AI job {job_id} lease renewal failed: {str(e)}")
+
+    async def _refund(self, job: Dict[str, Any]):
+        """Give back the quota reserved for a job that produced no result"""
+        if self.quota_service is not None and job.get("quota_reservation"):
+            await self.quota_service.release(tuple(job["quota_reservation"]))
+
+    def _build_request(self, job_type: str, payload: Dict[str, Any]):
+        if job_type == "optimize_content":
+            return AIContentRequest(**payload)
+        return ATSAnalysisRequest(**payload)
+
+    async def _get_collection(self):
+        if self._collection is None:
+            from database import get_database
+
+            database = await get_database()
+            self._collection = database[self.collection_name]
+        return self._collection
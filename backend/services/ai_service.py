@@ -1,66 +1,808 @@
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Optional, AsyncIterator, Callable, Tuple
 from dotenv import load_dotenv
-from emergentintegrations.llm.chat import LlmChat, UserMessage
-from models.ai import AIContentRequest, AIContentResponse, ATSAnalysisRequest, ATSAnalysisResponse
-import json
-import re
+from models.ai import (
+    AIContentRequest, AIContentResponse, ATSAnalysisRequest, ATSAnalysisResponse,
+    CVOptimizationRequest, CVOptimizationResponse, SectionOptimizationResult,
+    CVATSAnalysisRequest, CVATSAnalysisResponse, JobMatchRequest, JobMatchResult, JobMatchResponse
+)
+from models.cv import CVData, CVSection
+from services.ai_cache import AICache
+from services.ats_scorer import LocalATSScorer, SECTION_WEIGHTS
+from services.cv_text import section_to_text, cv_to_text, visible_sections
+from services.job_matcher import JobMatcher
+from services.json_stream import JSONFieldStream, JSONObjectExtractor, extract_json_object
+from services.latency_tracker import LatencyTracker
+from services.llm_backends import LLMBackend, create_llm_backend
+from services.llm_scheduler import LLMScheduler, SchedulerOverloadedError
+from services.near_duplicate import NearDuplicateIndex
+from services.prompt_budget import PromptBudget
+from services.section_score_store import SectionScoreStore
+from services.skill_matcher import SkillMatcher
+from services.single_flight import SingleFlight
+from services.usage_ledger import UsageLedger
+import asyncio
+import difflib
+import hashlib
+import time
 
 load_dotenv()
 
+CONTENT_SYSTEM_MESSAGE = "You are an expert CV writer and ATS optimization specialist. You help professionals create compelling, ATS-friendly CV content that stands out to both algorithms and human recruiters."
+ATS_SYSTEM_MESSAGE = "You are an ATS (Applicant Tracking System) expert. You analyze CVs and provide detailed ATS compatibility scores and improvement suggestions."
+JSON_REPAIR_SYSTEM_MESSAGE = "You convert text into a single valid JSON object. You never add commentary."
+
+# Longest malformed response sent back for reformatting
+MAX_REPAIR_CHARS = 12000
+
+# Seconds each endpoint waits for the LLM, queueing included; overridable with AI_DEADLINE_<ENDPOINT>
+LLM_DEADLINES = {
+    "content_optimization": 45,
+    "cv_optimization": 90,
+    "ats_analysis": 30,
+    "ats_suggestions": 20,
+    "ats_section": 20
+}
+
+# Contact details are never sent to the LLM by whole-CV optimization, nor charged for
+PERSONAL_SECTION_TYPES = {"personal_info", "contact", "contact_info"}
+
 class AIService:
     """AI content generation and optimization service"""
     
-    def __init__(self):
-        self.api_key = os.getenv("EMERGENT_LLM_KEY")
-        if not self.api_key:
-            raise ValueError("EMERGENT_LLM_KEY not found in environment variables")
+    def __init__(self, backend: Optional[LLMBackend] = None, cache: Optional[AICache] = None):
+        self.backend = backend or create_llm_backend()
+        self.batch_concurrency = int(os.getenv("AI_BATCH_CONCURRENCY", "4"))
+        self.cache = cache or AICache()
+        # The skill automaton is compiled once and shared by every request
+        self.skill_matcher = SkillMatcher()
+        self.ats_scorer = LocalATSScorer(skill_matcher=self.skill_matcher)
+        self.job_matcher = JobMatcher(skill_matcher=self.skill_matcher)
+        self.prompt_budget = PromptBudget(skill_matcher=self.skill_matcher, ats_scorer=self.ats_scorer)
+        self.section_scores = SectionScoreStore()
+        self.single_flight = SingleFlight()
+        self.scheduler = LLMScheduler()
+        # Unparseable responses are re-sent for reformatting only, never re-analyzed
+        self.parse_retries = int(os.getenv("AI_PARSE_RETRIES", "1"))
+        self.parse_stats = {"repairs_attempted": 0, "repairs_succeeded": 0, "failures": 0}
+        # A stuck upstream call is abandoned at its deadline; a slow one may be hedged
+        # with a duplicate request once it passes the endpoint's observed p95
+        self.deadlines = {
+            endpoint: float(os.getenv(f"AI_DEADLINE_{endpoint.upper()}", str(default)))
+            for endpoint, default in LLM_DEADLINES.items()
+        }
+        self.latency = LatencyTracker()
+        self.hedge_enabled = os.getenv("AI_HEDGE_ENABLED", "false").lower() in ("1", "true", "yes")
+        self.hedge_percentile = float(os.getenv("AI_HEDGE_PERCENTILE", "0.95"))
+        self.hedge_min_samples = int(os.getenv("AI_HEDGE_MIN_SAMPLES", "20"))
+        self.hedge_stats = {"hedged": 0, "hedge_wins": 0}
+        # Recent inputs per user; an edit of a few words reuses or revises the earlier result
+        self.near_duplicates = NearDuplicateIndex()
+        # Every call is recorded per user; writes are batched in the background (started by the app)
+        self.usage = UsageLedger()
     
-    async def optimize_content(self, request: AIContentRequest) -> AIContentResponse:
-        """Optimize CV content for ATS and engagement"""
+    async def optimize_content(
+        self,
+        request: AIContentRequest,
+        tier: str = "free",
+        user_id: Optional[str] = None
+    ) -> AIContentResponse:
+        """Optimize CV content for ATS and engagement
         
-        # Create AI chat instance
-        chat = LlmChat(
-            api_key=self.api_key,
-            session_id=f"content_optimization_{request.section_type}",
-            system_message="You are an expert CV writer and ATS optimization specialist. You help professionals create compelling, ATS-friendly CV content that stands out to both algorithms and human recruiters."
-        ).with_model("openai", "gpt-4o-mini")
+        With a user_id, content the user optimized recently (up to whitespace) is answered
+        from that result, and a similar but edited one only asks the LLM to apply the edit
+        to the previous optimized content.
+        """
+        
+        scope = self._content_scope(request)
+        outcome, previous = None, None
+        if user_id and request.existing_content.strip():
+            outcome, previous = self.near_duplicates.match(
+                "content_optimization", user_id, scope, request.existing_content
+            )
+        
+        if outcome == "serve":
+            return AIContentResponse(**previous["result"])
         
         # Create optimization prompt
-        prompt = self._create_content_optimization_prompt(request)
-        user_message = UserMessage(text=prompt)
+        if outcome == "seed":
+            prompt = self._create_content_revision_prompt(request, previous["text"], previous["result"])
+        else:
+            prompt = self._create_content_optimization_prompt(request)
         
         try:
-            # Get AI response
-            response = await chat.send_message(user_message)
+            # Get AI response (served from cache when the prompt was answered before)
+            response = await self._complete(
+                CONTENT_SYSTEM_MESSAGE,
+                prompt,
+                session_id=f"content_optimization_{request.section_type}",
+                tier=tier,
+                validator=self._validate_content,
+                endpoint="content_optimization"
+            )
             
             # Parse the response
-            return self._parse_content_response(response, request)
+            result = self._parse_content_response(response, request)
+            if user_id and request.existing_content.strip() and self._extract_json(response, self._validate_content) is not None:
+                self.near_duplicates.add(user_id, scope, request.existing_content, result.dict())
+            return result
             
+        except SchedulerOverloadedError:
+            raise
+        except asyncio.TimeoutError:
+            raise Exception(f"AI content optimization failed: no response within {self.deadlines['content_optimization']:g}s")
         except Exception as e:
             raise Exception(f"AI content optimization failed: {str(e)}")
     
-    async def analyze_ats_score(self, request: ATSAnalysisRequest) -> ATSAnalysisResponse:
-        """Analyze CV content for ATS compatibility"""
+    async def analyze_ats_score(
+        self,
+        request: ATSAnalysisRequest,
+        mode: str = "llm",
+        tier: str = "free",
+        user_id: Optional[str] = None
+    ) -> ATSAnalysisResponse:
+        """Analyze CV content for ATS compatibility
+        
+        mode "local" scores deterministically without the LLM, "hybrid" uses the local
+        scores and asks the LLM only for free-text suggestions, "llm" delegates everything.
+        In "llm" mode a CV the user analyzed recently against the same job description (up
+        to whitespace) reuses that analysis with freshly computed keyword statistics.
+        """
         
-        chat = LlmChat(
-            api_key=self.api_key,
-            session_id=f"ats_analysis",
-            system_message="You are an ATS (Applicant Tracking System) expert. You analyze CVs and provide detailed ATS compatibility scores and improvement suggestions."
-        ).with_model("openai", "gpt-4o-mini")
+        if mode == "local":
+            return self.ats_scorer.analyze(request)
+        
+        if mode == "hybrid":
+            return await self._analyze_ats_hybrid(request, tier)
+        
+        scope = self._ats_scope(request)
+        if user_id:
+            outcome, previous = self.near_duplicates.match(
+                "ats_analysis", user_id, scope, request.cv_content, allow_seed=False
+            )
+            if outcome == "serve":
+                # Only identical text is served, so the stored analysis still applies as is
+                return ATSAnalysisResponse(**previous["result"])
         
         prompt = self._create_ats_analysis_prompt(request)
-        user_message = UserMessage(text=prompt)
         
         try:
-            response = await chat.send_message(user_message)
-            return self._parse_ats_response(response, request)
+            response = await self._complete(
+                ATS_SYSTEM_MESSAGE, prompt, session_id="ats_analysis", tier=tier,
+                validator=self._validate_ats, endpoint="ats_analysis"
+            )
+            result = self._parse_ats_response(response, request)
+            if user_id and self._extract_json(response, self._validate_ats) is not None:
+                self.near_duplicates.add(user_id, scope, request.cv_content, result.dict())
+            return result
+            
+        except SchedulerOverloadedError:
+            raise
+        except asyncio.TimeoutError:
+            return self._degraded_ats_result(request)
+        except Exception as e:
+            raise Exception(f"ATS analysis failed: {str(e)}")
+    
+    async def analyze_cv_sections(self, cv: CVData, request: CVATSAnalysisRequest, tier: str = "free") -> CVATSAnalysisResponse:
+        """Section-aware ATS analysis that only re-scores sections changed since the last run"""
+        job_description = request.job_description or ""
+        
+        sections = []
+        for section in visible_sections(cv):
+            text = section_to_text(section)
+            if text:
+                sections.append((section, text, self._section_hash(section, text, job_description)))
+        
+        section_hashes = [section_hash for _, _, section_hash in sections]
+        stored = await self.section_scores.get_scores(cv.id, section_hashes) if sections else {}
+        changed = [(section, text, section_hash) for section, text, section_hash in sections if section_hash not in stored]
+        
+        # Only changed sections go to the LLM
+        semaphore = asyncio.Semaphore(self.batch_concurrency)
+        
+        async def score_section(section: CVSection, text: str) -> Tuple[Dict[str, Any], bool]:
+            async with semaphore:
+                return await self._score_section(section, text, job_description, tier)
+        
+        results = await asyncio.gather(*[score_section(section, text) for section, text, _ in changed])
+        fresh = {section_hash: score for (_, _, section_hash), (score, _) in zip(changed, results)}
+        
+        # Fallback scores are not persisted so the section is retried next time
+        await self.section_scores.save_scores(cv.id, {
+            section_hash: score for (_, _, section_hash), (score, parsed) in zip(changed, results) if parsed
+        })
+        await self.section_scores.prune(cv.id, section_hashes)
+        
+        # Keyword statistics are computed locally over the whole CV; they need no LLM call
+        keyword_result = self.ats_scorer.analyze(
+            ATSAnalysisRequest(cv_content=cv_to_text(cv), job_description=request.job_description)
+        )
+        
+        section_scores = {}
+        suggestions = []
+        weighted_total = 0.0
+        total_weight = 0.0
+        
+        for section, _, section_hash in sections:
+            score = fresh.get(section_hash) or stored[section_hash]
+            name = section.type if section.type not in section_scores else f"{section.type}_{len(section_scores)}"
+            section_scores[name] = score["score"]
+            
+            weight = SECTION_WEIGHTS.get(section.type, 0.1)
+            weighted_total += score["score"] * weight
+            total_weight += weight
+            
+            suggestions.extend(suggestion for suggestion in score["suggestions"] if suggestion not in suggestions)
+        
+        return CVATSAnalysisResponse(
+            overall_score=round(weighted_total / total_weight) if total_weight else 0,
+            section_scores=section_scores,
+            suggestions=suggestions or keyword_result.suggestions,
+            missing_keywords=keyword_result.missing_keywords,
+            keyword_density=keyword_result.keyword_density,
+            degraded=any(score.get("degraded", False) for score, _ in results),
+            rescored_sections=[section.title for section, _, _ in changed],
+            reused_sections=[section.title for section, _, section_hash in sections if section_hash in stored]
+        )
+    
+    def optimizable_sections(self, cv: CVData) -> List[Tuple[int, CVSection, str]]:
+        """Visible sections with text in display order, each paired with its index in CVData.sections
+        
+        Personal and contact sections are left out; they hold no content worth rewriting.
+        """
+        sections = [
+            (index, section, section_to_text(section))
+            for index, section in sorted(enumerate(cv.sections), key=lambda item: item[1].order)
+            if section.is_visible and section.type not in PERSONAL_SECTION_TYPES
+        ]
+        return [(index, section, text) for index, section, text in sections if text]
+    
+    async def optimize_cv(self, cv: CVData, request: CVOptimizationRequest, tier: str = "free") -> CVOptimizationResponse:
+        """Optimize every visible section of a CV concurrently, or in one combined LLM call"""
+        
+        sections = self.optimizable_sections(cv)
+        if not sections:
+            return CVOptimizationResponse(cv_id=cv.id, sections=[])
+        
+        if request.combined:
+            results = await self._optimize_sections_combined(sections, request, tier)
+        else:
+            semaphore = asyncio.Semaphore(self.batch_concurrency)
+            
+            async def optimize_section(section: CVSection, text: str) -> AIContentResponse:
+                async with semaphore:
+                    return await self.optimize_content(AIContentRequest(
+                        section_type=section.type,
+                        job_title=request.job_title,
+                        company=request.company,
+                        existing_content=text,
+                        target_keywords=request.target_keywords,
+                        tone=request.tone
+                    ), tier=tier)
+            
+            results = await asyncio.gather(*[
+                optimize_section(section, text) for _, section, text in sections
+            ])
+        
+        return CVOptimizationResponse(
+            cv_id=cv.id,
+            sections=[
+                SectionOptimizationResult(
+                    section_index=index,
+                    section_type=section.type,
+                    title=section.title,
+                    result=result
+                )
+                for (index, section, _), result in zip(sections, results)
+            ]
+        )
+    
+    async def match_job_descriptions(self, cv: CVData, request: JobMatchRequest, tier: str = "free") -> JobMatchResponse:
+        """Rank many job descriptions against one CV locally; only the top-k matches go to the LLM"""
+        cv_content = cv_to_text(cv)
+        # Ranking is CPU-bound, so it runs off the event loop
+        matches = await asyncio.to_thread(self.job_matcher.rank, cv_content, request.job_descriptions)
+        results = [JobMatchResult(**match) for match in matches]
+        
+        semaphore = asyncio.Semaphore(self.batch_concurrency)
+        
+        async def analyze(result: JobMatchResult):
+            async with semaphore:
+                result.ats_analysis = await self.analyze_ats_score(
+                    ATSAnalysisRequest(cv_content=cv_content, job_description=request.job_descriptions[result.index]),
+                    mode=request.mode,
+                    tier=tier
+                )
+        
+        await asyncio.gather(*[analyze(result) for result in results[:max(request.top_k, 0)]])
+        
+        return JobMatchResponse(cv_id=cv.id, results=results)
+    
+    async def stream_optimize_content(
+        self,
+        request: AIContentRequest,
+        tier: str = "free",
+        user_id: Optional[str] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """Stream content optimization as (event, data) pairs: tokens, completed fields, then the result
+        
+        A user_id reuses or revises recent results like optimize_content does.
+        """
+        scope = self._content_scope(request)
+        outcome, previous = None, None
+        if user_id and request.existing_content.strip():
+            outcome, previous = self.near_duplicates.match(
+                "content_optimization", user_id, scope, request.existing_content
+            )
+        
+        if outcome == "serve":
+            yield "result", previous["result"]
+            return
+        
+        if outcome == "seed":
+            prompt = self._create_content_revision_prompt(request, previous["text"], previous["result"])
+        else:
+            prompt = self._create_content_optimization_prompt(request)
+        
+        remember = None
+        if user_id and request.existing_content.strip():
+            remember = lambda result: self.near_duplicates.add(user_id, scope, request.existing_content, result.dict())
+        
+        async for event in self._stream(
+            CONTENT_SYSTEM_MESSAGE,
+            prompt,
+            session_id=f"content_optimization_{request.section_type}",
+            parse=lambda response: self._parse_content_response(response, request),
+            tier=tier,
+            validator=self._validate_content,
+            endpoint="content_optimization",
+            on_result=remember,
+            expected_fields=AIContentResponse.__fields__
+        ):
+            yield event
+    
+    async def stream_ats_analysis(
+        self,
+        request: ATSAnalysisRequest,
+        tier: str = "free",
+        user_id: Optional[str] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """Stream ATS analysis as (event, data) pairs: tokens, completed fields, then the result
+        
+        A user_id reuses the analysis of an identical recent request like analyze_ats_score does.
+        """
+        scope = self._ats_scope(request)
+        remember = None
+        if user_id:
+            outcome, previous = self.near_duplicates.match(
+                "ats_analysis", user_id, scope, request.cv_content, allow_seed=False
+            )
+            if outcome == "serve":
+                yield "result", previous["result"]
+                return
+            remember = lambda result: self.near_duplicates.add(user_id, scope, request.cv_content, result.dict())
+        
+        prompt = self._create_ats_analysis_prompt(request)
+        
+        async for event in self._stream(
+            ATS_SYSTEM_MESSAGE,
+            prompt,
+            session_id="ats_analysis",
+            parse=lambda response: self._parse_ats_response(response, request),
+            tier=tier,
+            validator=self._validate_ats,
+            endpoint="ats_analysis",
+            fallback=lambda: self._degraded_ats_result(request),
+            on_result=remember,
+            expected_fields=ATSAnalysisResponse.__fields__
+        ):
+            yield event
+    
+    async def close(self):
+        """Release LLM client connections"""
+        await self.backend.close()
+    
+    def keyword_coverage(self, cv_content: str, job_description: str) -> Dict[str, Any]:
+        """Alias-aware skill coverage of a CV against a job description"""
+        return self.skill_matcher.coverage(cv_content, job_description)
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get AI service performance counters"""
+        return {
+            "cache": self.cache.stats(),
+            "single_flight": self.single_flight.stats(),
+            "scheduler": self.scheduler.stats(),
+            "parsing": dict(self.parse_stats),
+            "prompt_budget": self.prompt_budget.stats(),
+            "latency": self.latency.stats(),
+            "hedging": {"enabled": self.hedge_enabled, **self.hedge_stats},
+            "near_duplicates": self.near_duplicates.stats(),
+            "backend": self.backend.stats(),
+            "usage_ledger": self.usage.stats()
+        }
+    
+    async def _complete(
+        self,
+        system_message: str,
+        prompt: str,
+        session_id: str,
+        tier: str = "free",
+        validator: Optional[Callable[[Dict[str, Any]], Any]] = None,
+        endpoint: str = "content_optimization"
+    ) -> str:
+        """Send a prompt to the LLM, consulting the response cache first
+        
+        Raises asyncio.TimeoutError when the endpoint's deadline passes first.
+        """
+        cache_key = AICache.make_key(self.backend.model_id, system_message, prompt)
+        started = time.monotonic()
+        
+        cached = await self.cache.get(cache_key)
+        if cached is not None:
+            self._record_usage(endpoint, tier, started, system_message + prompt, cached, "cache", "ok")
+            return cached
+        
+        source = "coalesced" if self.single_flight.running(cache_key) else "upstream"
+        try:
+            # Identical prompts already in flight share a single upstream call. The deadline is
+            # applied inside the shared call so a stuck request is cancelled and frees its slot.
+            response = await self.single_flight.do(
+                cache_key,
+                lambda: self._with_deadline(
+                    endpoint,
+                    self._call_llm(cache_key, system_message, prompt, session_id, tier, validator, endpoint)
+                )
+            )
+        except Exception as e:
+            self._record_usage(endpoint, tier, started, system_message + prompt, "", source, self._usage_outcome(e))
+            raise
+        
+        outcome = "ok" if self._extract_json(response, validator) is not None else "invalid"
+        self._record_usage(endpoint, tier, started, system_message + prompt, response, source, outcome)
+        return response
+    
+    def _record_usage(self, endpoint: str, tier: str, started: float, prompt: str, response: str, source: str, outcome: str):
+        """Add a call to the usage ledger"""
+        self.usage.record(
+            endpoint=endpoint,
+            model=self.backend.model_id,
+            prompt_tokens=self.prompt_budget.count_tokens(prompt),
+            completion_tokens=self.prompt_budget.count_tokens(response),
+            latency_ms=(time.monotonic() - started) * 1000,
+            source=source,
+            outcome=outcome,
+            tier=tier
+        )
+    
+    @staticmethod
+    def _usage_outcome(error: Exception) -> str:
+        if isinstance(error, asyncio.TimeoutError):
+            return "timeout"
+        if isinstance(error, SchedulerOverloadedError):
+            return "overloaded"
+        return "error"
+    
+    async def _with_deadline(self, endpoint: str, call) -> Any:
+        """Await call, abandoning it once the endpoint's deadline passes"""
+        deadline = self.deadlines.get(endpoint, LLM_DEADLINES["ats_analysis"])
+        try:
+            return await asyncio.wait_for(call, deadline)
+        except asyncio.TimeoutError:
+            self.latency.record_timeout(endpoint, deadline)
+            raise
+    
+    async def _call_llm(
+        self,
+        cache_key: str,
+        system_message: str,
+        prompt: str,
+        session_id: str,
+        tier: str,
+        validator: Optional[Callable[[Dict[str, Any]], Any]] = None,
+        endpoint: str = "content_optimization"
+    ) -> str:
+        """Perform the upstream LLM call and cache the result"""
+        response = await self._hedged_complete(endpoint, system_message, prompt, session_id, tier)
+        
+        if self._extract_json(response, validator) is None:
+            response = await self._repair_response(response, session_id, tier, validator)
+        
+        # Only cache well-formed responses so a bad completion is retried next time
+        if self._extract_json(response, validator) is not None:
+            await self.cache.set(cache_key, response)
+        
+        return response
+    
+    async def _hedged_complete(self, endpoint: str, system_message: str, prompt: str, session_id: str, tier: str) -> str:
+        """Upstream call, duplicated once it runs past the endpoint's p95 latency; the first answer wins"""
+        
+        async def attempt() -> str:
+            # Upstream concurrency is bounded; pro requests are served ahead of free ones
+            async with self.scheduler.slot(tier):
+                started = time.monotonic()
+                response = await self.backend.complete(system_message, prompt, session_id)
+                self.latency.record(endpoint, time.monotonic() - started)
+                return response
+        
+        delay = self._hedge_delay(endpoint)
+        if delay is None:
+            return await attempt()
+        
+        tasks = {asyncio.ensure_future(attempt())}
+        primary = next(iter(tasks))
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            
+            # Hedging only uses idle capacity; under load it would just add to the queue
+            if not done and self.scheduler.has_capacity():
+                self.hedge_stats["hedged"] += 1
+                tasks.add(asyncio.ensure_future(attempt()))
+            
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedge_stats["hedge_wins"] += 1
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    def _hedge_delay(self, endpoint: str) -> Optional[float]:
+        """Seconds to wait before hedging, or None when hedging is off or latencies are unknown"""
+        if not self.hedge_enabled or self.latency.count(endpoint) < self.hedge_min_samples:
+            return None
+        return self.latency.percentile(endpoint, self.hedge_percentile)
+    
+    async def _repair_response(
+        self,
+        response: str,
+        session_id: str,
+        tier: str,
+        validator: Optional[Callable[[Dict[str, Any]], Any]] = None
+    ) -> str:
+        """Retry only the parse step: ask the LLM to reformat its answer as JSON instead of redoing the analysis"""
+        for _ in range(self.parse_retries):
+            self.parse_stats["repairs_attempted"] += 1
+            prompt = self._create_json_repair_prompt(response)
+            
+            async with self.scheduler.slot(tier):
+                repaired = await self.backend.complete(JSON_REPAIR_SYSTEM_MESSAGE, prompt, f"{session_id}_repair")
+            
+            if self._extract_json(repaired, validator) is not None:
+                self.parse_stats["repairs_succeeded"] += 1
+                return repaired
+        
+        self.parse_stats["failures"] += 1
+        return response
+    
+    async def _stream(
+        self,
+        system_message: str,
+        prompt: str,
+        session_id: str,
+        parse: Callable[[str], Any],
+        tier: str = "free",
+        validator: Optional[Callable[[Dict[str, Any]], Any]] = None,
+        endpoint: str = "content_optimization",
+        fallback: Optional[Callable[[], Any]] = None,
+        on_result: Optional[Callable[[Any], None]] = None,
+        expected_fields: Optional[Iterable[str]] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """Stream a completion, emitting each top-level JSON field as soon as it closes
+        
+        Only expected_fields are emitted, and only from an object that contains one.
+        When the endpoint's deadline passes the stream ends with the fallback result,
+        or raises asyncio.TimeoutError if there is none. on_result receives the parsed
+        result of a valid response, but not fallbacks or repaired-to-default results.
+        """
+        cache_key = AICache.make_key(self.backend.model_id, system_message, prompt)
+        started = time.monotonic()
+        
+        cached = await self.cache.get(cache_key)
+        fields = JSONFieldStream(expected_fields)
+        parts = []
+        
+        if cached is not None:
+            self._record_usage(endpoint, tier, started, system_message + prompt, cached, "cache", "ok")
+            parts.append(cached)
+            yield "token", cached
+            
+            for name, value in fields.feed(cached):
+                yield "field", {"name": name, "value": value}
+            
+            result = parse(cached)
+            if on_result is not None:
+                on_result(result)
+            yield "result", result.dict()
+            return
+        
+        # The upstream is read by a separate task so the deadline covers queueing and
+        # generation but not the time the client takes to consume events
+        chunks: asyncio.Queue = asyncio.Queue()
+        producer = asyncio.ensure_future(self._with_deadline(
+            endpoint,
+            self._produce_stream(chunks, endpoint, system_message, prompt, session_id, tier, validator)
+        ))
+        producer.add_done_callback(lambda _: chunks.put_nowait(None))
+        
+        try:
+            while (chunk := await chunks.get()) is not None:
+                parts.append(chunk)
+                yield "token", chunk
+                
+                for name, value in fields.feed(chunk):
+                    yield "field", {"name": name, "value": value}
+            
+            producer.result()
+            
+            response = "".join(parts)
+            if self._extract_json(response, validator) is None:
+                response = await self._with_deadline(
+                    endpoint, self._repair_response(response, session_id, tier, validator)
+                )
+            if self._extract_json(response, validator) is not None:
+                await self.cache.set(cache_key, response)
+            
+        except asyncio.TimeoutError as e:
+            self._record_usage(endpoint, tier, started, system_message + prompt, "".join(parts), "upstream", self._usage_outcome(e))
+            if fallback is None:
+                raise
+            yield "result", fallback().dict()
+            return
+        except Exception as e:
+            self._record_usage(endpoint, tier, started, system_message + prompt, "".join(parts), "upstream", self._usage_outcome(e))
+            raise
+        finally:
+            producer.cancel()
+        
+        outcome = "ok" if self._extract_json(response, validator) is not None else "invalid"
+        self._record_usage(endpoint, tier, started, system_message + prompt, response, "upstream", outcome)
+        result = parse(response)
+        if on_result is not None and outcome == "ok":
+            on_result(result)
+        yield "result", result.dict()
+    
+    async def _produce_stream(
+        self,
+        chunks: asyncio.Queue,
+        endpoint: str,
+        system_message: str,
+        prompt: str,
+        session_id: str,
+        tier: str,
+        validator: Optional[Callable[[Dict[str, Any]], Any]] = None
+    ):
+        """Read an upstream stream into a queue, stopping once a valid JSON object has closed"""
+        objects = JSONObjectExtractor()
+        
+        # The scheduler slot is held for as long as the upstream stream is open
+        async with self.scheduler.slot(tier):
+            started = time.monotonic()
+            stream = self.backend.stream(system_message, prompt, session_id)
+            try:
+                async for chunk in stream:
+                    chunks.put_nowait(chunk)
+                    
+                    # Trailing prose after the answer is never used
+                    if any(self._extract_json(source, validator) is not None for source in objects.feed(chunk)):
+                        break
+            finally:
+                await stream.aclose()
+            
+            self.latency.record(endpoint, time.monotonic() - started)
+    
+    async def _analyze_ats_hybrid(self, request: ATSAnalysisRequest, tier: str) -> ATSAnalysisResponse:
+        """Local scores combined with LLM-written suggestions"""
+        local_result = self.ats_scorer.analyze(request)
+        prompt = self._create_ats_suggestions_prompt(request, local_result)
+        
+        try:
+            response = await self._complete(
+                ATS_SYSTEM_MESSAGE, prompt, session_id="ats_suggestions", tier=tier,
+                validator=self._validate_suggestions, endpoint="ats_suggestions"
+            )
+            
+        except SchedulerOverloadedError:
+            raise
+        except asyncio.TimeoutError:
+            return local_result.copy(update={"degraded": True})
+        except Exception as e:
+            raise Exception(f"ATS analysis failed: {str(e)}")
+        
+        data = self._extract_json(response, self._validate_suggestions)
+        if data is None:
+            return local_result
+        
+        return local_result.copy(update={"suggestions": [str(suggestion) for suggestion in data["suggestions"]]})
+    
+    async def _score_section(self, section: CVSection, text: str, job_description: str, tier: str) -> Tuple[Dict[str, Any], bool]:
+        """Score a single section with the LLM; returns the score and whether the response parsed"""
+        prompt = self._create_section_ats_prompt(section, text, job_description)
+        
+        try:
+            response = await self._complete(
+                ATS_SYSTEM_MESSAGE, prompt, session_id="ats_section_analysis", tier=tier,
+                validator=self._validate_section_score, endpoint="ats_section"
+            )
             
+        except SchedulerOverloadedError:
+            raise
+        except asyncio.TimeoutError:
+            # Scored locally and not persisted, so the section goes back to the LLM next time
+            local_result = self.ats_scorer.analyze(ATSAnalysisRequest(cv_content=text, job_description=job_description or None))
+            return {
+                "section_type": section.type,
+                "score": local_result.overall_score,
+                "suggestions": local_result.suggestions[:3],
+                "degraded": True
+            }, False
         except Exception as e:
             raise Exception(f"ATS analysis failed: {str(e)}")
+        
+        data = self._extract_json(response, self._validate_section_score)
+        try:
+            return {
+                "section_type": section.type,
+                "score": max(0, min(100, int(data["score"]))),
+                "suggestions": [str(suggestion) for suggestion in data.get("suggestions", [])]
+            }, True
+        except Exception:
+            return {
+                "section_type": section.type,
+                "score": 70,
+                "suggestions": ["AI analysis parsing failed - manual review recommended"]
+            }, False
+    
+    def _degraded_ats_result(self, request: ATSAnalysisRequest) -> ATSAnalysisResponse:
+        """Local scorer result served when the LLM misses its deadline"""
+        return self.ats_scorer.analyze(request).copy(update={"degraded": True})
+    
+    def _content_scope(self, request: AIContentRequest) -> str:
+        """Everything besides the existing content that shapes a content optimization"""
+        return "\x00".join([
+            self.backend.model_id, request.section_type, request.job_title or "",
+            request.company or "", request.tone, ",".join(request.target_keywords)
+        ])
+    
+    def _ats_scope(self, request: ATSAnalysisRequest) -> str:
+        """Everything besides the CV content that shapes an ATS analysis"""
+        return "\x00".join([self.backend.model_id, request.job_description or ""])
+    
+    def _section_hash(self, section: CVSection, text: str, job_description: str) -> str:
+        """Hash of everything that influences a section's score"""
+        digest = hashlib.sha256()
+        for part in (self.backend.model_id, section.type, section.title, text, job_description):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\x00')
+        return digest.hexdigest()
+    
+    async def _optimize_sections_combined(self, sections: List, request: CVOptimizationRequest, tier: str) -> List[AIContentResponse]:
+        """Optimize all sections with a single LLM call"""
+        prompt = self._create_combined_optimization_prompt(sections, request)
+        
+        try:
+            response = await self._complete(
+                CONTENT_SYSTEM_MESSAGE, prompt, session_id="content_optimization_cv", tier=tier,
+                validator=self._validate_combined, endpoint="cv_optimization"
+            )
+            return self._parse_combined_response(response, sections, request)
+            
+        except SchedulerOverloadedError:
+            raise
+        except asyncio.TimeoutError:
+            raise Exception(f"AI CV optimization failed: no response within {self.deadlines['cv_optimization']:g}s")
+        except Exception as e:
+            raise Exception(f"AI CV optimization failed: {str(e)}")
     
     def _create_content_optimization_prompt(self, request: AIContentRequest) -> str:
         """Create prompt for content optimization"""
+        existing_content, _ = self.prompt_budget.fit("content_optimization", request.existing_content)
+        
         return f"""
 Optimize the following CV {request.section_type} section for maximum ATS compatibility and human appeal:
 
@@ -70,7 +812,7 @@ Tone: {request.tone}
 Target Keywords: {', '.join(request.target_keywords)}
 
 Existing Content:
-{request.existing_content}
+{existing_content}
 
 Please provide:
 1. Optimized content that is ATS-friendly and engaging
@@ -85,17 +827,81 @@ Return your response in this JSON format:
   "keywords_used": ["keyword1", "keyword2"],
   "ats_score": 85
 }}
+"""
+    
+    def _create_content_revision_prompt(self, request: AIContentRequest, previous_content: str, previous_result: Dict[str, Any]) -> str:
+        """Create prompt that applies a small edit to previously optimized content"""
+        existing_content, previous_content, previous_optimized = self.prompt_budget.fit_all(
+            "content_revision", request.existing_content, previous_content, previous_result["optimized_content"]
+        )
+        changes = "\n".join(difflib.unified_diff(
+            previous_content.splitlines(), existing_content.splitlines(), lineterm="", n=0
+        ))
+        
+        return f"""
+The following CV {request.section_type} section was already optimized for ATS compatibility and human appeal.
+The original content has since been edited; update the optimized version to reflect the edit only.
+
+Job Title: {request.job_title}
+Company: {request.company or 'Not specified'}
+Tone: {request.tone}
+Target Keywords: {', '.join(request.target_keywords)}
+
+Edit to the original content (unified diff):
+{changes}
+
+Previously optimized content:
+{previous_optimized}
+
+Keep everything the edit does not touch unchanged. Return your response in this JSON format:
+{{
+  "optimized_content": "Your updated optimized content here",
+  "suggestions": ["suggestion1", "suggestion2", "suggestion3"],
+  "keywords_used": ["keyword1", "keyword2"],
+  "ats_score": 85
+}}
 """
     
     def _create_ats_analysis_prompt(self, request: ATSAnalysisRequest) -> str:
         """Create prompt for ATS analysis"""
-        job_desc_text = f"\nJob Description:\n{request.job_description}" if request.job_description else ""
+        cv_content, job_description = self.prompt_budget.fit("ats_analysis", request.cv_content, request.job_description)
+        
+        # With a job description, keyword coverage is computed locally by the skill matcher,
+        # so the LLM is only asked for scores and suggestions
+        if request.job_description:
+            return f"""
+Analyze this CV content for ATS compatibility against the job description and provide a detailed assessment:
+
+CV Content:
+{cv_content}
+
+Job Description:
+{job_description}
+
+Provide a comprehensive ATS analysis including:
+1. Overall ATS compatibility score (0-100)
+2. Section-by-section scores
+3. Specific improvement suggestions
+
+Return your response in this JSON format:
+{{
+  "overall_score": 75,
+  "section_scores": {{
+    "contact_info": 90,
+    "summary": 80,
+    "experience": 70,
+    "skills": 85,
+    "education": 75
+  }},
+  "suggestions": ["Add more action verbs", "Include industry keywords"]
+}}
+"""
         
         return f"""
 Analyze this CV content for ATS compatibility and provide a detailed assessment:
 
 CV Content:
-{request.cv_content}{job_desc_text}
+{cv_content}
 
 Provide a comprehensive ATS analysis including:
 1. Overall ATS compatibility score (0-100)
@@ -123,14 +929,134 @@ Return your response in this JSON format:
 }}
 """
     
+    def _create_ats_suggestions_prompt(self, request: ATSAnalysisRequest, local_result: ATSAnalysisResponse) -> str:
+        """Create prompt asking only for suggestions, given locally computed scores"""
+        weak_sections = [name for name, score in local_result.section_scores.items() if score < 75]
+        cv_content, _ = self.prompt_budget.fit("ats_suggestions", request.cv_content)
+        
+        return f"""
+Suggest improvements to this CV for ATS compatibility:
+
+CV Content:
+{cv_content}
+
+Automated analysis found:
+Overall ATS score: {local_result.overall_score}
+Weak sections: {', '.join(weak_sections) or 'None'}
+Missing keywords: {', '.join(local_result.missing_keywords) or 'None'}
+
+Provide 3-5 specific, actionable improvement suggestions.
+
+Return your response in this JSON format:
+{{
+  "suggestions": ["Add more action verbs", "Include industry keywords"]
+}}
+"""
+    
+    def _create_section_ats_prompt(self, section: CVSection, text: str, job_description: str) -> str:
+        """Create prompt for scoring a single CV section"""
+        text, job_description = self.prompt_budget.fit("ats_section", text, job_description)
+        job_desc_text = f"\nJob Description:\n{job_description}" if job_description else ""
+        
+        return f"""
+Analyze this CV {section.type} section ("{section.title}") for ATS compatibility:
+
+Section Content:
+{text}{job_desc_text}
+
+Provide:
+1. ATS compatibility score for this section (0-100)
+2. 1-3 specific improvement suggestions for this section
+
+Return your response in this JSON format:
+{{
+  "score": 80,
+  "suggestions": ["Add more action verbs", "Include industry keywords"]
+}}
+"""
+    
+    def _create_combined_optimization_prompt(self, sections: List, request: CVOptimizationRequest) -> str:
+        """Create prompt that optimizes several CV sections at once"""
+        section_text = "\n\n".join(
+            f"Section {position} ({section.type} - {section.title}):\n{self.prompt_budget.fit('cv_optimization', text)[0]}"
+            for position, (_, section, text) in enumerate(sections)
+        )
+        
+        return f"""
+Optimize each of the following CV sections for maximum ATS compatibility and human appeal:
+
+Job Title: {request.job_title}
+Company: {request.company or 'Not specified'}
+Tone: {request.tone}
+Target Keywords: {', '.join(request.target_keywords)}
+
+{section_text}
+
+For every section provide:
+1. Optimized content that is ATS-friendly and engaging
+2. 3-5 specific improvement suggestions
+3. List of keywords incorporated
+4. ATS compatibility score (0-100)
+
+Return your response in this JSON format, with one entry per section in the same order:
+{{
+  "sections": [
+    {{
+      "section": 0,
+      "optimized_content": "Your optimized content here",
+      "suggestions": ["suggestion1", "suggestion2", "suggestion3"],
+      "keywords_used": ["keyword1", "keyword2"],
+      "ats_score": 85
+    }}
+  ]
+}}
+"""
+    
+    def _create_json_repair_prompt(self, response: str) -> str:
+        """Create prompt asking the LLM to reformat a malformed response as JSON"""
+        return f"""
+The following answer was supposed to be a single JSON object but could not be parsed.
+Return the same information as one valid JSON object with the same field names.
+Do not change, add or remove any content and do not wrap it in a code block.
+
+Answer:
+{response[:MAX_REPAIR_CHARS]}
+"""
+    
+    def _extract_json(self, response: str, validator: Optional[Callable[[Dict[str, Any]], Any]] = None) -> Optional[Dict[str, Any]]:
+        """Extract the first JSON object embedded in an AI response that passes the validator"""
+        return extract_json_object(response, validator)
+    
+    @staticmethod
+    def _validate_content(data: Dict[str, Any]):
+        AIContentResponse(**data)
+    
+    @staticmethod
+    def _validate_ats(data: Dict[str, Any]):
+        # Keyword fields may be left out; they are filled in from the local scorer
+        ATSAnalysisResponse(**{"missing_keywords": [], "keyword_density": {}, **data})
+    
+    @staticmethod
+    def _validate_suggestions(data: Dict[str, Any]):
+        if not isinstance(data.get("suggestions"), list) or not data["suggestions"]:
+            raise ValueError("suggestions missing")
+    
+    @staticmethod
+    def _validate_section_score(data: Dict[str, Any]):
+        int(data["score"])
+    
+    @staticmethod
+    def _validate_combined(data: Dict[str, Any]):
+        if not isinstance(data.get("sections"), list):
+            raise ValueError("sections missing")
+    
     def _parse_content_response(self, response: str, request: AIContentRequest) -> AIContentResponse:
         """Parse AI content optimization response"""
         try:
             # Extract JSON from response
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                data = json.loads(json_match.group())
-                return AIContentResponse(**data)
+            data = self._extract_json(response, self._validate_content)
+            if data is not None:
+                return self._verify_keywords(AIContentResponse(**data), request.target_keywords)
             else:
                 # Fallback if JSON parsing fails
                 return AIContentResponse(
@@ -147,26 +1073,69 @@ Return your response in this JSON format:
                 ats_score=70
             )
     
+    def _verify_keywords(self, result: AIContentResponse, target_keywords: List[str]) -> AIContentResponse:
+        """Report only keywords that actually appear in the optimized content"""
+        result.keywords_used = self.skill_matcher.match_terms(
+            result.optimized_content,
+            list(dict.fromkeys(target_keywords + result.keywords_used))
+        )
+        return result
+    
+    def _parse_combined_response(self, response: str, sections: List, request: CVOptimizationRequest) -> List[AIContentResponse]:
+        """Parse combined optimization response into one result per section"""
+        entries = {}
+        data = self._extract_json(response, self._validate_combined)
+        if data is not None:
+            for position, entry in enumerate(data.get("sections", [])):
+                try:
+                    entries[entry.get("section", position)] = self._verify_keywords(
+                        AIContentResponse(**{k: v for k, v in entry.items() if k != "section"}),
+                        request.target_keywords
+                    )
+                except Exception:
+                    continue
+        
+        return [
+            entries.get(position) or AIContentResponse(
+                optimized_content=text,
+                suggestions=["AI response parsing failed - manual review recommended"],
+                keywords_used=request.target_keywords,
+                ats_score=70
+            )
+            for position, (_, _, text) in enumerate(sections)
+        ]
+    
     def _parse_ats_response(self, response: str, request: ATSAnalysisRequest) -> ATSAnalysisResponse:
         """Parse ATS analysis response"""
+        _, missing_keywords, keyword_density = self.ats_scorer.keyword_statistics(
+            request.cv_content, request.job_description
+        )
+        
         try:
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                data = json.loads(json_match.group())
+            data = self._extract_json(response, self._validate_ats)
+            if data is not None:
+                # The LLM reads the job description in context; frequency-ranked local
+                # terms only stand in when it returned no keywords
+                if not data.get("missing_keywords"):
+                    data["missing_keywords"] = missing_keywords
+                if request.job_description:
+                    data["keyword_density"] = keyword_density
+                else:
+                    data.setdefault("keyword_density", keyword_density)
                 return ATSAnalysisResponse(**data)
             else:
                 return ATSAnalysisResponse(
                     overall_score=70,
                     section_scores={"general": 70},
                     suggestions=["AI analysis parsing failed - manual review recommended"],
-                    missing_keywords=[],
-                    keyword_density={}
+                    missing_keywords=missing_keywords,
+                    keyword_density=keyword_density
                 )
         except Exception:
             return ATSAnalysisResponse(
                 overall_score=70,
                 section_scores={"general": 70},
                 suggestions=["AI analysis parsing failed - manual review recommended"],
-                missing_keywords=[],
-                keyword_density={}
-            )
\ No newline at end of file
+                missing_keywords=missing_keywords,
+                keyword_density=keyword_density
+            )
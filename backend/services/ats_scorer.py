@@ -0,0 +1,247 @@
+from typing import Dict, List, Optional, Tuple
+from collections import Counter
+from models.ai import ATSAnalysisRequest, ATSAnalysisResponse
+from services.skill_matcher import SkillMatcher, tokenize
+import numpy as np
+import re
+
+STOPWORDS = frozenset("""
+a about above across after again against all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each etc few for from further get had
+has have having he her here hers him his how i if in into is it its itself just may me more most must my
+no nor not now of off on once only or other our ours out over own per plus same she should so some such
+than that the their theirs them then there these they this those through to too under until up upon us
+very via was we were what when where which while who whom why will with within without would you your
+ability able candidate candidates company day days experience including job looking new position preferred
+required requirements responsibilities role skills strong team work working year years well across etc
+need needs needed want wants seek seeks seeking someone person people join help build maintain grow know
+ensure support apply make take use using like love excellent good great plus bonus ideal ideally opportunity
+""".split())
+
+ACTION_VERBS = frozenset("""
+achieved analyzed built championed collaborated created decreased delivered designed developed drove
+established executed generated grew implemented improved increased launched led managed mentored migrated
+negotiated optimized orchestrated owned planned reduced resolved scaled spearheaded streamlined supervised
+""".split())
+
+SECTION_HEADINGS = {
+    "contact_info": ("contact", "personal info", "personal information", "personal details"),
+    "summary": ("summary", "profile", "professional summary", "about me", "objective"),
+    "experience": ("experience", "work experience", "employment", "employment history", "professional experience", "work history"),
+    "skills": ("skills", "technical skills", "core competencies", "competencies", "technologies"),
+    "education": ("education", "academic background", "qualifications")
+}
+
+SECTION_WEIGHTS = {
+    "contact_info": 0.1,
+    "summary": 0.15,
+    "experience": 0.35,
+    "skills": 0.25,
+    "education": 0.15
+}
+
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+PHONE_PATTERN = re.compile(r"\+?\d[\d\s().-]{7,}\d")
+URL_PATTERN = re.compile(r"(linkedin\.com|github\.com|https?://)", re.IGNORECASE)
+NUMBER_PATTERN = re.compile(r"\d+(?:[.,]\d+)?\s*(?:%|k\b|m\b|x\b)?|\$\s*\d", re.IGNORECASE)
+DATE_PATTERN = re.compile(r"\b(?:19|20)\d{2}\b|\bpresent\b", re.IGNORECASE)
+DEGREE_PATTERN = re.compile(r"\b(?:bachelor|master|phd|doctorate|b\.?sc|m\.?sc|b\.?a|m\.?a|mba|degree|diploma)\b", re.IGNORECASE)
+
+class LocalATSScorer:
+    """Deterministic, LLM-free ATS scoring based on keyword statistics and section heuristics"""
+
+    def __init__(self, max_keywords: int = 25, skill_matcher: Optional[SkillMatcher] = None):
+        self.max_keywords = max_keywords
+        self.skill_matcher = skill_matcher or SkillMatcher()
+
+    def analyze(self, request: ATSAnalysisRequest) -> ATSAnalysisResponse:
+        """Score a CV against an optional job description"""
+        keywords, missing_keywords, density = self.keyword_statistics(request.cv_content, request.job_description)
+        coverage = 1.0 - len(missing_keywords) / len(keywords) if keywords else None
+
+        sections = split_sections(request.cv_content)
+        section_scores = self.score_sections(request.cv_content, sections, coverage)
+        overall_score = self._overall_score(section_scores, coverage)
+
+        return ATSAnalysisResponse(
+            overall_score=overall_score,
+            section_scores=section_scores,
+            suggestions=self._suggestions(request.cv_content, sections, section_scores, missing_keywords),
+            missing_keywords=missing_keywords,
+            keyword_density=density
+        )
+
+    def keyword_statistics(
+        self,
+        cv_content: str,
+        job_description: Optional[str]
+    ) -> Tuple[List[str], List[str], Dict[str, float]]:
+        """Job keywords, the ones missing from the CV, and density of the ones present
+
+        Taxonomy skills are matched alias-aware (JS == JavaScript); remaining job
+        description terms fill the keyword budget using plain frequency ranking.
+        """
+        if not job_description:
+            return [], [], {}
+
+        skills = self.skill_matcher.coverage(cv_content, job_description)
+        skill_words = {word for name in skills["required_keywords"] for word in tokenize(name)}
+
+        terms = [
+            term for term in self.extract_keywords(job_description)
+            if self.skill_matcher.canonicalize(term) is None and not set(term.split()) <= skill_words
+        ]
+        terms = terms[:max(self.max_keywords - len(skills["required_keywords"]), 0)]
+        term_density = self.keyword_density(tokenize(cv_content), terms)
+
+        keywords = skills["required_keywords"] + terms
+        missing_keywords = skills["missing_keywords"] + [term for term in terms if term_density[term] == 0.0]
+        density = {
+            **skills["keyword_density"],
+            **{term: value for term, value in term_density.items() if value > 0}
+        }
+        return keywords, missing_keywords, density
+
+    def extract_keywords(self, job_description: str) -> List[str]:
+        """Rank job description unigrams and bigrams by frequency, ignoring stopwords"""
+        tokens = tokenize(job_description)
+        counts = Counter(token for token in tokens if _is_term(token))
+        counts.update(
+            f"{first} {second}" for first, second in zip(tokens, tokens[1:])
+            if _is_term(first) and _is_term(second)
+        )
+
+        # Bigrams are only kept when the phrase repeats; they rank slightly above single words
+        ranked = sorted(
+            (term for term, count in counts.items() if " " not in term or count > 1),
+            key=lambda term: (-counts[term] * (1.5 if " " in term else 1.0), term)
+        )
+        return ranked[:self.max_keywords]
+
+    def keyword_density(self, tokens: List[str], keywords: List[str]) -> Dict[str, float]:
+        """Occurrences of each keyword per 100 CV tokens, counted in one vectorized pass"""
+        if not tokens or not keywords:
+            return {keyword: 0.0 for keyword in keywords}
+
+        vocabulary = {keyword: index for index, keyword in enumerate(keywords)}
+        terms = tokens + [f"{first} {second}" for first, second in zip(tokens, tokens[1:])]
+
+        ids = np.fromiter((vocabulary.get(term, -1) for term in terms), dtype=np.int64, count=len(terms))
+        counts = np.bincount(ids[ids >= 0], minlength=len(keywords))
+        densities = np.round(counts * 100.0 / len(tokens), 2)
+
+        return dict(zip(keywords, densities.tolist()))
+
+    def score_sections(self, cv_content: str, sections: Dict[str, str], coverage: Optional[float]) -> Dict[str, int]:
+        """Heuristic 0-100 score for each standard CV section"""
+        scores = {}
+
+        # Contact details may appear anywhere near the top of a plain-text CV
+        contact_text = sections.get("contact_info") or cv_content[:500]
+        scores["contact_info"] = _clamp(
+            (40 if EMAIL_PATTERN.search(contact_text) else 0)
+            + (30 if PHONE_PATTERN.search(contact_text) else 0)
+            + (20 if URL_PATTERN.search(contact_text) else 0)
+            + 10
+        )
+
+        summary_words = len(tokenize(sections.get("summary", "")))
+        if summary_words == 0:
+            scores["summary"] = 30
+        elif 30 <= summary_words <= 120:
+            scores["summary"] = 90
+        else:
+            scores["summary"] = 70
+
+        experience = sections.get("experience", "")
+        if experience:
+            lines = [line for line in experience.splitlines() if line.strip()]
+            experience_tokens = tokenize(experience)
+            verbs = sum(1 for token in experience_tokens if token in ACTION_VERBS)
+            quantified = sum(1 for line in lines if NUMBER_PATTERN.search(line))
+            scores["experience"] = _clamp(
+                50
+                + min(verbs * 5, 20)
+                + min(quantified * 5, 15)
+                + (15 if DATE_PATTERN.search(experience) else 0)
+            )
+        else:
+            scores["experience"] = 20
+
+        skills = sections.get("skills", "")
+        if skills:
+            base = 60 + min(len(re.split(r"[,;\n|]", skills)), 20)
+            scores["skills"] = _clamp(base if coverage is None else base * 0.5 + coverage * 50)
+        else:
+            scores["skills"] = 20
+
+        education = sections.get("education", "")
+        if education:
+            scores["education"] = _clamp(
+                70 + (15 if DEGREE_PATTERN.search(education) else 0) + (15 if DATE_PATTERN.search(education) else 0)
+            )
+        else:
+            scores["education"] = 40
+
+        return scores
+
+    def _overall_score(self, section_scores: Dict[str, int], coverage: Optional[float]) -> int:
+        """Weighted section average, blended with keyword coverage when a job description is given"""
+        weights = np.array([SECTION_WEIGHTS[name] for name in section_scores])
+        values = np.array(list(section_scores.values()), dtype=float)
+        structure = float(np.dot(weights, values) / weights.sum())
+
+        if coverage is None:
+            return _clamp(structure)
+        return _clamp(structure * 0.6 + coverage * 100 * 0.4)
+
+    def _suggestions(
+        self,
+        cv_content: str,
+        sections: Dict[str, str],
+        section_scores: Dict[str, int],
+        missing_keywords: List[str]
+    ) -> List[str]:
+        """Rule-based improvement suggestions"""
+        suggestions = []
+
+        if missing_keywords:
+            suggestions.append(f"Include missing job keywords: {', '.join(missing_keywords[:8])}")
+        if "summary" not in sections:
+            suggestions.append("Add a professional summary tailored to the target role")
+        if section_scores["contact_info"] < 70:
+            suggestions.append("Make sure your email, phone number and LinkedIn profile are listed")
+        if section_scores["experience"] < 75:
+            suggestions.append("Start experience bullets with action verbs and quantify achievements with numbers")
+        if "skills" not in sections:
+            suggestions.append("Add a dedicated skills section using the job description's terminology")
+        if "education" not in sections:
+            suggestions.append("Add an education section with degree and dates")
+        if len(tokenize(cv_content)) > 900:
+            suggestions.append("Shorten the CV; concise CVs parse and rank more reliably")
+
+        return suggestions or ["CV structure looks ATS-friendly; tailor keywords to each application"]
+
+def split_sections(cv_content: str) -> Dict[str, str]:
+    """Split plain-text CV content on recognised section headings"""
+    headings = {
+        alias: name for name, aliases in SECTION_HEADINGS.items() for alias in aliases
+    }
+    sections: Dict[str, List[str]] = {}
+    current = None
+
+    for line in cv_content.splitlines():
+        heading = re.sub(r"[^a-z ]", "", line.lower()).strip()
+        if heading in headings and len(line.strip()) <= 40:
+            current = headings[heading]
+            sections.setdefault(current, [])
+        elif current is not None:
+            sections[current].append(line)
+
+    return {name: "\n".join(lines).strip() for name, lines in sections.items() if "\n".join(lines).strip()}
+
+def _is_term(token: str) -> bool:
+    return token not in STOPWORDS and len(token) > 1 and not token.isdigit()
+
+def _clamp(value: float) -> int:
+    return int(max(0, min(100, round(value))))
@@ -0,0 +1,40 @@
+from typing import Any, List
+from models.cv import CVData, CVSection
+
+def section_to_text(section: CVSection) -> str:
+    """Flatten a CV section's structured content into plain text for prompts and scoring"""
+    lines = []
+    for key, value in section.content.items():
+        _append_value(lines, key, value)
+    return "\n".join(lines)
+
+def cv_to_text(cv: CVData) -> str:
+    """Flatten all visible sections of a CV in display order"""
+    parts = []
+    for section in visible_sections(cv):
+        text = section_to_text(section)
+        if text:
+            parts.append(f"{section.title}\n{text}")
+    return "\n\n".join(parts)
+
+def visible_sections(cv: CVData) -> List[CVSection]:
+    """Visible sections sorted by their display order"""
+    return [section for section in sorted(cv.sections, key=lambda x: x.order) if section.is_visible]
+
+def _append_value(lines: List[str], key: str, value: Any):
+    """Append a content value, expanding lists and nested dicts"""
+    if value is None or value == "" or value == [] or value == {}:
+        return
+
+    if isinstance(value, dict):
+        fields = [f"{k}: {v}" for k, v in value.items() if v not in (None, "", [], {})]
+        if fields:
+            lines.append(" | ".join(fields))
+    elif isinstance(value, list):
+        if all(not isinstance(item, (dict, list)) for item in value):
+            lines.append(f"{key}: {', '.join(str(item) for item in value)}")
+        else:
+            for item in value:
+                _append_value(lines, key, item)
+    else:
+        lines.append(f"{key}: {value}")
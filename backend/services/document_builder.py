@@ -0,0 +1,103 @@
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple
+from models.cv import CVData, CVSection
+from models.document import CVDocument, ContactBlock, DocumentBlock, DocumentSection, EntryBlock, TagsBlock, TextBlock
+import os
+
+class DocumentBuilder:
+    """Builds the format-agnostic CVDocument that every export backend renders
+
+    This is the only place that reads raw CVSection content. Documents are cached
+    per (cv_id, updated_at), so exporting one version of a CV to several formats
+    walks its sections once.
+    """
+
+    def __init__(self, cache_size: int = None):
+        self.cache_size = cache_size or int(os.getenv("EXPORT_DOCUMENT_CACHE_SIZE", "256"))
+        self._documents: "OrderedDict[Tuple[str, str], CVDocument]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def build(self, cv_data: CVData) -> CVDocument:
+        """Document for a CV version, built on first use"""
+        key = (cv_data.id, str(cv_data.updated_at))
+        document = self._documents.get(key)
+        if document is not None:
+            self._documents.move_to_end(key)
+            self.hits += 1
+            return document
+
+        self.misses += 1
+        document = CVDocument(
+            title=cv_data.title,
+            sections=[
+                self._build_section(section)
+                for section in sorted(cv_data.sections, key=lambda x: x.order)
+                if section.is_visible
+            ]
+        )
+        self._documents[key] = document
+        while len(self._documents) > self.cache_size:
+            self._documents.popitem(last=False)
+        return document
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "cached_documents": len(self._documents),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+    def _build_section(self, section: CVSection) -> DocumentSection:
+        if section.type == 'personal_info':
+            blocks = self._build_personal_info(section.content)
+        elif section.type == 'experience':
+            blocks = self._build_experience(section.content)
+        elif section.type == 'education':
+            blocks = self._build_education(section.content)
+        elif section.type == 'skills':
+            blocks = self._build_skills(section.content)
+        else:
+            # Generic content
+            blocks = [TextBlock(text=_text(section.content.get('text')))]
+        return DocumentSection(type=section.type, title=section.title, blocks=blocks)
+
+    def _build_personal_info(self, content: Dict[str, Any]) -> List[DocumentBlock]:
+        return [ContactBlock(
+            items=[_text(value) for key, value in content.items() if value and key != 'summary'],
+            summary=_text(content.get('summary')) or None
+        )]
+
+    def _build_experience(self, content: Dict[str, Any]) -> List[DocumentBlock]:
+        return [
+            EntryBlock(
+                variant='experience',
+                title=_text(exp.get('title')),
+                organization=_text(exp.get('company')),
+                dates=f"{_text(exp.get('start_date'))} - {_text(exp.get('end_date')) or 'Present'}",
+                description=_text(exp.get('description')) or None
+            )
+            for exp in content.get('experiences') or []
+        ]
+
+    def _build_education(self, content: Dict[str, Any]) -> List[DocumentBlock]:
+        return [
+            EntryBlock(
+                variant='education',
+                title=_text(edu.get('degree')),
+                organization=_text(edu.get('institution')),
+                dates=f"{_text(edu.get('start_date'))} - {_text(edu.get('end_date'))}",
+                description=_text(edu.get('description')) or None
+            )
+            for edu in content.get('education') or []
+        ]
+
+    def _build_skills(self, content: Dict[str, Any]) -> List[DocumentBlock]:
+        skills = [_text(skill) for skill in content.get('skills') or [] if skill]
+        return [TagsBlock(items=skills)] if skills else []
+
+def _text(value: Any) -> str:
+    return "" if value is None else str(value)
@@ -0,0 +1,124 @@
+from collections import Counter
+from typing import Any, Dict, List, Optional
+from services.ats_scorer import _is_term, tokenize
+from services.skill_matcher import SkillMatcher
+import math
+import os
+
+# Weight of keyword coverage versus whole-text TF-IDF similarity in the match score
+COVERAGE_WEIGHT = 0.7
+
+class JobMatcher:
+    """Score one CV against many job descriptions at once with sparse TF-IDF vectors
+
+    Each document is a term -> weight dict, so the work grows with the number of term
+    occurrences rather than with postings x vocabulary. Similarity, keyword selection
+    and missing keywords then take one pass per posting instead of one LLM call.
+    """
+
+    def __init__(self, skill_matcher: Optional[SkillMatcher] = None, max_keywords: int = 25, max_job_descriptions: int = None):
+        self.skill_matcher = skill_matcher or SkillMatcher()
+        self.max_keywords = max_keywords
+        self.max_job_descriptions = max_job_descriptions or int(os.getenv("AI_MATCH_MAX_JOB_DESCRIPTIONS", "100"))
+        self._canonical_cache: Dict[str, Optional[str]] = {}
+
+    def rank(self, cv_content: str, job_descriptions: List[str]) -> List[Dict[str, Any]]:
+        """Match results for each job description, best match first
+
+        CPU-bound; async callers should run it in a worker thread.
+        """
+        if not job_descriptions:
+            return []
+        if len(job_descriptions) > self.max_job_descriptions:
+            raise ValueError(f"At most {self.max_job_descriptions} job descriptions can be matched at once")
+
+        # Term ids in order of first occurrence break ranking ties deterministically
+        vocabulary: Dict[str, int] = {}
+        documents: List[Counter] = []
+        for text in [cv_content] + job_descriptions:
+            counts = Counter(self._terms(text))
+            for term in counts:
+                vocabulary.setdefault(term, len(vocabulary))
+            documents.append(counts)
+
+        # Sublinear term frequency and smoothed inverse document frequency
+        document_frequency = Counter(term for counts in documents for term in counts)
+        idf = {
+            term: math.log((1 + len(documents)) / (1 + frequency)) + 1.0
+            for term, frequency in document_frequency.items()
+        }
+        vectors = [
+            {term: (1.0 + math.log(count)) * idf[term] for term, count in counts.items()}
+            for counts in documents
+        ]
+        norms = [math.sqrt(sum(weight * weight for weight in vector.values())) or 1.0 for vector in vectors]
+        cv_vector = vectors[0]
+
+        results = []
+        for index, (counts, vector, norm) in enumerate(zip(documents[1:], vectors[1:], norms[1:])):
+            similarity = sum(weight * cv_vector[term] for term, weight in vector.items() if term in cv_vector)
+            similarity /= norm * norms[0]
+
+            # The posting's keywords are its highest weighted terms, taxonomy skills first;
+            # like LocalATSScorer.extract_keywords, a bigram only counts when the phrase repeats
+            keyword_weights = {
+                term: weight for term, weight in vector.items()
+                if term.startswith("skill:") or " " not in term or counts[term] >= 2
+            }
+            skill_boost = max(keyword_weights.values(), default=0.0)
+            keywords = sorted(
+                keyword_weights,
+                key=lambda term: (-(keyword_weights[term] + (skill_boost if term.startswith("skill:") else 0.0)), vocabulary[term])
+            )[:self.max_keywords]
+
+            total_weight = sum(keyword_weights[term] for term in keywords) or 1.0
+            coverage = sum(keyword_weights[term] for term in keywords if term in cv_vector) / total_weight
+
+            results.append({
+                "index": index,
+                "match_score": int(round(100 * (COVERAGE_WEIGHT * coverage + (1 - COVERAGE_WEIGHT) * similarity))),
+                "similarity": round(similarity, 4),
+                "keyword_coverage": round(coverage, 4),
+                "matched_keywords": [_display(term) for term in keywords if term in cv_vector],
+                "missing_keywords": [_display(term) for term in keywords if term not in cv_vector]
+            })
+
+        results.sort(key=lambda result: (-result["match_score"], result["index"]))
+        return results
+
+    def _terms(self, text: str) -> List[str]:
+        """Unigram and bigram terms plus skill:<name> terms for alias-aware taxonomy matches"""
+        skills = self.skill_matcher.find(text)
+        skill_words = {word for name in skills for word in tokenize(name)}
+
+        # Words already represented by a matched skill are not counted twice
+        tokens = tokenize(text)
+        keep = [
+            _is_term(token) and token not in skill_words and self._canonicalize(token) is None
+            for token in tokens
+        ]
+
+        terms = [token for token, kept in zip(tokens, keep) if kept]
+        terms.extend(
+            f"{first} {second}" for first, second, first_kept, second_kept
+            in zip(tokens, tokens[1:], keep, keep[1:])
+            if first_kept and second_kept
+        )
+        for name, count in skills.items():
+            terms.extend([f"skill:{name}"] * count)
+        return terms
+
+    def _canonicalize(self, token: str) -> Optional[str]:
+        # Memoized; the same few thousand tokens recur across postings. A single lookup,
+        # since another ranking thread may clear the cache in between
+        try:
+            return self._canonical_cache[token]
+        except KeyError:
+            pass
+        if len(self._canonical_cache) > 100000:
+            self._canonical_cache.clear()
+        canonical = self._canonical_cache[token] = self.skill_matcher.canonicalize(token)
+        return canonical
+
+def _display(term: str) -> str:
+    return term[len("skill:"):] if term.startswith("skill:") else term
@@ -0,0 +1,179 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import json
+import re
+
+class JSONFieldStream:
+    """Incrementally scan a streamed JSON object and report each top-level field as soon as it closes
+
+    Objects that close without any expected field, such as braces in prose before the
+    payload ("Here is {the result}: ..."), are skipped and scanning continues.
+    """
+
+    def __init__(self, expected_fields: Optional[Iterable[str]] = None):
+        self.expected_fields = set(expected_fields) if expected_fields is not None else None
+        self.fields: Dict[str, Any] = {}
+        self.done = False
+
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key_start: Optional[int] = None
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Consume a chunk and return the (name, value) fields completed by it"""
+        self._text += chunk
+        completed = []
+
+        while self._pos < len(self._text) and not self.done:
+            ch = self._text[self._pos]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._value_start is None and self._key_start is not None:
+                        self._key = self._load(self._key_start, self._pos + 1)
+                        self._key_start = None
+            elif self._depth == 0:
+                # Skip any prose or code fence before the object starts
+                if ch == '{':
+                    self._depth = 1
+            elif ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._value_start is None:
+                    self._key_start = self._pos
+            elif ch in '{[':
+                self._depth += 1
+            elif ch in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    self._complete_field(completed)
+                    self.done = bool(self.fields)
+            elif ch == ':' and self._depth == 1 and self._key is not None:
+                self._value_start = self._pos + 1
+            elif ch == ',' and self._depth == 1:
+                self._complete_field(completed)
+
+            self._pos += 1
+
+        return completed
+
+    def _complete_field(self, completed: List[Tuple[str, Any]]):
+        """Decode the value that just closed at depth 1"""
+        if self._key is not None and self._value_start is not None:
+            try:
+                value = self._load(self._value_start, self._pos)
+            except ValueError:
+                value = None
+            else:
+                if self.expected_fields is None or self._key in self.expected_fields:
+                    self.fields[self._key] = value
+                    completed.append((self._key, value))
+
+        self._key = None
+        self._key_start = None
+        self._value_start = None
+
+    def _load(self, start: int, end: int) -> Any:
+        return json.loads(self._text[start:end])
+
+_OBJECT_START = re.compile(r'\{')
+_OBJECT_SPECIAL = re.compile(r'[{}\[\]"\\]')
+_TRAILING_COMMA = re.compile(r',\s*([}\]])')
+_SMART_QUOTES = str.maketrans({'“': '"', '”': '"', '‘': "'", '’': "'"})
+
+class JSONObjectExtractor:
+    """Incrementally extract balanced top-level JSON objects from text such as LLM output
+
+    Brace counting ignores braces inside strings, so prose, code fences, several
+    objects and trailing text around the payload are all handled.
+    """
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self._stack: List[str] = []
+        self._in_string = False
+        self._skip = 0
+
+    def feed(self, chunk: str) -> List[str]:
+        """Consume a chunk and return the source of every object completed by it"""
+        objects = []
+        # Only the current chunk is scanned; earlier pieces of an open object are kept as parts
+        pos = self._skip
+        self._skip = 0
+        segment_start = 0
+
+        while True:
+            if not self._stack:
+                # Skip any prose or code fence before the next object
+                match = _OBJECT_START.search(chunk, pos)
+                if match is None:
+                    break
+                segment_start = match.start()
+                self._stack = ['}']
+                self._parts = []
+                pos = match.end()
+                continue
+
+            match = _OBJECT_SPECIAL.search(chunk, pos)
+            if match is None:
+                self._parts.append(chunk[segment_start:])
+                break
+
+            ch = match.group()
+            pos = match.end()
+
+            if self._in_string:
+                if ch == '\\':
+                    # Skip the escaped character, which may arrive in the next chunk
+                    pos += 1
+                    self._skip = max(0, pos - len(chunk))
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == '{':
+                self._stack.append('}')
+            elif ch == '[':
+                self._stack.append(']')
+            elif ch == self._stack[-1]:
+                self._stack.pop()
+                if not self._stack:
+                    objects.append("".join(self._parts) + chunk[segment_start:pos])
+                    self._parts = []
+
+        return objects
+
+def extract_json_object(text: str, validator: Optional[Callable[[Dict[str, Any]], Any]] = None) -> Optional[Dict[str, Any]]:
+    """First JSON object embedded in text that parses and passes the validator
+
+    Each candidate is tried verbatim, then with common LLM mistakes repaired
+    (trailing commas, smart quotes). A truncated final object is never a candidate:
+    closing its brackets would turn a cut-off answer into a clipped but valid result.
+    """
+    for candidate in JSONObjectExtractor().feed(text):
+        for attempt in (candidate, _repair(candidate)):
+            try:
+                data = json.loads(attempt)
+            except ValueError:
+                continue
+            if not isinstance(data, dict):
+                break
+            if validator is not None:
+                try:
+                    validator(data)
+                except Exception:
+                    break
+            return data
+
+    return None
+
+def _repair(candidate: str) -> str:
+    return _TRAILING_COMMA.sub(r'\1', candidate.translate(_SMART_QUOTES))
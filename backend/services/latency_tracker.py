@@ -0,0 +1,44 @@
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+import numpy as np
+
+class LatencyTracker:
+    """In-process rolling latency distributions per endpoint"""
+
+    def __init__(self, window: int = 500):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._timeouts: Dict[str, int] = {}
+
+    def record(self, endpoint: str, seconds: float):
+        """Add the duration of a completed call"""
+        self._samples.setdefault(endpoint, deque(maxlen=self.window)).append(seconds)
+
+    def record_timeout(self, endpoint: str, seconds: float):
+        """Count a call abandoned at its deadline; the deadline is kept as a lower bound of its latency"""
+        self._timeouts[endpoint] = self._timeouts.get(endpoint, 0) + 1
+        self.record(endpoint, seconds)
+
+    def count(self, endpoint: str) -> int:
+        return len(self._samples.get(endpoint, ()))
+
+    def percentile(self, endpoint: str, fraction: float) -> Optional[float]:
+        """Latency in seconds at the given fraction of the window, or None without samples"""
+        samples = self._samples.get(endpoint)
+        if not samples:
+            return None
+        return float(np.quantile(np.fromiter(samples, dtype=float, count=len(samples)), fraction))
+
+    def stats(self) -> Dict[str, Any]:
+        """Sample counts, timeouts and p50/p95/p99 in milliseconds per endpoint"""
+        stats = {}
+        for endpoint, samples in self._samples.items():
+            p50, p95, p99 = np.quantile(np.fromiter(samples, dtype=float, count=len(samples)), [0.5, 0.95, 0.99]).tolist()
+            stats[endpoint] = {
+                "samples": len(samples),
+                "timeouts": self._timeouts.get(endpoint, 0),
+                "p50_ms": round(p50 * 1000, 1),
+                "p95_ms": round(p95 * 1000, 1),
+                "p99_ms": round(p99 * 1000, 1)
+            }
+        return stats
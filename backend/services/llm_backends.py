@@ -0,0 +1,354 @@
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+from emergentintegrations.llm.chat import LlmChat, UserMessage
+from services.llm_replay import LatencyProfile, ReplayStore, StubLLMError
+import asyncio
+import httpx
+import json
+import os
+import random
+import re
+import time
+import uuid
+
+MODEL_PROVIDER = "openai"
+MODEL_NAME = "gpt-4o-mini"
+
+# Share of a simulated streaming latency spent before the first chunk arrives
+STUB_FIRST_CHUNK_SHARE = 0.3
+
+class LLMBackend:
+    """Interface for the LLM providers used by AIService"""
+
+    model_id = "base"
+
+    async def complete(self, system_message: str, prompt: str, session_id: str) -> str:
+        """Return the full completion for a prompt"""
+        raise NotImplementedError
+
+    async def stream(self, system_message: str, prompt: str, session_id: str) -> AsyncIterator[str]:
+        """Yield the completion in chunks as they arrive"""
+        # Backends without native streaming deliver the whole completion as one chunk
+        yield await self.complete(system_message, prompt, session_id)
+
+    async def close(self):
+        """Release pooled connections"""
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Backend counters reported by the AI metrics endpoint"""
+        return {"model_id": self.model_id}
+
+class EmergentLLMBackend(LLMBackend):
+    """LLM backend using the emergentintegrations LlmChat client, one client per call"""
+
+    def __init__(self, api_key: str = None, provider: str = MODEL_PROVIDER, model: str = MODEL_NAME):
+        self.api_key = api_key or os.getenv("EMERGENT_LLM_KEY")
+        if not self.api_key:
+            raise ValueError("EMERGENT_LLM_KEY not found in environment variables")
+
+        self.provider = provider
+        self.model = model
+        self.model_id = f"{provider}/{model}"
+
+    async def complete(self, system_message: str, prompt: str, session_id: str) -> str:
+        # Create AI chat instance; a unique session per request keeps conversation
+        # state from leaking between users that share a session prefix. LlmChat keeps
+        # that state, so instances cannot be reused; HTTPLLMBackend pools connections
+        chat = LlmChat(
+            api_key=self.api_key,
+            session_id=f"{session_id}_{uuid.uuid4()}",
+            system_message=system_message
+        ).with_model(self.provider, self.model)
+
+        return await chat.send_message(UserMessage(text=prompt))
+
+class HTTPLLMBackend(LLMBackend):
+    """Stateless OpenAI-compatible chat completions backend over one pooled keep-alive HTTP client"""
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str = None,
+        provider: str = MODEL_PROVIDER,
+        model: str = MODEL_NAME,
+        max_connections: int = None,
+        timeout: float = None
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.model = model
+        self.model_id = f"{provider}/{model}"
+        self.max_connections = max_connections or int(os.getenv("AI_LLM_MAX_CONNECTIONS", "16"))
+        self.timeout = timeout or float(os.getenv("AI_LLM_HTTP_TIMEOUT", "120"))
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def complete(self, system_message: str, prompt: str, session_id: str) -> str:
+        response = await self._get_client().post(
+            "/chat/completions",
+            json=self._payload(system_message, prompt, stream=False)
+        )
+        response.raise_for_status()
+        return response.json()["choices"][0]["message"]["content"]
+
+    async def stream(self, system_message: str, prompt: str, session_id: str) -> AsyncIterator[str]:
+        async with self._get_client().stream(
+            "POST",
+            "/chat/completions",
+            json=self._payload(system_message, prompt, stream=True)
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                content = json.loads(data)["choices"][0].get("delta", {}).get("content")
+                if content:
+                    yield content
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _payload(self, system_message: str, prompt: str, stream: bool) -> dict:
+        # Every request carries its full context, so no session state is kept server-side
+        return {
+            "model": self.model,
+            "stream": stream,
+            "messages": [
+                {"role": "system", "content": system_message},
+                {"role": "user", "content": prompt}
+            ]
+        }
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Shared client; connections are kept alive and reused across requests"""
+        if self._client is None:
+            headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=headers,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=60
+                ),
+                timeout=httpx.Timeout(self.timeout, connect=10)
+            )
+        return self._client
+
+class StubLLMBackend(LLMBackend):
+    """Offline LLM backend replaying recorded completions, or canned JSON, with simulated latency and errors"""
+
+    def __init__(
+        self,
+        responder: Optional[Callable[[str, str], str]] = None,
+        chunk_size: int = 16,
+        chunk_delay: float = 0.0,
+        replay: Optional[ReplayStore] = None,
+        latency: Optional[LatencyProfile] = None,
+        error_rate: float = 0.0,
+        strict_replay: bool = False,
+        seed: Optional[int] = None,
+        model: str = "stub"
+    ):
+        self.model_id = f"stub/{model}"
+        self.responder = responder or self._default_response
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.replay = replay
+        self.latency = latency
+        self.error_rate = error_rate
+        self.strict_replay = strict_replay
+        self.calls = 0
+        self.replayed = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+
+    async def complete(self, system_message: str, prompt: str, session_id: str) -> str:
+        response, latency = self._respond(system_message, prompt)
+        if latency + self.chunk_delay:
+            await asyncio.sleep(latency + self.chunk_delay)
+        return response
+
+    async def stream(self, system_message: str, prompt: str, session_id: str) -> AsyncIterator[str]:
+        response, latency = self._respond(system_message, prompt)
+        chunks = [response[start:start + self.chunk_size] for start in range(0, len(response), self.chunk_size)] or [""]
+
+        first_chunk_delay = latency * STUB_FIRST_CHUNK_SHARE
+        chunk_delay = (latency - first_chunk_delay) / len(chunks) + self.chunk_delay
+        for index, chunk in enumerate(chunks):
+            delay = chunk_delay + (first_chunk_delay if index == 0 else 0)
+            if delay:
+                await asyncio.sleep(delay)
+            yield chunk
+
+    def _respond(self, system_message: str, prompt: str) -> Tuple[str, float]:
+        """Pick the response and simulated latency for a call, or raise an injected error"""
+        self.calls += 1
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.errors += 1
+            raise StubLLMError("Injected stub LLM failure")
+
+        record = self.replay.get(system_message, prompt) if self.replay is not None else None
+        if record is not None:
+            self.replayed += 1
+            response, recorded_ms = record["response"], record.get("latency_ms")
+        elif self.strict_replay:
+            raise StubLLMError("No recorded response for prompt")
+        else:
+            response, recorded_ms = self.responder(system_message, prompt), None
+
+        latency = self.latency.sample(recorded_ms) if self.latency is not None else 0.0
+        return response, latency
+
+    def stats(self) -> Dict[str, Any]:
+        return {"model_id": self.model_id, "calls": self.calls, "replayed": self.replayed, "errors": self.errors}
+
+    @staticmethod
+    def _default_response(system_message: str, prompt: str) -> str:
+        """Well-formed response matching the JSON format requested by the prompt"""
+        content = {
+            "optimized_content": "Stub optimized content",
+            "suggestions": ["Stub suggestion"],
+            "keywords_used": [],
+            "ats_score": 75
+        }
+        if '"sections"' in prompt:
+            # Combined optimization: one entry per "Section <n> (...)" block of the prompt
+            positions = re.findall(r"^Section (\d+) \(", prompt, re.MULTILINE)
+            data = {"sections": [{"section": int(position), **content} for position in positions]}
+        elif '"overall_score"' in prompt:
+            data = {
+                "overall_score": 75,
+                "section_scores": {"summary": 75, "experience": 75, "skills": 75},
+                "suggestions": ["Stub suggestion"],
+                "missing_keywords": [],
+                "keyword_density": {}
+            }
+        elif '"optimized_content"' in prompt:
+            data = content
+        elif '"score"' in prompt:
+            data = {"score": 75, "suggestions": ["Stub suggestion"]}
+        else:
+            data = {"suggestions": ["Stub suggestion"]}
+        return f"Here is the result:\n```json\n{json.dumps(data, indent=2)}\n```"
+
+class RecordingLLMBackend(LLMBackend):
+    """Pass calls through to another backend and record every completion for offline replay"""
+
+    def __init__(self, backend: LLMBackend, store: ReplayStore):
+        self.backend = backend
+        self.store = store
+        self.model_id = backend.model_id
+
+    async def complete(self, system_message: str, prompt: str, session_id: str) -> str:
+        started = time.monotonic()
+        response = await self.backend.complete(system_message, prompt, session_id)
+        self.store.add(system_message, prompt, response, (time.monotonic() - started) * 1000, model=self.model_id)
+        return response
+
+    async def stream(self, system_message: str, prompt: str, session_id: str) -> AsyncIterator[str]:
+        started = time.monotonic()
+        parts = []
+        try:
+            async for chunk in self.backend.stream(system_message, prompt, session_id):
+                parts.append(chunk)
+                yield chunk
+        except GeneratorExit:
+            # The caller stops reading once it has a complete answer; keep what it used
+            if parts:
+                self.store.add(system_message, prompt, "".join(parts), (time.monotonic() - started) * 1000, model=self.model_id)
+            raise
+        self.store.add(system_message, prompt, "".join(parts), (time.monotonic() - started) * 1000, model=self.model_id)
+
+    async def close(self):
+        await self.backend.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return self.backend.stats()
+
+def create_llm_backend() -> LLMBackend:
+    """Create the LLM backend selected by AI_LLM_BACKEND (emergent, http, stub or router)
+
+    Without AI_LLM_BACKEND the pooled http backend is used whenever AI_LLM_BASE_URL is
+    set; emergent, which builds a new client for every call, is only the fallback.
+
+    "router" spreads calls over the providers listed in AI_LLM_ROUTES, a JSON list of
+    route objects such as {"name": "primary", "backend": "http", "base_url": "...",
+    "provider": "openai", "model": "gpt-4o-mini"}; stub routes accept "latency",
+    "error_rate" and "seed" so provider incidents can be simulated locally.
+
+    With AI_LLM_RECORD_FILE set, every completion is also recorded there so the stub
+    backend can replay it later (AI_STUB_REPLAY_FILE).
+    """
+    backend = os.getenv("AI_LLM_BACKEND") or ("http" if os.getenv("AI_LLM_BASE_URL") else "emergent")
+
+    if backend == "emergent":
+        llm_backend = EmergentLLMBackend()
+    elif backend == "http":
+        llm_backend = HTTPLLMBackend(
+            base_url=os.environ["AI_LLM_BASE_URL"],
+            api_key=os.getenv("AI_LLM_API_KEY") or os.getenv("EMERGENT_LLM_KEY"),
+            provider=os.getenv("AI_LLM_PROVIDER", MODEL_PROVIDER),
+            model=os.getenv("AI_LLM_MODEL", MODEL_NAME)
+        )
+    elif backend == "stub":
+        llm_backend = create_stub_backend()
+    elif backend == "router":
+        from services.llm_router import RouterLLMBackend
+
+        routes = json.loads(os.environ["AI_LLM_ROUTES"])
+        llm_backend = RouterLLMBackend([
+            (route.get("name") or f"route{index}", create_route_backend(route))
+            for index, route in enumerate(routes)
+        ])
+    else:
+        raise ValueError(f"Unknown AI_LLM_BACKEND: {backend}")
+
+    record_file = os.getenv("AI_LLM_RECORD_FILE")
+    if record_file:
+        return RecordingLLMBackend(llm_backend, ReplayStore(record_file))
+    return llm_backend
+
+def create_route_backend(route: dict) -> LLMBackend:
+    """Backend for one AI_LLM_ROUTES entry"""
+    backend = route.get("backend", "http")
+    provider = route.get("provider", MODEL_PROVIDER)
+    model = route.get("model", MODEL_NAME)
+
+    if backend == "emergent":
+        return EmergentLLMBackend(provider=provider, model=model)
+    if backend == "http":
+        return HTTPLLMBackend(
+            base_url=route["base_url"],
+            api_key=os.getenv(route["api_key_env"]) if route.get("api_key_env") else None,
+            provider=provider,
+            model=model
+        )
+    if backend == "stub":
+        return StubLLMBackend(
+            latency=LatencyProfile(route.get("latency", "fixed:0"), seed=route.get("seed")),
+            error_rate=float(route.get("error_rate", 0)),
+            seed=route.get("seed"),
+            model=route.get("model", "stub")
+        )
+    raise ValueError(f"Unknown LLM route backend: {backend}")
+
+def create_stub_backend() -> StubLLMBackend:
+    """Stub backend configured from AI_STUB_* environment variables"""
+    replay_file = os.getenv("AI_STUB_REPLAY_FILE")
+    seed = os.getenv("AI_STUB_SEED")
+    seed = int(seed) if seed else None
+
+    return StubLLMBackend(
+        chunk_size=int(os.getenv("AI_STUB_CHUNK_SIZE", "16")),
+        chunk_delay=float(os.getenv("AI_STUB_CHUNK_DELAY", "0")),
+        replay=ReplayStore(replay_file) if replay_file else None,
+        latency=LatencyProfile(os.getenv("AI_STUB_LATENCY", "fixed:0"), seed=seed),
+        error_rate=float(os.getenv("AI_STUB_ERROR_RATE", "0")),
+        strict_replay=os.getenv("AI_STUB_REPLAY_STRICT", "false").lower() in ("1", "true", "yes"),
+        seed=seed
+    )
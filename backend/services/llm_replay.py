@@ -0,0 +1,83 @@
+from typing import Dict, Optional
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+
+class StubLLMError(Exception):
+    """Failure injected by the stub backend to simulate upstream errors"""
+    pass
+
+def prompt_hash(system_message: str, prompt: str) -> str:
+    """Key of a recorded completion; independent of the model that produced it"""
+    digest = hashlib.sha256()
+    digest.update(system_message.encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update(prompt.encode("utf-8"))
+    return digest.hexdigest()
+
+class ReplayStore:
+    """Recorded LLM completions keyed by prompt hash, persisted as a JSON lines file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._records: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as handle:
+                for line in handle:
+                    if line.strip():
+                        record = json.loads(line)
+                        self._records[record["key"]] = record
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def get(self, system_message: str, prompt: str) -> Optional[Dict]:
+        """Recorded completion for a prompt, or None"""
+        return self._records.get(prompt_hash(system_message, prompt))
+
+    def add(self, system_message: str, prompt: str, response: str, latency_ms: float, model: str = None):
+        """Record a completion; the latest recording of a prompt wins on replay"""
+        record = {
+            "key": prompt_hash(system_message, prompt),
+            "model": model,
+            "system_message": system_message,
+            "prompt": prompt,
+            "response": response,
+            "latency_ms": round(latency_ms, 1)
+        }
+        with self._lock:
+            self._records[record["key"]] = record
+            with open(self.path, "a", encoding="utf-8") as handle:
+                handle.write(json.dumps(record) + "\n")
+
+class LatencyProfile:
+    """Random completion latency in seconds
+
+    Specs: "fixed:<seconds>", "uniform:<min>,<max>", "lognormal:<median>,<sigma>",
+    or "recorded" to reuse the latency captured with a replayed response.
+    """
+
+    def __init__(self, spec: str = "fixed:0", seed: Optional[int] = None):
+        self.spec = spec
+        self.kind, _, params = spec.partition(":")
+        self.params = [float(value) for value in params.split(",") if value.strip()]
+        self._random = random.Random(seed)
+
+        expected = {"fixed": 1, "uniform": 2, "lognormal": 2, "recorded": 0}
+        if self.kind not in expected or len(self.params) != expected[self.kind]:
+            raise ValueError(f"Invalid latency profile: {spec}")
+
+    def sample(self, recorded_ms: Optional[float] = None) -> float:
+        if self.kind == "fixed":
+            return self.params[0]
+        if self.kind == "uniform":
+            return self._random.uniform(*self.params)
+        if self.kind == "lognormal":
+            median, sigma = self.params
+            return self._random.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+        return (recorded_ms or 0.0) / 1000
@@ -0,0 +1,237 @@
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+from services.llm_backends import LLMBackend
+import logging
+import os
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+class LLMUnavailableError(Exception):
+    """Raised without calling any provider while every route's breaker is open"""
+    pass
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker driven by consecutive failures and a rolling error rate"""
+
+    def __init__(self, failure_threshold: int, error_rate: float, min_samples: int, open_seconds: float, window: int):
+        self.failure_threshold = failure_threshold
+        self.error_rate = error_rate
+        self.min_samples = min_samples
+        self.open_seconds = open_seconds
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.opens = 0
+        self.consecutive_failures = 0
+        self.probe_in_flight = False
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+
+    def available(self) -> bool:
+        """Whether a request may be sent; an open breaker admits one probe after its cool-off"""
+        if self.state == "closed":
+            return True
+        if self.probe_in_flight:
+            return False
+        return self.state == "half_open" or time.monotonic() - self.opened_at >= self.open_seconds
+
+    def before_call(self) -> bool:
+        """Mark a call as started; True when it is the half-open probe"""
+        if self.state == "closed":
+            return False
+        self.state = "half_open"
+        self.probe_in_flight = True
+        return True
+
+    def record_success(self):
+        self._outcomes.append(True)
+        self.consecutive_failures = 0
+        if self.state != "closed":
+            self.state = "closed"
+            self.probe_in_flight = False
+            self._outcomes.clear()
+
+    def record_failure(self):
+        self._outcomes.append(False)
+        self.consecutive_failures += 1
+        if self.state != "closed" or self.consecutive_failures >= self.failure_threshold or (
+            len(self._outcomes) >= self.min_samples and self.current_error_rate() >= self.error_rate
+        ):
+            self._open()
+
+    def release_probe(self):
+        """Give the probe back when it ended without an outcome (e.g. the caller cancelled it)"""
+        if self.probe_in_flight:
+            self.probe_in_flight = False
+            self.state = "open"
+
+    def current_error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    def _open(self):
+        if self.state != "open":
+            self.opens += 1
+        self.state = "open"
+        self.opened_at = time.monotonic()
+        self.probe_in_flight = False
+
+class LLMRoute:
+    """One provider/model behind the router with its breaker and rolling latency"""
+
+    def __init__(self, name: str, backend: LLMBackend, breaker: CircuitBreaker, window: int):
+        self.name = name
+        self.backend = backend
+        self.breaker = breaker
+        self.calls = 0
+        self.failures = 0
+        self._latencies: Deque[float] = deque(maxlen=window)
+
+    def expected_latency(self) -> float:
+        """Rolling mean latency in seconds; untried routes sort first so they get measured"""
+        if not self._latencies:
+            return 0.0
+        return sum(self._latencies) / len(self._latencies)
+
+    def record_latency(self, seconds: float):
+        self._latencies.append(seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model_id": self.backend.model_id,
+            "state": self.breaker.state,
+            "calls": self.calls,
+            "failures": self.failures,
+            "error_rate": round(self.breaker.current_error_rate(), 4),
+            "mean_latency_ms": round(self.expected_latency() * 1000, 1),
+            "opens": self.breaker.opens
+        }
+
+class RouterLLMBackend(LLMBackend):
+    """Route each call to the fastest healthy provider, failing over to the next on errors
+
+    Every route keeps a rolling latency window and a circuit breaker. Open breakers take
+    a route out of rotation until one half-open probe succeeds. A small share of calls
+    explores a random healthy route so latency estimates for slower routes stay current.
+    """
+
+    def __init__(
+        self,
+        routes: List[Tuple[str, LLMBackend]],
+        failure_threshold: int = None,
+        error_rate: float = None,
+        min_samples: int = None,
+        open_seconds: float = None,
+        window: int = None,
+        explore_rate: float = None,
+        seed: Optional[int] = None
+    ):
+        if not routes:
+            raise ValueError("RouterLLMBackend needs at least one route")
+
+        failure_threshold = failure_threshold or int(os.getenv("AI_ROUTER_FAILURE_THRESHOLD", "5"))
+        error_rate = error_rate or float(os.getenv("AI_ROUTER_ERROR_RATE", "0.5"))
+        min_samples = min_samples or int(os.getenv("AI_ROUTER_MIN_SAMPLES", "10"))
+        open_seconds = open_seconds or float(os.getenv("AI_ROUTER_OPEN_SECONDS", "30"))
+        window = window or int(os.getenv("AI_ROUTER_WINDOW", "50"))
+        self.explore_rate = explore_rate if explore_rate is not None else float(os.getenv("AI_ROUTER_EXPLORE_RATE", "0.05"))
+
+        self.routes = [
+            LLMRoute(name, backend, CircuitBreaker(failure_threshold, error_rate, min_samples, open_seconds, window), window)
+            for name, backend in routes
+        ]
+        # Routed models are treated as interchangeable, so cached responses are shared between them
+        self.model_id = "router/" + "+".join(route.backend.model_id for route in self.routes)
+        self.failovers = 0
+        self._random = random.Random(seed)
+
+    async def complete(self, system_message: str, prompt: str, session_id: str) -> str:
+        last_error: Optional[Exception] = None
+        for route in self._candidates():
+            # Breakers can open while earlier candidates are being tried
+            if not route.breaker.available():
+                continue
+            if last_error is not None:
+                self.failovers += 1
+            probe = route.breaker.before_call()
+            route.calls += 1
+            started = time.monotonic()
+            try:
+                response = await route.backend.complete(system_message, prompt, session_id)
+            except Exception as e:
+                self._record_failure(route, e)
+                last_error = e
+                continue
+            except BaseException:
+                if probe:
+                    route.breaker.release_probe()
+                raise
+            route.record_latency(time.monotonic() - started)
+            route.breaker.record_success()
+            return response
+
+        raise last_error or LLMUnavailableError("All LLM routes have open circuit breakers")
+
+    async def stream(self, system_message: str, prompt: str, session_id: str) -> AsyncIterator[str]:
+        last_error: Optional[Exception] = None
+        for route in self._candidates():
+            # Breakers can open while earlier candidates are being tried
+            if not route.breaker.available():
+                continue
+            if last_error is not None:
+                self.failovers += 1
+            probe = route.breaker.before_call()
+            route.calls += 1
+            started = time.monotonic()
+            stream = route.backend.stream(system_message, prompt, session_id)
+            try:
+                # Fail over only until the first chunk; after that the caller has partial output
+                first_chunk = await stream.__anext__()
+            except StopAsyncIteration:
+                first_chunk = None
+            except Exception as e:
+                self._record_failure(route, e)
+                last_error = e
+                continue
+            except BaseException:
+                if probe:
+                    route.breaker.release_probe()
+                raise
+
+            # Latency to the first chunk is what routing optimizes for streams
+            route.record_latency(time.monotonic() - started)
+            route.breaker.record_success()
+            if first_chunk is None:
+                return
+            yield first_chunk
+            async for chunk in stream:
+                yield chunk
+            return
+
+        raise last_error or LLMUnavailableError("All LLM routes have open circuit breakers")
+
+    async def close(self):
+        for route in self.routes:
+            await route.backend.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model_id": self.model_id,
+            "failovers": self.failovers,
+            "routes": {route.name: route.stats() for route in self.routes}
+        }
+
+    def _candidates(self) -> List[LLMRoute]:
+        """Available routes, fastest first"""
+        available = [route for route in self.routes if route.breaker.available()]
+        available.sort(key=LLMRoute.expected_latency)
+        if len(available) > 1 and self._random.random() < self.explore_rate:
+            available.insert(0, available.pop(self._random.randrange(1, len(available))))
+        return available
+
+    @staticmethod
+    def _record_failure(route: LLMRoute, error: Exception):
+        route.failures += 1
+        route.breaker.record_failure()
+        logger.warning(f"LLM route {route.name} failed: {str(error)}")
@@ -0,0 +1,131 @@
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, List
+import asyncio
+import math
+import os
+import time
+
+# Lower value is served first
+TIER_PRIORITY = {
+    "pro": 0,
+    "free": 1
+}
+
+class SchedulerOverloadedError(Exception):
+    """Raised when a tier's queue is full and the request should be retried later"""
+
+    def __init__(self, tier: str, retry_after: int):
+        super().__init__(f"AI service is busy for {tier} tier requests, retry in {retry_after}s")
+        self.tier = tier
+        self.retry_after = retry_after
+
+class LLMScheduler:
+    """Bounded-concurrency pool for upstream LLM calls with per-tier priority queues"""
+
+    def __init__(self, max_concurrency: int = None, max_queue_depth: int = None):
+        self.max_concurrency = max_concurrency or int(os.getenv("AI_LLM_MAX_CONCURRENCY", "8"))
+        self.max_queue_depth = max_queue_depth or int(os.getenv("AI_LLM_MAX_QUEUE_DEPTH", "50"))
+
+        self._active = 0
+        self._queues: Dict[str, Deque[asyncio.Future]] = {tier: deque() for tier in TIER_PRIORITY}
+        self._tiers: List[str] = sorted(TIER_PRIORITY, key=TIER_PRIORITY.get)
+
+        # Exponentially weighted average of how long a call holds a slot
+        self._service_time = 2.0
+
+        self._submitted = {tier: 0 for tier in TIER_PRIORITY}
+        self._rejected = {tier: 0 for tier in TIER_PRIORITY}
+        self._wait_times: Dict[str, Deque[float]] = {tier: deque(maxlen=1000) for tier in TIER_PRIORITY}
+
+    @asynccontextmanager
+    async def slot(self, tier: str):
+        """Hold one upstream concurrency slot for the duration of the block"""
+        tier = tier if tier in TIER_PRIORITY else "free"
+        await self._acquire(tier)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._service_time = 0.9 * self._service_time + 0.1 * (time.monotonic() - started)
+            self._release()
+
+    def has_capacity(self) -> bool:
+        """Whether a slot is free right now without queueing"""
+        return self._active < self.max_concurrency and not any(self._queues.values())
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and wait time metrics per tier"""
+        tiers = {}
+        for tier in self._tiers:
+            waits = sorted(self._wait_times[tier])
+            tiers[tier] = {
+                "queued": len(self._queues[tier]),
+                "submitted": self._submitted[tier],
+                "rejected": self._rejected[tier],
+                "wait_ms_p50": _percentile(waits, 0.5),
+                "wait_ms_p95": _percentile(waits, 0.95)
+            }
+
+        return {
+            "active": self._active,
+            "max_concurrency": self.max_concurrency,
+            "max_queue_depth": self.max_queue_depth,
+            "avg_service_seconds": round(self._service_time, 3),
+            "tiers": tiers
+        }
+
+    async def _acquire(self, tier: str):
+        self._submitted[tier] += 1
+        enqueued = time.monotonic()
+
+        if self._active < self.max_concurrency and not any(self._queues.values()):
+            self._active += 1
+            self._wait_times[tier].append(0.0)
+            return
+
+        # Shed load instead of letting the queue grow until everybody times out
+        queue = self._queues[tier]
+        if len(queue) >= self.max_queue_depth:
+            self._rejected[tier] += 1
+            raise SchedulerOverloadedError(tier, self._retry_after(tier))
+
+        waiter = asyncio.get_running_loop().create_future()
+        queue.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just before cancellation; pass it on
+                self._release()
+            elif waiter in queue:
+                # _release() may already have popped and skipped the cancelled waiter
+                queue.remove(waiter)
+            raise
+
+        self._wait_times[tier].append((time.monotonic() - enqueued) * 1000)
+
+    def _release(self):
+        """Hand the freed slot to the oldest waiter of the highest priority tier"""
+        for tier in self._tiers:
+            queue = self._queues[tier]
+            while queue:
+                waiter = queue.popleft()
+                if not waiter.done():
+                    waiter.set_result(None)
+                    return
+        self._active -= 1
+
+    def _retry_after(self, tier: str) -> int:
+        """Estimated seconds until the queue ahead of this tier drains"""
+        ahead = sum(
+            len(self._queues[other]) for other in self._tiers
+            if TIER_PRIORITY[other] <= TIER_PRIORITY[tier]
+        )
+        return max(1, math.ceil(ahead * self._service_time / self.max_concurrency))
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return round(sorted_values[index], 2)
@@ -0,0 +1,108 @@
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Callable, Optional
+from services.llm_backends import StubLLMBackend
+from services.llm_replay import LatencyProfile, ReplayStore, StubLLMError
+import argparse
+import json
+import time
+import uuid
+
+def create_stub_app(
+    responder: Optional[Callable[[str, str], str]] = None,
+    chunk_size: int = 16,
+    backend: Optional[StubLLMBackend] = None
+) -> FastAPI:
+    """Local OpenAI-compatible chat completions server for offline testing and benchmarks
+
+    Responses, latency, injected errors and chunking all come from the StubLLMBackend,
+    so recorded completions can be replayed over HTTP.
+    """
+    backend = backend or StubLLMBackend(responder=responder, chunk_size=chunk_size)
+    app = FastAPI(title="CraftMyCV LLM stub")
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        messages = body.get("messages", [])
+        system_message = next((m["content"] for m in messages if m["role"] == "system"), "")
+        prompt = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+
+        if not body.get("stream"):
+            try:
+                content = await backend.complete(system_message, prompt, completion_id)
+            except StubLLMError as e:
+                return _error_response(e)
+
+            return JSONResponse({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "stub"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop"
+                }]
+            })
+
+        stream = backend.stream(system_message, prompt, completion_id)
+        try:
+            # Injected errors must be reported before the 200 status line is sent
+            first_chunk = await stream.__anext__()
+        except StubLLMError as e:
+            return _error_response(e)
+
+        async def chunks():
+            content = first_chunk
+            while True:
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "choices": [{"index": 0, "delta": {"content": content}}]
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+                try:
+                    content = await stream.__anext__()
+                except StopAsyncIteration:
+                    break
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    @app.get("/stats")
+    async def stats():
+        return {"calls": backend.calls, "replayed": backend.replayed, "errors": backend.errors}
+
+    return app
+
+def _error_response(error: StubLLMError) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"error": {"message": str(error), "type": "stub_error"}}
+    )
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run the local LLM stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--replay", help="JSON lines file of recorded completions (AI_LLM_RECORD_FILE output)")
+    parser.add_argument("--strict", action="store_true", help="fail prompts that have no recording")
+    parser.add_argument("--latency", default="fixed:0", help="fixed:<s>, uniform:<min>,<max>, lognormal:<median>,<sigma> or recorded")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--chunk-size", type=int, default=16)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    stub_backend = StubLLMBackend(
+        chunk_size=args.chunk_size,
+        replay=ReplayStore(args.replay) if args.replay else None,
+        latency=LatencyProfile(args.latency, seed=args.seed),
+        error_rate=args.error_rate,
+        strict_replay=args.strict,
+        seed=args.seed
+    )
+    uvicorn.run(create_stub_app(backend=stub_backend), host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,194 @@
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+import hashlib
+import itertools
+import numpy as np
+import os
+import time
+import zlib
+
+# Modulus of the MinHash permutations; keeps a * x + b inside 64 bits for 32-bit shingle hashes
+MERSENNE_PRIME = (1 << 31) - 1
+
+def normalize_text(text: str) -> str:
+    """Text with runs of whitespace collapsed; case and punctuation are kept since edits to them matter"""
+    return " ".join(text.split())
+
+class MinHasher:
+    """MinHash signatures over character shingles, computed for all permutations in one NumPy pass"""
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 5, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        generator = np.random.default_rng(seed)
+        self._a = generator.integers(1, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self._b = generator.integers(0, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        normalized = " ".join(text.lower().split())
+        size = self.shingle_size
+        shingles = {normalized[start:start + size] for start in range(max(len(normalized) - size + 1, 1))}
+
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles),
+            dtype=np.uint64,
+            count=len(shingles)
+        )
+        return ((np.outer(self._a, hashes) + self._b[:, None]) % MERSENNE_PRIME).min(axis=1)
+
+    @staticmethod
+    def similarity(first: np.ndarray, second: np.ndarray) -> float:
+        """Estimated Jaccard similarity of the shingle sets behind two signatures"""
+        return float(np.count_nonzero(first == second)) / len(first)
+
+class NearDuplicateIndex:
+    """Per-user in-memory MinHash/LSH index of recent AI inputs and their results
+
+    Inputs are only compared within a scope (the request parameters other than the text),
+    so a match means the same request with slightly edited content. Only an input that is
+    identical after whitespace normalization is served the prior result, since even a
+    one-word edit must reach the output; one above seed_threshold can seed a cheaper revision.
+    """
+
+    def __init__(
+        self,
+        num_perm: int = 64,
+        bands: int = 16,
+        seed_threshold: float = None,
+        max_users: int = None,
+        entries_per_user: int = 20,
+        ttl_seconds: int = None
+    ):
+        self.hasher = MinHasher(num_perm=num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.seed_threshold = seed_threshold or float(os.getenv("AI_NEAR_DUPLICATE_SEED_THRESHOLD", "0.8"))
+        self.max_users = max_users or int(os.getenv("AI_NEAR_DUPLICATE_MAX_USERS", "5000"))
+        self.entries_per_user = entries_per_user
+        self.ttl_seconds = ttl_seconds or int(os.getenv("AI_NEAR_DUPLICATE_TTL_SECONDS", "3600"))
+
+        # user id -> {"entries": OrderedDict[entry id, entry], "buckets": {band key: entry ids}}
+        self._users: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._ids = itertools.count()
+
+        self._outcomes: Dict[str, Dict[str, int]] = {}
+        # Best candidate similarity per lookup, in 0.05 buckets, for tuning the seed threshold
+        self._similarities: Dict[str, int] = {}
+
+    def match(
+        self,
+        endpoint: str,
+        user_id: str,
+        scope: str,
+        text: str,
+        allow_seed: bool = True
+    ) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """("serve" | "seed" | None, matching entry) for the most similar recent input"""
+        normalized = normalize_text(text)
+        signature = self.hasher.signature(text)
+        user = self._users.get(user_id)
+        best: Tuple[float, Optional[Dict[str, Any]]] = (0.0, None)
+
+        if user is not None:
+            self._users.move_to_end(user_id)
+            self._expire(user)
+
+            candidates: Set[int] = set()
+            for key in self._band_keys(scope, signature):
+                candidates.update(user["buckets"].get(key, ()))
+
+            for entry_id in candidates:
+                entry = user["entries"][entry_id]
+                if entry["normalized"] == normalized:
+                    best = (1.0, entry)
+                    break
+                similarity = MinHasher.similarity(signature, entry["signature"])
+                if similarity > best[0]:
+                    best = (similarity, entry)
+
+        similarity, entry = best
+        if entry is not None:
+            bucket = f"{min(int(similarity * 20), 19) * 0.05:.2f}"
+            self._similarities[bucket] = self._similarities.get(bucket, 0) + 1
+
+        if entry is not None and entry["normalized"] == normalized:
+            outcome = "serve"
+        elif entry is not None and allow_seed and similarity >= self.seed_threshold:
+            outcome = "seed"
+        else:
+            outcome, entry = None, None
+
+        counts = self._outcomes.setdefault(endpoint, {"lookups": 0, "served": 0, "seeded": 0})
+        counts["lookups"] += 1
+        if outcome == "serve":
+            counts["served"] += 1
+        elif outcome == "seed":
+            counts["seeded"] += 1
+
+        return outcome, entry
+
+    def add(self, user_id: str, scope: str, text: str, result: Dict[str, Any]):
+        """Index an input and the result produced for it"""
+        user = self._users.get(user_id)
+        if user is None:
+            user = self._users[user_id] = {"entries": OrderedDict(), "buckets": {}}
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        self._users.move_to_end(user_id)
+
+        signature = self.hasher.signature(text)
+        entry_id = next(self._ids)
+        keys = self._band_keys(scope, signature)
+        user["entries"][entry_id] = {
+            "id": entry_id,
+            "text": text,
+            "normalized": normalize_text(text),
+            "signature": signature,
+            "keys": keys,
+            "result": result,
+            "created_at": time.monotonic()
+        }
+        for key in keys:
+            user["buckets"].setdefault(key, set()).add(entry_id)
+
+        while len(user["entries"]) > self.entries_per_user:
+            self._evict(user, next(iter(user["entries"])))
+
+    def stats(self) -> Dict[str, Any]:
+        endpoints = {
+            endpoint: {
+                **counts,
+                "hit_rate": round((counts["served"] + counts["seeded"]) / counts["lookups"], 4) if counts["lookups"] else 0.0
+            }
+            for endpoint, counts in self._outcomes.items()
+        }
+        return {
+            "users": len(self._users),
+            "seed_threshold": self.seed_threshold,
+            "endpoints": endpoints,
+            "similarity_histogram": dict(sorted(self._similarities.items()))
+        }
+
+    def _band_keys(self, scope: str, signature: np.ndarray) -> Tuple[bytes, ...]:
+        """One bucket key per LSH band, namespaced by scope"""
+        prefix = hashlib.sha1(scope.encode("utf-8")).digest()[:8]
+        return tuple(
+            prefix + bytes([band]) + signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            for band in range(self.bands)
+        )
+
+    def _expire(self, user: Dict[str, Any]):
+        expired_before = time.monotonic() - self.ttl_seconds
+        for entry_id, entry in list(user["entries"].items()):
+            if entry["created_at"] >= expired_before:
+                break
+            self._evict(user, entry_id)
+
+    def _evict(self, user: Dict[str, Any], entry_id: int):
+        entry = user["entries"].pop(entry_id)
+        for key in entry["keys"]:
+            bucket = user["buckets"].get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del user["buckets"][key]
@@ -0,0 +1,222 @@
+from typing import Any, Dict, List, Optional, Tuple
+from services.ats_scorer import LocalATSScorer, tokenize
+from services.skill_matcher import SkillMatcher
+import html
+import logging
+import math
+import os
+import re
+
+try:
+    import tiktoken
+except ImportError:  # optional; token counts fall back to a character heuristic
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Token budget for the CV and job description text of each prompt, overridable
+# with AI_PROMPT_BUDGET_<ENDPOINT>
+PROMPT_BUDGETS = {
+    "content_optimization": 1500,
+    "cv_optimization": 6000,
+    "ats_analysis": 3000,
+    "ats_suggestions": 2500,
+    "ats_section": 1200
+}
+
+# Share of the budget a job description keeps even when the CV alone fills it
+MIN_JOB_DESCRIPTION_SHARE = 0.25
+
+# Job description sentences that never carry requirements
+BOILERPLATE_PATTERN = re.compile(
+    r"equal (?:employment )?opportunity|regardless of (?:race|age|gender)|all qualified applicants|"
+    r"reasonable accommodation|privacy (?:notice|policy)|background check|click apply|apply now|"
+    r"follow us on|visit our (?:website|careers)",
+    re.IGNORECASE
+)
+
+_BLOCK_TAG = re.compile(r"<\s*(?:br|/p|/div|/li|/h\d|/tr)\s*/?\s*>", re.IGNORECASE)
+_TAG = re.compile(r"<[^>]+>")
+_MARKDOWN_HEADING = re.compile(r"^\s{0,3}#{1,6}\s*")
+_MARKDOWN_EMPHASIS = re.compile(r"(\*{1,3}|_{2,3}|`+)(?=\S)(.+?)(?<=\S)\1")
+_BULLET = re.compile(r"^\s*(?:[•·▪◦●\-*]|\d+[.)])\s+")
+_SPACES = re.compile(r"[ \t\u00a0]+")
+_SENTENCE_END = re.compile(r"(?<=[.!?;])\s+(?=[A-Z0-9])")
+
+class PromptBudget:
+    """Shrink CV and job description text to a per-endpoint token budget before it is sent to the LLM
+
+    CV text only has its whitespace normalised, since the LLM scores or rewrites exactly
+    what it sees. Job descriptions are also stripped of markup, boilerplate and repeated
+    lines, and when a prompt is still over budget only their most keyword-dense
+    sentences are kept.
+    """
+
+    def __init__(self, skill_matcher: Optional[SkillMatcher] = None, ats_scorer: Optional[LocalATSScorer] = None):
+        self.skill_matcher = skill_matcher or SkillMatcher()
+        self.ats_scorer = ats_scorer or LocalATSScorer(skill_matcher=self.skill_matcher)
+        self.budgets = {
+            endpoint: int(os.getenv(f"AI_PROMPT_BUDGET_{endpoint.upper()}", str(default)))
+            for endpoint, default in PROMPT_BUDGETS.items()
+        }
+        self._encoding = _load_encoding()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def count_tokens(self, text: str) -> int:
+        """Token count of text, exact when tiktoken is installed"""
+        if not text:
+            return 0
+        if self._encoding is not None:
+            return len(self._encoding.encode(text))
+        # Roughly four characters per token for English prose
+        return math.ceil(len(text) / 4)
+
+    def fit(self, endpoint: str, content: str, job_description: Optional[str] = None) -> Tuple[str, Optional[str]]:
+        """Normalise content, clean the job description and trim it to the endpoint budget"""
+        budget = self.budgets.get(endpoint, PROMPT_BUDGETS["ats_analysis"])
+        tokens_before = self.count_tokens(content) + self.count_tokens(job_description or "")
+
+        content = self.normalize_whitespace(content)
+        if job_description:
+            job_description = self.clean(job_description, drop_boilerplate=True)
+
+        content_tokens = self.count_tokens(content)
+        job_description_tokens = self.count_tokens(job_description or "")
+        trimmed = False
+
+        # The CV is never cut, since the LLM scores or rewrites exactly what it sees
+        if job_description and content_tokens + job_description_tokens > budget:
+            job_description_budget = max(budget - content_tokens, int(budget * MIN_JOB_DESCRIPTION_SHARE))
+            if job_description_tokens > job_description_budget:
+                job_description = self.rank_sentences(job_description, job_description_budget)
+                job_description_tokens = self.count_tokens(job_description)
+                trimmed = True
+
+        tokens_after = content_tokens + job_description_tokens
+        self._record(endpoint, tokens_before, tokens_after, trimmed)
+        logger.debug(f"Prompt budget {endpoint}: {tokens_before} -> {tokens_after} tokens")
+
+        return content, job_description
+
+    def fit_all(self, endpoint: str, *contents: str) -> List[str]:
+        """Normalise several CV texts that go into one prompt, such as the old and new version of a section
+
+        Like the CV in fit(), none of them is cut; the savings are recorded under endpoint.
+        """
+        tokens_before = sum(self.count_tokens(content) for content in contents)
+        contents = [self.normalize_whitespace(content) for content in contents]
+        tokens_after = sum(self.count_tokens(content) for content in contents)
+        self._record(endpoint, tokens_before, tokens_after, False)
+        return contents
+
+    def normalize_whitespace(self, text: str) -> str:
+        """Collapse runs of spaces and drop blank lines, leaving every character of CV text in place"""
+        if not text:
+            return text
+
+        lines = (_SPACES.sub(" ", line).strip() for line in text.splitlines())
+        return "\n".join(line for line in lines if line)
+
+    def clean(self, text: str, drop_boilerplate: bool = False) -> str:
+        """Strip HTML and markdown markup, normalise bullets and whitespace, and drop repeated lines"""
+        if not text:
+            return text
+
+        text = html.unescape(_TAG.sub(" ", _BLOCK_TAG.sub("\n", text)))
+        lines = []
+        seen = set()
+
+        for line in text.splitlines():
+            line = _MARKDOWN_HEADING.sub("", line)
+            line = _MARKDOWN_EMPHASIS.sub(r"\2", line)
+            line = _BULLET.sub("- ", line)
+            line = _SPACES.sub(" ", line).strip()
+
+            if not line:
+                continue
+            if drop_boilerplate and BOILERPLATE_PATTERN.search(line):
+                continue
+
+            # Headers, footers and boilerplate pasted more than once are kept a single time
+            key = line.lower().lstrip("- ")
+            if key in seen:
+                continue
+            seen.add(key)
+            lines.append(line)
+
+        return "\n".join(lines)
+
+    def rank_sentences(self, job_description: str, budget: int) -> str:
+        """Keep the most keyword-dense sentences that fit the budget, in their original order"""
+        sentences = [
+            (line_index, sentence)
+            for line_index, line in enumerate(job_description.splitlines())
+            for sentence in _SENTENCE_END.split(line)
+            if sentence.strip()
+        ]
+
+        keywords = set(self.ats_scorer.extract_keywords(job_description))
+        scored = sorted(
+            range(len(sentences)),
+            key=lambda index: (-self._keyword_density(sentences[index][1], keywords), index)
+        )
+
+        kept = set()
+        used = 0
+        for index in scored:
+            tokens = self.count_tokens(sentences[index][1]) + 1
+            if used + tokens > budget:
+                continue
+            kept.add(index)
+            used += tokens
+
+        lines: Dict[int, List[str]] = {}
+        for index in sorted(kept):
+            line_index, sentence = sentences[index]
+            lines.setdefault(line_index, []).append(sentence)
+
+        return "\n".join(" ".join(parts) for _, parts in sorted(lines.items()))
+
+    def stats(self) -> Dict[str, Any]:
+        """Tokens saved per endpoint"""
+        return {
+            endpoint: {
+                **counts,
+                "tokens_saved": counts["tokens_before"] - counts["tokens_after"],
+                "avg_tokens_saved": round((counts["tokens_before"] - counts["tokens_after"]) / counts["prompts"], 1)
+            }
+            for endpoint, counts in self._stats.items()
+        }
+
+    def _keyword_density(self, sentence: str, keywords: set) -> float:
+        tokens = tokenize(sentence)
+        if not tokens:
+            return 0.0
+
+        hits = sum(1 for token in tokens if token in keywords)
+        hits += sum(1 for first, second in zip(tokens, tokens[1:]) if f"{first} {second}" in keywords)
+        # Named skills are the strongest requirement signal
+        hits += 2 * sum(self.skill_matcher.find(sentence).values())
+
+        # Smoothed so a two-word fragment does not outrank a full requirement
+        return hits / (len(tokens) + 4)
+
+    def _record(self, endpoint: str, tokens_before: int, tokens_after: int, trimmed: bool):
+        counts = self._stats.setdefault(endpoint, {"prompts": 0, "trimmed": 0, "tokens_before": 0, "tokens_after": 0})
+        counts["prompts"] += 1
+        counts["trimmed"] += int(trimmed)
+        counts["tokens_before"] += tokens_before
+        counts["tokens_after"] += tokens_after
+
+def _load_encoding():
+    """tiktoken encoding for the configured model, or None to use the heuristic"""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(os.getenv("AI_LLM_MODEL", "gpt-4o-mini"))
+    except Exception:
+        try:
+            return tiktoken.get_encoding("o200k_base")
+        except Exception:
+            # Encodings are downloaded on first use and may be unavailable offline
+            return None
@@ -0,0 +1,268 @@
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+import asyncio
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Monthly allowance per quota kind for each tier; kinds without an entry are unlimited.
+# Suggestions are only charged when the catalog has to ask the LLM for a new job title.
+TIER_QUOTAS = {
+    "free": {
+        "optimization": int(os.getenv("AI_FREE_OPTIMIZATIONS_PER_MONTH", "5")),
+        "suggestion": int(os.getenv("AI_FREE_SUGGESTIONS_PER_MONTH", "20"))
+    },
+    "pro": {
+        "suggestion": int(os.getenv("AI_PRO_SUGGESTIONS_PER_MONTH", "500"))
+    }
+}
+
+class QuotaExceededError(Exception):
+    """Raised before any LLM work when a user has used up their monthly allowance"""
+
+    def __init__(self, kind: str, limit: int, resets_at: datetime, tier: str = "free"):
+        upgrade = "upgrade to Pro or " if tier == "free" else ""
+        super().__init__(f"Monthly limit of {limit} AI {kind}s reached; {upgrade}wait until {resets_at:%Y-%m-%d}")
+        self.kind = kind
+        self.limit = limit
+        self.resets_at = resets_at
+
+class QuotaRequestTooLargeError(Exception):
+    """Raised when a single request needs more units than the tier allows in a whole month"""
+
+    def __init__(self, kind: str, limit: int, units: int, tier: str = "free"):
+        super().__init__(f"{units} AI {kind}s requested at once but the {tier} tier allows {limit} a month")
+        self.kind = kind
+        self.limit = limit
+        self.units = units
+        self.tier = tier
+
+def current_period(now: Optional[datetime] = None) -> str:
+    """Quota period key, the UTC calendar month"""
+    return (now or datetime.utcnow()).strftime("%Y-%m")
+
+def period_end(period: str) -> datetime:
+    year, month = map(int, period.split("-"))
+    return datetime(year + month // 12, month % 12 + 1, 1)
+
+class QuotaService:
+    """Monthly per-user usage quotas reserved atomically in MongoDB
+
+    A reservation is a single conditional $inc, so concurrent requests on any number of
+    instances can never exceed the limit. Users known to be at their limit are rejected
+    from an in-process counter cache without a database round trip; the cache is
+    reconciled with MongoDB periodically since other instances also spend the quota.
+    """
+
+    def __init__(self, reconcile_interval: float = None, collection_name: str = "ai_quotas"):
+        self.reconcile_interval = reconcile_interval or float(os.getenv("AI_QUOTA_RECONCILE_INTERVAL", "60"))
+        self.collection_name = collection_name
+
+        # (user id, period, kind) -> (used, monotonic time of the last sync with MongoDB)
+        self._counts: Dict[Tuple[str, str, str], Tuple[int, float]] = {}
+        self._collection = None
+        self._index_ready = False
+        self._index_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+        self.reserved = 0
+        self.rejected = 0
+        self.cached_rejections = 0
+        self.released = 0
+        self.errors = 0
+
+    async def start(self):
+        """Create the quota index and start reconciling the counter cache"""
+        try:
+            await self._get_collection()
+        except Exception as e:
+            logger.error(f"Quota index creation failed: {str(e)}")
+
+        self._task = asyncio.create_task(self._reconcile_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def limit(self, tier: str, kind: str) -> Optional[int]:
+        """Monthly allowance, or None when the tier is unlimited"""
+        return TIER_QUOTAS.get(tier, {}).get(kind)
+
+    async def reserve(
+        self, user_id: str, tier: str, kind: str = "optimization", units: int = 1
+    ) -> Optional[Tuple[str, str, str, int]]:
+        """Spend units of the user's allowance, returning a reservation for release()
+
+        Raises QuotaExceededError when fewer than units remain, and
+        QuotaRequestTooLargeError when units exceed the monthly limit itself. Returns None for
+        unlimited tiers and empty requests, and also when a reservation fails, so an
+        outage of the quota store does not take the AI endpoints down with it. The one
+        exception is the unique index: without it the conditional upsert can insert a
+        second counter and exceed the limit, so failing to create it is raised instead.
+        """
+        limit = self.limit(tier, kind)
+        if limit is None or units <= 0:
+            return None
+
+        if units > limit:
+            # No amount of waiting makes this fit, so it is not reported as a used-up allowance
+            self.rejected += 1
+            raise QuotaRequestTooLargeError(kind, limit, units, tier)
+
+        period = current_period()
+        key = (user_id, period, kind)
+        cached = self._counts.get(key)
+        if cached is not None and cached[0] + units > limit:
+            self.rejected += 1
+            self.cached_rejections += 1
+            raise QuotaExceededError(kind, limit, period_end(period), tier)
+
+        collection = await self._get_collection()
+        try:
+            try:
+                # Matches only while all units fit; otherwise the upsert collides with the
+                # existing document on the unique index instead of incrementing it
+                document = await collection.find_one_and_update(
+                    {"user_id": user_id, "period": period, "kind": kind, "used": {"$lte": limit - units}},
+                    {"$inc": {"used": units}, "$setOnInsert": {"created_at": datetime.utcnow()}},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER
+                )
+            except DuplicateKeyError:
+                document = None
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Quota reservation failed: {str(e)}")
+            return None
+
+        if document is None:
+            if units == 1:
+                self._counts[key] = (limit, time.monotonic())
+            else:
+                # Some units may remain, so a smaller request must still reach MongoDB
+                self._counts.pop(key, None)
+            self.rejected += 1
+            raise QuotaExceededError(kind, limit, period_end(period), tier)
+
+        self._counts[key] = (document["used"], time.monotonic())
+        self.reserved += units
+        return (user_id, period, kind, units)
+
+    async def release(self, reservation: Optional[Tuple[str, str, str, int]]):
+        """Give back a reservation whose request failed before producing a result"""
+        if reservation is None:
+            return
+
+        user_id, period, kind, units = reservation
+        try:
+            collection = await self._get_collection()
+            document = await collection.find_one_and_update(
+                {"user_id": user_id, "period": period, "kind": kind, "used": {"$gte": units}},
+                {"$inc": {"used": -units}},
+                return_document=ReturnDocument.AFTER
+            )
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Quota release failed: {str(e)}")
+            return
+
+        self.released += units
+        if document is not None:
+            self._counts[(user_id, period, kind)] = (document["used"], time.monotonic())
+
+    @asynccontextmanager
+    async def reservation(
+        self, user_id: str, tier: str, kind: str = "optimization", units: int = 1
+    ) -> AsyncIterator[None]:
+        """Reserve units for the duration of a request, releasing them if the request fails"""
+        reservation = await self.reserve(user_id, tier, kind, units)
+        try:
+            yield
+        except BaseException:
+            await self.release(reservation)
+            raise
+
+    async def usage(self, user_id: str, tier: str) -> Dict[str, Any]:
+        """Used and remaining allowance per quota kind for the current period"""
+        period = current_period()
+        kinds = TIER_QUOTAS.get(tier, {})
+        documents = {}
+        if kinds:
+            collection = await self._get_collection()
+            async for document in collection.find({"user_id": user_id, "period": period}):
+                documents[document["kind"]] = document["used"]
+
+        return {
+            "tier": tier,
+            "period": period,
+            "resets_at": period_end(period),
+            "quotas": {
+                kind: {"used": documents.get(kind, 0), "limit": limit, "remaining": max(limit - documents.get(kind, 0), 0)}
+                for kind, limit in kinds.items()
+            }
+        }
+
+    async def reconcile(self):
+        """Refresh cached counters from MongoDB and forget those of past periods"""
+        period = current_period()
+        stale_before = time.monotonic() - self.reconcile_interval
+        for key in [key for key in self._counts if key[1] != period]:
+            del self._counts[key]
+
+        stale = [key for key, (_, synced_at) in self._counts.items() if synced_at < stale_before]
+        if not stale:
+            return
+
+        collection = await self._get_collection()
+        found = {}
+        async for document in collection.find(
+            {"period": period, "user_id": {"$in": list({user_id for user_id, _, _ in stale})}}
+        ):
+            found[(document["user_id"], period, document["kind"])] = document["used"]
+
+        now = time.monotonic()
+        for key in stale:
+            if key in found:
+                self._counts[key] = (found[key], now)
+            else:
+                del self._counts[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cached_users": len(self._counts),
+            "reserved": self.reserved,
+            "rejected": self.rejected,
+            "cached_rejections": self.cached_rejections,
+            "released": self.released,
+            "errors": self.errors
+        }
+
+    async def _reconcile_loop(self):
+        while True:
+            await asyncio.sleep(self.reconcile_interval)
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logger.error(f"Quota reconciliation failed: {str(e)}")
+
+    async def _get_collection(self):
+        if self._collection is None:
+            from database import get_database
+
+            database = await get_database()
+            self._collection = database[self.collection_name]
+
+        if not self._index_ready:
+            async with self._index_lock:
+                if not self._index_ready:
+                    await self._collection.create_index([("user_id", 1), ("period", 1), ("kind", 1)], unique=True)
+                    self._index_ready = True
+
+        return self._collection
@@ -0,0 +1,161 @@
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+class RenderCache:
+    """Rendered export cache: in-process LRU bounded by bytes, backed by files on local disk
+
+    Keys are content addresses of everything that determines an export's bytes, so
+    entries never need invalidating; an edited CV simply produces a new key and the
+    old entries age out of both tiers.
+    """
+
+    def __init__(self, memory_bytes: int = None, disk_bytes: int = None, directory: str = None):
+        self.memory_bytes = memory_bytes or int(os.getenv("EXPORT_CACHE_MEMORY_BYTES", str(64 * 1024 * 1024)))
+        self.disk_bytes = disk_bytes or int(os.getenv("EXPORT_CACHE_DISK_BYTES", str(1024 * 1024 * 1024)))
+        self.directory = directory or os.getenv(
+            "EXPORT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "craftmycv-render-cache")
+        )
+
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_used = 0
+        # Approximate; measured on the first prune and then updated on every write
+        self._disk_used: Optional[int] = None
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.errors = 0
+
+    @staticmethod
+    def make_key(cv_id: str, updated_at: Any, template_id: str, format: str, renderer_version: str) -> str:
+        """Content address of an export"""
+        if isinstance(updated_at, datetime):
+            updated_at = updated_at.isoformat()
+        digest = hashlib.sha256()
+        for part in (cv_id, str(updated_at), template_id, format, renderer_version):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Cached export, promoting disk hits into memory"""
+        content = self._entries.get(key)
+        if content is not None:
+            self._entries.move_to_end(key)
+            self.memory_hits += 1
+            return content
+
+        try:
+            content = await asyncio.to_thread(self._read, key)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Render cache read failed: {str(e)}")
+            content = None
+
+        if content is None:
+            self.misses += 1
+            return None
+
+        self.disk_hits += 1
+        self._remember(key, content)
+        return content
+
+    async def set(self, key: str, content: bytes):
+        """Store an export in both tiers"""
+        self._remember(key, content)
+        self.writes += 1
+        try:
+            await asyncio.to_thread(self._write, key, content)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Render cache write failed: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_entries": len(self._entries),
+            "memory_bytes": self._memory_used,
+            "disk_bytes": self._disk_used,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "errors": self.errors,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0
+        }
+
+    def _remember(self, key: str, content: bytes):
+        # Exports too large for the memory tier are only kept on disk
+        if len(content) > self.memory_bytes // 4:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._memory_used -= len(previous)
+        self._entries[key] = content
+        self._memory_used += len(content)
+        while self._memory_used > self.memory_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._memory_used -= len(evicted)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def _read(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                content = file.read()
+        except FileNotFoundError:
+            return None
+        # Refresh the access time used for eviction; noatime mounts would not
+        os.utime(path)
+        return content
+
+    def _write(self, key: str, content: bytes):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so concurrent readers never see a partial file
+        descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(content)
+        os.replace(temporary_path, path)
+
+        if self._disk_used is not None:
+            self._disk_used += len(content)
+        if self._disk_used is None or self._disk_used > self.disk_bytes:
+            self._prune()
+
+    def _prune(self):
+        """Delete the least recently used files until the disk tier is under 80% of its size"""
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    status = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((status.st_mtime, status.st_size, path))
+
+        used = sum(size for _, size, _ in files)
+        if used > self.disk_bytes:
+            files.sort()
+            target = self.disk_bytes * 0.8
+            for _, size, path in files:
+                if used <= target:
+                    break
+                try:
+                    os.remove(path)
+                    used -= size
+                except FileNotFoundError:
+                    pass
+        self._disk_used = used
@@ -0,0 +1,182 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional, Union
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+
+logger = logging.getLogger(__name__)
+
+RENDER_FORMATS = {"pdf": "render_pdf", "html": "render_html", "word": "render_word_html"}
+
+# Extra seconds the event loop waits beyond the in-worker deadline before giving up on a job
+TIMEOUT_GRACE_SECONDS = 2
+
+class RenderTimeoutError(Exception):
+    """Raised when rendering a CV takes longer than the per-job timeout"""
+    pass
+
+def serialize_document(document) -> bytes:
+    """Compact payload for a worker: the CVDocument as minified JSON"""
+    return document.json().encode("utf-8")
+
+def deserialize_document(payload: bytes):
+    from models.document import CVDocument
+
+    return CVDocument.parse_raw(payload)
+
+# Per-process ExportService, created once by the pool initializer
+_worker_service = None
+
+def _init_worker():
+    """Import the renderers, compile the themes and render a small CV once so fonts are loaded before real jobs"""
+    global _worker_service
+    from models.cv import CVData, CVSection
+    from services.export_service import ExportService
+
+    # Workers leave shutdown to the parent; a Ctrl-C in the terminal should not kill jobs mid-render
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    _worker_service = ExportService()
+    warmup = CVData.construct(title="Warmup", sections=[
+        CVSection(type="personal_info", title="Contact", content={"full_name": "Warmup", "summary": "Warmup"}),
+        CVSection(type="experience", title="Experience", content={"experiences": [{"title": "Warmup", "description": "Warmup"}]}),
+        CVSection(type="skills", title="Skills", content={"skills": ["Warmup"]})
+    ])
+    document = _worker_service.documents.build(warmup)
+    for method in RENDER_FORMATS.values():
+        getattr(_worker_service, method)(document)
+
+def _render_job(format: str, payload: bytes, template_id: Optional[str], timeout: float) -> Union[bytes, str]:
+    """Worker entry point; the job is interrupted by a timer signal once it exceeds the timeout"""
+    if _worker_service is None:
+        _init_worker()
+
+    document = deserialize_document(payload)
+    use_timer = timeout > 0 and hasattr(signal, "setitimer")
+    if use_timer:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return getattr(_worker_service, RENDER_FORMATS[format])(document, template_id)
+    finally:
+        if use_timer:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+def _raise_timeout(signum, frame):
+    raise RenderTimeoutError("CV rendering timed out")
+
+def _ready() -> bool:
+    return True
+
+class RenderPool:
+    """Process pool that renders CV exports off the event loop
+
+    Workers are started with a warm ExportService, receive CV documents as compact JSON and
+    stop any job that runs past the timeout, so one large export cannot stall other
+    requests. With max_workers set to 0 jobs run on a thread of the calling process
+    instead; a thread cannot be stopped, so a timed-out inline render keeps running in
+    the background and holds one of the inline_threads slots until it finishes.
+    """
+
+    def __init__(self, max_workers: int = None, timeout: float = None, inline_threads: int = None):
+        if max_workers is None:
+            max_workers = int(os.getenv("EXPORT_RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+        self.max_workers = max_workers
+        self.timeout = timeout or float(os.getenv("EXPORT_RENDER_TIMEOUT", "30"))
+        self.inline_threads = inline_threads or int(os.getenv("EXPORT_RENDER_INLINE_THREADS", "2"))
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._inline_slots = asyncio.Semaphore(self.inline_threads)
+
+        self.rendered = 0
+        self.timeouts = 0
+        self.restarts = 0
+
+    async def start(self):
+        """Start every worker now so the first exports do not pay for process startup"""
+        if self.max_workers == 0:
+            return
+
+        executor = self._get_executor()
+        loop = asyncio.get_running_loop()
+        try:
+            await asyncio.gather(*[loop.run_in_executor(executor, _ready) for _ in range(self.max_workers)])
+        except Exception as e:
+            logger.error(f"Render pool warmup failed: {str(e)}")
+
+    async def stop(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def render(self, format: str, document, template_id: Optional[str] = None) -> Union[bytes, str]:
+        """Render a CVDocument as pdf, html or word in a template's theme"""
+        if format not in RENDER_FORMATS:
+            raise ValueError(f"Unknown render format: {format}")
+
+        payload = serialize_document(document)
+        loop = asyncio.get_running_loop()
+        executor = None
+        try:
+            if self.max_workers == 0:
+                job = self._render_in_thread(format, payload, template_id)
+            else:
+                executor = self._get_executor()
+                job = loop.run_in_executor(executor, _render_job, format, payload, template_id, self.timeout)
+            result = await asyncio.wait_for(job, self.timeout + TIMEOUT_GRACE_SECONDS)
+        except (RenderTimeoutError, asyncio.TimeoutError):
+            self.timeouts += 1
+            raise RenderTimeoutError(f"CV rendering took longer than {self.timeout:g}s")
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory); shut the broken pool down, reaping its
+            # processes and failing its queued jobs, and replace it for the next job.
+            # Concurrent jobs see the same error, so only the current pool is replaced.
+            if self._executor is executor:
+                self.restarts += 1
+                self._executor = None
+                executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+        self.rendered += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.max_workers,
+            "rendered": self.rendered,
+            "timeouts": self.timeouts,
+            "restarts": self.restarts
+        }
+
+    async def _render_in_thread(self, format: str, payload: bytes, template_id: Optional[str]) -> Union[bytes, str]:
+        """Inline render on a thread that keeps its slot until it really finishes, even after a timeout"""
+        await self._inline_slots.acquire()
+        thread = asyncio.ensure_future(asyncio.to_thread(_render_inline, format, payload, template_id))
+        thread.add_done_callback(self._release_inline_slot)
+        return await asyncio.shield(thread)
+
+    def _release_inline_slot(self, thread: asyncio.Future):
+        self._inline_slots.release()
+        # Retrieved so an abandoned render that fails later is not reported as unhandled
+        if not thread.cancelled():
+            thread.exception()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking would copy the event loop and database client threads into workers
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker
+            )
+        return self._executor
+
+def _render_inline(format: str, payload: bytes, template_id: Optional[str]) -> Union[bytes, str]:
+    global _worker_service
+    if _worker_service is None:
+        from services.export_service import ExportService
+
+        _worker_service = ExportService(render_pool=RenderPool(max_workers=0))
+    return getattr(_worker_service, RENDER_FORMATS[format])(deserialize_document(payload), template_id)
@@ -0,0 +1,51 @@
+from datetime import datetime
+from typing import Any, Dict, List
+import asyncio
+
+class SectionScoreStore:
+    """Persisted per-section ATS scores keyed by CV id and section content hash"""
+
+    def __init__(self, collection_name: str = "ats_section_scores"):
+        self.collection_name = collection_name
+        self._collection = None
+        self._indexes_ready = False
+        self._index_lock = asyncio.Lock()
+
+    async def get_scores(self, cv_id: str, section_hashes: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Stored scores for the given section hashes"""
+        collection = await self._get_collection()
+        documents = await collection.find(
+            {"cv_id": cv_id, "section_hash": {"$in": section_hashes}}
+        ).to_list(len(section_hashes))
+        return {document["section_hash"]: document for document in documents}
+
+    async def save_scores(self, cv_id: str, scores: Dict[str, Dict[str, Any]]):
+        """Upsert freshly computed section scores"""
+        collection = await self._get_collection()
+        for section_hash, score in scores.items():
+            await collection.update_one(
+                {"cv_id": cv_id, "section_hash": section_hash},
+                {"$set": {**score, "cv_id": cv_id, "section_hash": section_hash, "updated_at": datetime.utcnow()}},
+                upsert=True
+            )
+
+    async def prune(self, cv_id: str, keep_hashes: List[str]):
+        """Remove scores for section versions that no longer exist"""
+        collection = await self._get_collection()
+        await collection.delete_many({"cv_id": cv_id, "section_hash": {"$nin": keep_hashes}})
+
+    async def _get_collection(self):
+        """Get the scores collection, creating its index on first use"""
+        if self._collection is None:
+            from database import get_database
+
+            database = await get_database()
+            self._collection = database[self.collection_name]
+
+        if not self._indexes_ready:
+            async with self._index_lock:
+                if not self._indexes_ready:
+                    await self._collection.create_index([("cv_id", 1), ("section_hash", 1)], unique=True)
+                    self._indexes_ready = True
+
+        return self._collection
@@ -0,0 +1,53 @@
+from typing import Any, Awaitable, Callable, Dict
+import asyncio
+
+class SingleFlight:
+    """Coalesce concurrent identical calls into one shared in-flight task"""
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Task] = {}
+
+        self.leaders = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn once per key; concurrent callers with the same key await the same result"""
+        task = self._in_flight.get(key)
+
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda finished: self._forget(key, finished))
+        else:
+            self.coalesced += 1
+
+        # Shield so one cancelled waiter does not cancel the call for everybody else;
+        # exceptions raised by fn propagate to every waiter
+        return await asyncio.shield(task)
+
+    def running(self, key: str) -> bool:
+        """Whether a call for key is in flight, i.e. do() would join it"""
+        return key in self._in_flight
+
+    def in_flight(self) -> int:
+        """Number of distinct calls currently running"""
+        return len(self._in_flight)
+
+    def stats(self) -> Dict[str, Any]:
+        """Coalescing counters for monitoring"""
+        return {
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "failures": self.failures,
+            "in_flight": self.in_flight()
+        }
+
+    def _forget(self, key: str, task: asyncio.Task):
+        """Drop a finished call so the next caller starts a fresh one"""
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+        if not task.cancelled() and task.exception() is not None:
+            self.failures += 1
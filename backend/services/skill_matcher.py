@@ -0,0 +1,313 @@
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import re
+
+# Canonical skill name -> aliases (matched case-insensitively on word boundaries).
+# Ambiguous short forms such as "go", "c" or "ts" and aliases that are also everyday
+# words ("swift", "node", "express", "excel", "security", "ai") are deliberately left out;
+# a few that are too common to drop are listed in CONTEXTUAL_ALIASES instead.
+SKILL_TAXONOMY: Dict[str, List[str]] = {
+    # Languages
+    "JavaScript": ["javascript", "js", "ecmascript", "es6"],
+    "TypeScript": ["typescript"],
+    "Python": ["python", "python3"],
+    "Java": ["java"],
+    "C": ["c language", "ansi c"],
+    "C++": ["c++", "cpp"],
+    "C#": ["c#", "csharp", "c sharp"],
+    "Go": ["golang", "go lang"],
+    "Rust": ["rustlang", "rust-lang", "rust language", "rust programming"],
+    "Ruby": ["ruby"],
+    "PHP": ["php"],
+    "Kotlin": ["kotlin"],
+    "Swift": ["swiftui", "swift language", "swift programming"],
+    "Scala": ["scala"],
+    "R": ["r language", "rstats"],
+    "SQL": ["sql"],
+    "Bash": ["bash", "shell scripting", "shell script"],
+    "HTML": ["html", "html5"],
+    "CSS": ["css", "css3"],
+    # Frameworks and libraries
+    "React": ["react.js", "reactjs", "react js", "react hooks", "react components"],
+    "Angular": ["angular", "angularjs", "angular.js"],
+    "Vue.js": ["vue", "vue.js", "vuejs"],
+    "Next.js": ["next.js", "nextjs"],
+    "Node.js": ["node.js", "nodejs"],
+    "Express": ["express.js", "expressjs"],
+    "Django": ["django"],
+    "Flask": ["flask"],
+    "FastAPI": ["fastapi"],
+    "Spring": ["spring boot", "springboot", "spring framework"],
+    ".NET": [".net", "dotnet", "asp.net"],
+    "Ruby on Rails": ["ruby on rails", "rails framework", "ror"],
+    "Tailwind CSS": ["tailwind", "tailwindcss", "tailwind css"],
+    "GraphQL": ["graphql"],
+    "REST APIs": ["restful", "rest api", "rest apis", "restful api", "restful apis"],
+    "gRPC": ["grpc"],
+    # Data and machine learning
+    "Machine Learning": ["machine learning", "ml"],
+    "Deep Learning": ["deep learning"],
+    "Artificial Intelligence": ["artificial intelligence", "generative ai"],
+    "Natural Language Processing": ["natural language processing", "nlp"],
+    "Computer Vision": ["computer vision"],
+    "Large Language Models": ["large language models", "large language model", "llm", "llms"],
+    "TensorFlow": ["tensorflow", "tf2"],
+    "PyTorch": ["pytorch"],
+    "scikit-learn": ["scikit-learn", "sklearn", "scikit learn"],
+    "Pandas": ["pandas"],
+    "NumPy": ["numpy"],
+    "Apache Spark": ["apache spark", "pyspark", "spark sql", "spark streaming"],
+    "Hadoop": ["hadoop"],
+    "Apache Kafka": ["kafka", "apache kafka"],
+    "Airflow": ["airflow", "apache airflow"],
+    "Data Analysis": ["data analysis", "data analytics", "analytics"],
+    "Data Engineering": ["data engineering", "etl", "elt", "data pipelines", "data pipeline"],
+    "Data Visualization": ["data visualization", "data visualisation", "dataviz"],
+    "Tableau": ["tableau"],
+    "Power BI": ["power bi", "powerbi"],
+    "Excel": ["ms excel", "microsoft excel", "excel spreadsheets"],
+    "Statistics": ["statistics", "statistical analysis"],
+    # Databases
+    "PostgreSQL": ["postgresql", "postgres", "psql"],
+    "MySQL": ["mysql"],
+    "MongoDB": ["mongodb", "mongo"],
+    "Redis": ["redis"],
+    "Elasticsearch": ["elasticsearch", "elastic search", "opensearch"],
+    "DynamoDB": ["dynamodb"],
+    "Snowflake": ["snowflake"],
+    "BigQuery": ["bigquery", "big query"],
+    # Cloud and infrastructure
+    "AWS": ["aws", "amazon web services"],
+    "Azure": ["azure", "microsoft azure"],
+    "Google Cloud": ["gcp", "google cloud", "google cloud platform"],
+    "Docker": ["docker", "containerization"],
+    "Kubernetes": ["kubernetes", "k8s", "eks", "gke", "aks"],
+    "Terraform": ["terraform"],
+    "Ansible": ["ansible"],
+    "CI/CD": ["ci/cd", "cicd", "ci cd", "continuous integration", "continuous delivery", "continuous deployment"],
+    "Jenkins": ["jenkins"],
+    "GitHub Actions": ["github actions"],
+    "Git": ["git", "github", "gitlab", "version control"],
+    "Linux": ["linux", "unix"],
+    "Microservices": ["microservices", "microservice", "micro-services"],
+    "Serverless": ["serverless", "aws lambda", "lambda functions"],
+    "DevOps": ["devops", "dev ops"],
+    "Site Reliability Engineering": ["site reliability engineering", "sre"],
+    "Observability": ["observability", "prometheus", "grafana", "datadog", "application monitoring", "infrastructure monitoring"],
+    # Practices
+    "Agile": ["agile methodologies", "agile methodology", "agile development", "agile software development", "agile practices"],
+    "Scrum": ["scrum", "scrum master"],
+    "Kanban": ["kanban"],
+    "Test-Driven Development": ["test-driven development", "test driven development", "tdd"],
+    "Unit Testing": ["unit testing", "unit tests", "pytest", "jest", "junit"],
+    "System Design": ["system design", "distributed systems", "software architecture"],
+    "Object-Oriented Programming": ["object-oriented programming", "object oriented programming", "oop"],
+    "Security": ["cybersecurity", "cyber security", "infosec", "information security", "application security"],
+    # Business and soft skills
+    "Project Management": ["project management", "project planning"],
+    "Product Management": ["product management", "product manager"],
+    "Stakeholder Management": ["stakeholder management", "stakeholder engagement"],
+    "Leadership": ["leadership", "team leadership", "people management"],
+    "Communication": ["communication", "communication skills"],
+    "Problem Solving": ["problem solving", "problem-solving"],
+    "Mentoring": ["mentoring", "mentorship", "coaching"],
+    "Budgeting": ["budgeting", "budget management"],
+    "Customer Service": ["customer service", "customer support"],
+    "Sales": ["sales", "business development"],
+    "Digital Marketing": ["digital marketing", "online marketing"],
+    "SEO": ["seo", "search engine optimization", "search engine optimisation"],
+    "Content Marketing": ["content marketing", "content strategy"],
+    "UX Design": ["ux", "ux design", "user experience"],
+    "UI Design": ["ui design", "user interface design"],
+    "Figma": ["figma"],
+    "Jira": ["jira"],
+    "Salesforce": ["salesforce", "sfdc"]
+}
+
+# Bare aliases that are also everyday words ("I react quickly", "spark joy"); they only
+# count when listed next to another skill, as in "Python, React and Node.js"
+CONTEXTUAL_ALIASES: Dict[str, List[str]] = {
+    "Rust": ["rust"],
+    "React": ["react"],
+    "Apache Spark": ["spark"],
+    "Ruby on Rails": ["rails"],
+    "Agile": ["agile"],
+    "Observability": ["monitoring"]
+}
+
+_WHITESPACE = re.compile(r"\s+")
+# Text allowed between two entries of a skill list
+_LIST_SEPARATOR = re.compile(r"[\s,;/|&()]*(?:(?:and|or)[\s,;/|&()]+)?")
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:[.\-/][a-z0-9+#]+)*")
+
+class SkillMatcher:
+    """Aho-Corasick automaton over skill aliases; matches a whole text in one linear pass"""
+
+    def __init__(self, taxonomy: Dict[str, List[str]] = None, contextual_aliases: Dict[str, List[str]] = None):
+        taxonomy = taxonomy if taxonomy is not None else SKILL_TAXONOMY
+        contextual_aliases = contextual_aliases if contextual_aliases is not None else CONTEXTUAL_ALIASES
+
+        self.canonical_names: List[str] = list(taxonomy)
+        self._alias_to_skill: Dict[str, int] = {}
+        for skill_id, (name, aliases) in enumerate(taxonomy.items()):
+            for alias in aliases:
+                self._alias_to_skill.setdefault(_normalize(alias), skill_id)
+
+        skill_ids = {name: skill_id for skill_id, name in enumerate(self.canonical_names)}
+        self._contextual: Set[str] = set()
+        for name, aliases in contextual_aliases.items():
+            for alias in aliases:
+                alias = _normalize(alias)
+                if name in skill_ids and alias not in self._alias_to_skill:
+                    self._alias_to_skill[alias] = skill_ids[name]
+                    self._contextual.add(alias)
+
+        # Trie transitions, failure links and outputs (skill id, pattern length, contextual) per state
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, int, bool]]] = [[]]
+
+        for alias, skill_id in self._alias_to_skill.items():
+            self._add_pattern(alias, skill_id, alias in self._contextual)
+        self._build_failure_links()
+
+    def find(self, text: str) -> Dict[str, int]:
+        """Count occurrences of each canonical skill in text"""
+        counts: Dict[str, int] = {}
+        for skill_id, _ in self._scan(_normalize(text)):
+            name = self.canonical_names[skill_id]
+            counts[name] = counts.get(name, 0) + 1
+        return counts
+
+    def canonicalize(self, term: str) -> Optional[str]:
+        """Canonical skill name for an alias, or None when the term is not in the taxonomy"""
+        skill_id = self._alias_to_skill.get(_normalize(term))
+        return self.canonical_names[skill_id] if skill_id is not None else None
+
+    def match_terms(self, text: str, terms: Iterable[str]) -> List[str]:
+        """Terms that appear in text, treating taxonomy aliases as equivalent"""
+        normalized = _normalize(text)
+        found = {self.canonical_names[skill_id] for skill_id, _ in self._scan(normalized)}
+
+        matched = []
+        for term in terms:
+            canonical = self.canonicalize(term)
+            if canonical is not None:
+                if canonical in found:
+                    matched.append(term)
+            elif re.search(rf"(?<![a-z0-9]){re.escape(_normalize(term))}(?![a-z0-9])", normalized):
+                matched.append(term)
+        return matched
+
+    def coverage(self, cv_text: str, job_description: str) -> Dict[str, object]:
+        """Skill coverage of a CV against the skills a job description asks for"""
+        required = self.find(job_description)
+        present = self.find(cv_text)
+        # Per 100 tokens, the same base LocalATSScorer.keyword_density uses for other terms
+        word_count = max(len(tokenize(cv_text)), 1)
+
+        # Most frequently requested skills first
+        required_keywords = sorted(required, key=lambda name: (-required[name], name))
+        matched = [name for name in required_keywords if name in present]
+        missing = [name for name in required_keywords if name not in present]
+
+        return {
+            "required_keywords": required_keywords,
+            "matched_keywords": matched,
+            "missing_keywords": missing,
+            "coverage": round(len(matched) / len(required_keywords), 4) if required_keywords else 1.0,
+            "keyword_density": {
+                name: round(present[name] * 100.0 / word_count, 2) for name in matched
+            }
+        }
+
+    def _scan(self, text: str) -> List[Tuple[int, int]]:
+        """(skill id, start offset) for every whole-word alias occurrence, preferring the longest overlapping match
+
+        Contextual aliases are kept only when a list separator is all that stands between
+        them and a neighbouring unambiguous match.
+        """
+        state = 0
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        matches = []
+
+        for position, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+
+            for skill_id, length, contextual in output[state]:
+                start = position - length + 1
+                if _is_boundary(text, start - 1) and _is_boundary(text, position + 1):
+                    matches.append((start, position + 1, skill_id, contextual))
+
+        # "node.js" should count as Node.js only, not also as JavaScript via "js"
+        matches.sort(key=lambda match: (match[0], match[0] - match[1]))
+        selected = []
+        covered_until = 0
+        for match in matches:
+            if match[0] >= covered_until:
+                selected.append(match)
+                covered_until = match[1]
+
+        return [
+            (skill_id, start)
+            for index, (start, end, skill_id, contextual) in enumerate(selected)
+            if not contextual or _listed_with_skill(text, selected, index)
+        ]
+
+    def _add_pattern(self, pattern: str, skill_id: int, contextual: bool = False):
+        state = 0
+        for ch in pattern:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][ch] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append((skill_id, len(pattern), contextual))
+
+    def _build_failure_links(self):
+        """Breadth-first construction of failure links, merging suffix outputs"""
+        queue = deque(self._goto[0].values())
+
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(ch, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens, keeping technical terms such as c++, c# and node.js intact"""
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+def _normalize(text: str) -> str:
+    return _WHITESPACE.sub(" ", text.lower()).strip() if text else ""
+
+def _listed_with_skill(text: str, selected: List[Tuple[int, int, int, bool]], index: int) -> bool:
+    """True when the match at index sits next to an unambiguous match in a list"""
+    start, end = selected[index][0], selected[index][1]
+    if index > 0:
+        previous = selected[index - 1]
+        if not previous[3] and _LIST_SEPARATOR.fullmatch(text, previous[1], start):
+            return True
+    if index + 1 < len(selected):
+        following = selected[index + 1]
+        if not following[3] and _LIST_SEPARATOR.fullmatch(text, end, following[0]):
+            return True
+    return False
+
+def _is_boundary(text: str, index: int) -> bool:
+    """True when index is outside the text or not part of a word"""
+    if index < 0 or index >= len(text):
+        return True
+    return not text[index].isalnum()
@@ -0,0 +1,296 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from models.ai import AIContentRequest
+import asyncio
+import difflib
+import logging
+import os
+import re
+
+logger = logging.getLogger(__name__)
+
+# Titles generated ahead of time; override with a comma separated AI_SUGGESTION_WARM_TITLES
+COMMON_JOB_TITLES = [
+    "General", "Software Engineer", "Frontend Developer", "Backend Developer", "Full Stack Developer",
+    "Data Scientist", "Data Analyst", "Data Engineer", "DevOps Engineer", "Product Manager",
+    "Project Manager", "UX Designer", "Graphic Designer", "Marketing Manager", "Sales Representative",
+    "Account Manager", "Business Analyst", "Financial Analyst", "Accountant", "Customer Service Representative",
+    "Human Resources Manager", "Operations Manager", "Registered Nurse", "Teacher", "Administrative Assistant"
+]
+
+# Section types seeded for every warm title; other types (certifications, languages,
+# custom sections) are generated on request like titles the catalog has not seen
+CATALOG_SECTION_TYPES = ["summary", "experience", "education", "skills", "projects"]
+
+# Longer titles are cut to this many words, so arbitrary text cannot mint unlimited keys
+MAX_TITLE_WORDS = 5
+MAX_TITLE_CHARS = 100
+MAX_SECTION_TYPE_CHARS = 40
+
+# Seniority and level words do not change which suggestions apply
+_TITLE_NOISE = re.compile(r"\b(?:senior|sr|junior|jr|lead|principal|staff|head|chief|associate|entry level|i{1,3}|iv|[1-5])\b")
+_NON_WORD = re.compile(r"[^a-z0-9+#]+")
+
+def normalize_title(job_title: Optional[str]) -> str:
+    """Catalog key for a job title: lowercase words without punctuation or seniority"""
+    title = _NON_WORD.sub(" ", (job_title or "")[:MAX_TITLE_CHARS].lower())
+    title = " ".join(_TITLE_NOISE.sub(" ", title).split()[:MAX_TITLE_WORDS])
+    return title or "general"
+
+def normalize_section_type(section_type: str) -> str:
+    """Catalog key for a section type, so free-form custom types stay short and stable"""
+    return "_".join(_NON_WORD.sub(" ", section_type[:MAX_SECTION_TYPE_CHARS].lower()).split()) or "custom"
+
+class SuggestionCatalog:
+    """Materialized (section type, job title) suggestions held in memory and persisted in MongoDB
+
+    Common titles are seeded in the background at startup and refreshed when they age
+    out; requests are answered from memory, matching job titles fuzzily, and only fall
+    back to a live LLM call for titles the catalog has never seen. Those generated
+    entries are bounded by an LRU, charged to the caller's suggestion quota, and only
+    refreshed when they were hit often enough; otherwise they expire.
+    """
+
+    def __init__(
+        self,
+        ai_service,
+        quota_service=None,
+        refresh_interval: int = None,
+        max_age_seconds: int = None,
+        max_generated: int = None,
+        refresh_min_hits: int = None,
+        match_cutoff: float = 0.85,
+        collection_name: str = "ai_suggestion_catalog"
+    ):
+        self.ai_service = ai_service
+        self.quota_service = quota_service
+        self.refresh_interval = refresh_interval or int(os.getenv("AI_SUGGESTION_REFRESH_INTERVAL", "3600"))
+        self.max_age_seconds = max_age_seconds or int(os.getenv("AI_SUGGESTION_MAX_AGE_SECONDS", "604800"))
+        self.max_generated = max_generated or int(os.getenv("AI_SUGGESTION_MAX_GENERATED", "2000"))
+        self.refresh_min_hits = refresh_min_hits or int(os.getenv("AI_SUGGESTION_REFRESH_MIN_HITS", "5"))
+        self.match_cutoff = match_cutoff
+        self.collection_name = collection_name
+
+        warm_titles = os.getenv("AI_SUGGESTION_WARM_TITLES")
+        self.warm_titles = [title.strip() for title in warm_titles.split(",")] if warm_titles else COMMON_JOB_TITLES
+        self._warm_keys = {
+            (section_type, normalize_title(title)): title
+            for title in self.warm_titles for section_type in CATALOG_SECTION_TYPES
+        }
+
+        # (section type, title key) -> catalog entry
+        self._entries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        # Keys of entries generated for user requests, least recently used first
+        self._generated: "OrderedDict[Tuple[str, str], None]" = OrderedDict()
+        self._titles: Dict[str, List[str]] = {}
+        # Fuzzy resolutions of unseen title keys, so difflib runs once per distinct title
+        self._aliases: Dict[Tuple[str, str], Optional[str]] = {}
+        self._collection = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.exact_hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    async def start(self):
+        """Load the persisted catalog and start warming and refreshing it in the background"""
+        try:
+            collection = await self._get_collection()
+            await collection.create_index([("section_type", 1), ("title_key", 1)], unique=True)
+            # Oldest first, so the most recently generated entries survive the LRU bound
+            evicted = []
+            async for document in collection.find({}, {"_id": 0}).sort("updated_at", 1):
+                evicted.extend(self._remember(document))
+            await self._delete(evicted)
+            logger.info(f"Suggestion catalog loaded {len(self._entries)} entries")
+        except Exception as e:
+            logger.error(f"Suggestion catalog load failed: {str(e)}")
+
+        self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def lookup(self, section_type: str, job_title: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Catalog entry for the closest known title, or None"""
+        title_key = normalize_title(job_title)
+        entry = self._entries.get((section_type, title_key))
+        if entry is not None:
+            self.exact_hits += 1
+            return self._hit(entry)
+
+        alias_key = (section_type, title_key)
+        if alias_key not in self._aliases:
+            matches = difflib.get_close_matches(title_key, self._titles.get(section_type, []), n=1, cutoff=self.match_cutoff)
+            if len(self._aliases) > 10000:
+                self._aliases.clear()
+            self._aliases[alias_key] = matches[0] if matches else None
+
+        match = self._aliases[alias_key]
+        if match is not None and (section_type, match) in self._entries:
+            self.fuzzy_hits += 1
+            return self._hit(self._entries[(section_type, match)])
+
+        self.misses += 1
+        return None
+
+    async def get(self, section_type: str, job_title: Optional[str], tier: str = "free", user_id: Optional[str] = None) -> Dict[str, Any]:
+        """Suggestions from the catalog, generating and storing them on a miss
+
+        A miss, including any section type outside CATALOG_SECTION_TYPES the catalog has
+        not generated yet, spends one unit of the user's suggestion quota
+        (QuotaExceededError when it is used up).
+        """
+        section_type = normalize_section_type(section_type)
+        entry = self.lookup(section_type, job_title)
+        if entry is None:
+            if self.quota_service is not None and user_id:
+                async with self.quota_service.reservation(user_id, tier, "suggestion"):
+                    entry = await self.generate(section_type, job_title or "General", tier=tier)
+            else:
+                entry = await self.generate(section_type, job_title or "General", tier=tier)
+        return {"suggestions": entry["suggestions"], "sample_content": entry["sample_content"]}
+
+    async def generate(self, section_type: str, job_title: str, tier: str = "free") -> Dict[str, Any]:
+        """Ask the LLM for a title's suggestions and store them in the catalog"""
+        job_title = job_title[:MAX_TITLE_CHARS]
+        result = await self.ai_service.optimize_content(AIContentRequest(
+            section_type=section_type,
+            job_title=job_title,
+            existing_content="",
+            target_keywords=[],
+            tone="professional"
+        ), tier=tier)
+
+        entry = {
+            "section_type": section_type,
+            "title_key": normalize_title(job_title),
+            "job_title": job_title,
+            "suggestions": result.suggestions,
+            "sample_content": result.optimized_content,
+            "updated_at": datetime.utcnow(),
+            "hits": 0
+        }
+        evicted = self._remember(entry)
+
+        try:
+            collection = await self._get_collection()
+            await collection.update_one(
+                {"section_type": section_type, "title_key": entry["title_key"]},
+                {"$set": entry},
+                upsert=True
+            )
+        except Exception as e:
+            logger.warning(f"Suggestion catalog write failed: {str(e)}")
+        await self._delete(evicted)
+
+        return entry
+
+    async def refresh(self):
+        """Generate missing seeded entries and regenerate those older than the maximum age
+
+        Stale generated entries are regenerated only when they were hit at least
+        refresh_min_hits times since they were last generated; the rest expire.
+        """
+        stale_before = datetime.utcnow() - timedelta(seconds=self.max_age_seconds)
+        pending = dict(self._warm_keys)
+        expired = []
+        for key in list(self._generated):
+            entry = self._entries[key]
+            if entry["updated_at"] > stale_before:
+                continue
+            if entry.get("hits", 0) >= self.refresh_min_hits:
+                pending[key] = entry["job_title"]
+            else:
+                expired.append(key)
+                self._forget(key)
+        await self._delete(expired)
+
+        for (section_type, title_key), job_title in pending.items():
+            entry = self._entries.get((section_type, title_key))
+            if entry is not None and entry["updated_at"] > stale_before:
+                continue
+            try:
+                await self.generate(section_type, job_title)
+            except Exception as e:
+                logger.warning(f"Suggestion catalog refresh failed for {section_type}/{job_title}: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.exact_hits + self.fuzzy_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "exact_hits": self.exact_hits,
+            "fuzzy_hits": self.fuzzy_hits,
+            "misses": self.misses,
+            "generated_entries": len(self._generated),
+            "evicted": self.evicted,
+            "hit_rate": round((self.exact_hits + self.fuzzy_hits) / lookups, 4) if lookups else 0.0
+        }
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Suggestion catalog refresh failed: {str(e)}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def _hit(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        key = (entry["section_type"], entry["title_key"])
+        if key in self._generated:
+            self._generated.move_to_end(key)
+        entry["hits"] = entry.get("hits", 0) + 1
+        return entry
+
+    def _remember(self, entry: Dict[str, Any]) -> List[Tuple[str, str]]:
+        """Add an entry, returning the keys of generated entries evicted to make room"""
+        key = (entry["section_type"], entry["title_key"])
+        if key not in self._entries:
+            self._titles.setdefault(entry["section_type"], []).append(entry["title_key"])
+            # A new title may now be the closest match for titles resolved earlier
+            self._aliases.clear()
+        self._entries[key] = entry
+
+        evicted = []
+        if key not in self._warm_keys:
+            self._generated[key] = None
+            self._generated.move_to_end(key)
+            while len(self._generated) > self.max_generated:
+                oldest = next(iter(self._generated))
+                self._forget(oldest)
+                evicted.append(oldest)
+                self.evicted += 1
+        return evicted
+
+    def _forget(self, key: Tuple[str, str]):
+        self._entries.pop(key, None)
+        self._generated.pop(key, None)
+        titles = self._titles.get(key[0])
+        if titles is not None and key[1] in titles:
+            titles.remove(key[1])
+        self._aliases.clear()
+
+    async def _delete(self, keys: List[Tuple[str, str]]):
+        """Remove evicted or expired entries from MongoDB"""
+        if not keys:
+            return
+        try:
+            collection = await self._get_collection()
+            await collection.delete_many({"$or": [
+                {"section_type": section_type, "title_key": title_key} for section_type, title_key in keys
+            ]})
+        except Exception as e:
+            logger.warning(f"Suggestion catalog delete failed: {str(e)}")
+
+    async def _get_collection(self):
+        if self._collection is None:
+            from database import get_database
+
+            database = await get_database()
+            self._collection = database[self.collection_name]
+        return self._collection
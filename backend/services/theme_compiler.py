@@ -0,0 +1,182 @@
+from reportlab.lib import colors
+from reportlab.lib.styles import ParagraphStyle, StyleSheet1
+from jinja2 import Environment
+from markupsafe import Markup
+from typing import Any, Dict, List, Optional
+import logging
+import re
+
+from models.cv import CVTemplate
+
+logger = logging.getLogger(__name__)
+
+# Styles of CVs whose template is unknown, and the base every template's styles are merged over
+DEFAULT_STYLES = {
+    "font_family": "Arial, sans-serif",
+    "font_size": "11pt",
+    "colors": {
+        "primary": "#2c3e50",
+        "secondary": "#2c3e50",
+        "accent": "#3498db",
+        "text": "#333333"
+    },
+    "spacing": "normal",
+    "margins": "standard"
+}
+
+# Multiplier for line height and vertical gaps
+SPACING_SCALE = {"compact": 0.8, "normal": 1.0, "wide": 1.25}
+
+# Page margin in points
+MARGIN_POINTS = {"narrow": 36, "standard": 72, "wide": 90}
+
+HEX_COLOR = re.compile(r"^#([0-9a-fA-F]{3}|[0-9a-fA-F]{6})$")
+FONT_FAMILY = re.compile(r"^[\w ,'\"-]+$")
+
+class CompiledTheme:
+    """A template's styles compiled for every export format
+
+    stylesheet holds the ReportLab paragraph styles (Title, Section, Body) and css and
+    word_css the style sheets of the HTML and Word exports. Themes are built once and
+    shared by every export, so nothing here may be mutated while rendering.
+    """
+
+    def __init__(self, template_id: Optional[str], stylesheet: StyleSheet1, css: Markup, word_css: Markup,
+                 secondary_color: str, margin: float, item_gap: float, section_gap: float):
+        self.template_id = template_id
+        self.stylesheet = stylesheet
+        self.css = css
+        self.word_css = word_css
+        self.secondary_color = secondary_color
+        self.margin = margin
+        self.item_gap = item_gap
+        self.section_gap = section_gap
+
+class ThemeCompiler:
+    """Compiles CVTemplate styles into CompiledThemes, cached by template id
+
+    Every template is compiled when the compiler is created, i.e. once per process at
+    startup; CVs with an unknown template get the default theme.
+    """
+
+    def __init__(self, environment: Environment, templates: List[CVTemplate] = None):
+        self.environment = environment
+        if templates is None:
+            from services.template_service import TemplateService
+
+            templates = TemplateService().get_all_templates()
+
+        self.default_theme = self.compile(None, {})
+        self._themes: Dict[str, CompiledTheme] = {}
+        for template in templates:
+            try:
+                self._themes[template.id] = self.compile(template.id, template.styles)
+            except Exception as e:
+                logger.error(f"Theme compilation failed for template {template.id}: {str(e)}")
+
+        self.fallbacks = 0
+
+    def get(self, template_id: Optional[str]) -> CompiledTheme:
+        """Compiled theme of a template, or the default theme"""
+        theme = self._themes.get(template_id)
+        if theme is None:
+            self.fallbacks += 1
+            return self.default_theme
+        return theme
+
+    def compile(self, template_id: Optional[str], styles: Dict[str, Any]) -> CompiledTheme:
+        """Compile a template's styles dict; invalid values fall back to the defaults"""
+        palette = dict(DEFAULT_STYLES["colors"])
+        for name, value in (styles.get("colors") or {}).items():
+            if name in palette and isinstance(value, str) and HEX_COLOR.match(value):
+                palette[name] = _expand_hex(value)
+
+        font_family = styles.get("font_family")
+        if not isinstance(font_family, str) or not FONT_FAMILY.match(font_family):
+            font_family = DEFAULT_STYLES["font_family"]
+        font_size = _points(styles.get("font_size"), _points(DEFAULT_STYLES["font_size"], 11.0))
+        scale = SPACING_SCALE.get(styles.get("spacing"), 1.0)
+        margin = MARGIN_POINTS.get(styles.get("margins"), MARGIN_POINTS["standard"])
+
+        values = {
+            "font_family": font_family,
+            "font_size": font_size,
+            "colors": palette,
+            "line_height": round(1.6 * scale, 2),
+            "padding": round(margin * 20 / 72),
+            "item_gap": round(15 * scale),
+            "section_gap": round(25 * scale)
+        }
+        css = Markup(self.environment.get_template("theme.css").render(**values))
+        word_css = Markup(self.environment.get_template("theme_word.css").render(**values))
+
+        regular, bold = _pdf_fonts(font_family)
+        stylesheet = StyleSheet1()
+        stylesheet.add(ParagraphStyle(
+            "Title",
+            fontName=bold,
+            fontSize=round(font_size * 2.2),
+            leading=round(font_size * 2.6),
+            spaceAfter=30 * scale,
+            textColor=colors.HexColor(palette["primary"])
+        ))
+        stylesheet.add(ParagraphStyle(
+            "Section",
+            fontName=bold,
+            fontSize=round(font_size * 1.45),
+            leading=round(font_size * 1.8),
+            spaceBefore=12 * scale,
+            spaceAfter=12 * scale,
+            textColor=colors.HexColor(palette["accent"])
+        ))
+        stylesheet.add(ParagraphStyle(
+            "Body",
+            fontName=regular,
+            fontSize=font_size,
+            leading=font_size * (1.15 + 0.1 * scale),
+            textColor=colors.HexColor(palette["text"])
+        ))
+
+        return CompiledTheme(
+            template_id=template_id,
+            stylesheet=stylesheet,
+            css=css,
+            word_css=word_css,
+            secondary_color=palette["secondary"],
+            margin=margin,
+            item_gap=6 * scale,
+            section_gap=12 * scale
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "themes": len(self._themes),
+            "fallbacks": self.fallbacks
+        }
+
+def _expand_hex(value: str) -> str:
+    # #abc -> #aabbcc, so the CSS can append an alpha channel
+    if len(value) == 4:
+        value = "#" + "".join(character * 2 for character in value[1:])
+    return value.lower()
+
+def _points(value: Any, default: float) -> float:
+    """Font size in points from values like 11, '11pt' or '14px'"""
+    if isinstance(value, (int, float)):
+        size = float(value)
+    else:
+        match = re.match(r"^\s*(\d+(?:\.\d+)?)\s*(pt|px)?\s*$", str(value or ""))
+        if not match:
+            return default
+        size = float(match.group(1)) * (0.75 if match.group(2) == "px" else 1)
+    return size if 6 <= size <= 24 else default
+
+def _pdf_fonts(font_family: str):
+    """Closest built-in ReportLab fonts (regular, bold) for a CSS font stack"""
+    family = font_family.lower()
+    if "mono" in family or "courier" in family:
+        return "Courier", "Courier-Bold"
+    # A stack whose generic fallback is serif, e.g. "Georgia, serif"
+    if re.search(r"(?<!sans-)serif|times|georgia|garamond", family):
+        return "Times-Roman", "Times-Bold"
+    return "Helvetica", "Helvetica-Bold"
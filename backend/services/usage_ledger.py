@@ -0,0 +1,234 @@
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterable, List, Optional, Sequence
+from pymongo.errors import BulkWriteError
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# User the current request's LLM calls are attributed to
+_usage_user: ContextVar[Optional[str]] = ContextVar("usage_user", default=None)
+
+USAGE_GROUP_FIELDS = {"user": "user_id", "tier": "tier", "endpoint": "endpoint", "model": "model"}
+
+# Upper bounds of the latency histogram the summary percentiles are interpolated from;
+# slower calls are reported at the last bound
+LATENCY_BUCKETS_MS = (
+    50, 100, 150, 200, 300, 400, 500, 750, 1000, 1500, 2000, 3000, 4000, 5000,
+    7500, 10000, 15000, 20000, 30000, 45000, 60000, 90000, 120000
+)
+
+def bind_usage_user(user_id: Optional[str]):
+    """Attribute LLM calls made by the current request (and tasks it starts) to a user"""
+    _usage_user.set(user_id)
+
+def latency_quantile(cumulative: Sequence[int], total: int, q: float) -> Optional[float]:
+    """Quantile interpolated linearly within the LATENCY_BUCKETS_MS bucket it falls in"""
+    if total <= 0:
+        return None
+
+    target = q * total
+    lower_bound, lower_count = 0, 0
+    for bound, count in zip(LATENCY_BUCKETS_MS, cumulative):
+        if count >= target:
+            return lower_bound + (bound - lower_bound) * (target - lower_count) / (count - lower_count)
+        lower_bound, lower_count = bound, count
+    return float(LATENCY_BUCKETS_MS[-1])
+
+class UsageLedger:
+    """Buffered record of every LLM call, written to MongoDB in batches by a background task
+
+    record() only appends to an in-memory buffer, so requests never wait on the write.
+    The buffer is flushed every flush_interval seconds or as soon as a batch fills up;
+    when MongoDB falls behind the oldest unwritten records are dropped and counted.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = None,
+        flush_interval: float = None,
+        max_buffer: int = None,
+        collection_name: str = "ai_usage"
+    ):
+        self.batch_size = batch_size or int(os.getenv("AI_USAGE_BATCH_SIZE", "200"))
+        self.flush_interval = flush_interval or float(os.getenv("AI_USAGE_FLUSH_INTERVAL", "2"))
+        self.max_buffer = max_buffer or int(os.getenv("AI_USAGE_MAX_BUFFER", "20000"))
+        self.collection_name = collection_name
+
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        self._batch_ready = asyncio.Event()
+        self._collection = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.write_errors = 0
+
+    async def start(self):
+        """Create the query indexes and start the background writer"""
+        try:
+            collection = await self._get_collection()
+            await collection.create_index([("user_id", 1), ("created_at", -1)])
+            await collection.create_index([("tier", 1), ("created_at", -1)])
+            await collection.create_index([("created_at", -1)])
+        except Exception as e:
+            logger.error(f"Usage ledger index creation failed: {str(e)}")
+
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Stop the writer after flushing whatever is still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        while self._buffer:
+            if not await self.flush():
+                break
+
+    def record(
+        self,
+        endpoint: str,
+        model: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        latency_ms: float,
+        source: str,
+        outcome: str,
+        tier: str = "free"
+    ):
+        """Buffer one call; source is upstream, cache or coalesced, outcome ok, invalid, timeout, overloaded or error"""
+        self._buffer.append({
+            "user_id": _usage_user.get(),
+            "tier": tier,
+            "endpoint": endpoint,
+            "model": model,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "latency_ms": round(latency_ms, 1),
+            "source": source,
+            "cache_hit": source == "cache",
+            "outcome": outcome,
+            "created_at": datetime.utcnow()
+        })
+        self.recorded += 1
+
+        while len(self._buffer) > self.max_buffer:
+            self._buffer.popleft()
+            self.dropped += 1
+        if len(self._buffer) >= self.batch_size:
+            self._batch_ready.set()
+
+    async def flush(self) -> bool:
+        """Write one batch from the buffer; False when the write failed"""
+        batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+        if not batch:
+            return True
+
+        try:
+            collection = await self._get_collection()
+            await collection.insert_many(batch, ordered=False)
+            self.written += len(batch)
+            return True
+        except BulkWriteError as e:
+            # insert_many assigns _id in place, so records retried after a partly failed
+            # batch come back as duplicate key errors and are already stored
+            if all(error.get("code") == 11000 for error in e.details.get("writeErrors", [])):
+                self.written += len(batch)
+                return True
+            error = e
+        except Exception as e:
+            error = e
+
+        self.write_errors += 1
+        # Put the batch back for the next attempt; the buffer bound still applies
+        self._buffer.extendleft(reversed(batch))
+        while len(self._buffer) > self.max_buffer:
+            self._buffer.popleft()
+            self.dropped += 1
+        logger.error(f"Usage ledger write failed: {str(error)}")
+        return False
+
+    async def summary(
+        self,
+        group_by: str,
+        since: datetime,
+        user_id: Optional[str] = None,
+        endpoints: Optional[Iterable[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Calls, upstream tokens, cache hit rate and p50/p95 latency per user, tier, endpoint or model"""
+        match: Dict[str, Any] = {"created_at": {"$gte": since}}
+        if user_id is not None:
+            match["user_id"] = user_id
+        if endpoints is not None:
+            match["endpoint"] = {"$in": list(endpoints)}
+
+        upstream = {"$eq": ["$source", "upstream"]}
+        collection = await self._get_collection()
+        cursor = collection.aggregate([
+            {"$match": match},
+            {"$group": {
+                "_id": f"${USAGE_GROUP_FIELDS[group_by]}",
+                "calls": {"$sum": 1},
+                "upstream_calls": {"$sum": {"$cond": [upstream, 1, 0]}},
+                "cache_hits": {"$sum": {"$cond": ["$cache_hit", 1, 0]}},
+                "errors": {"$sum": {"$cond": [{"$in": ["$outcome", ["timeout", "overloaded", "error"]]}, 1, 0]}},
+                # Only upstream calls consume provider tokens
+                "prompt_tokens": {"$sum": {"$cond": [upstream, "$prompt_tokens", 0]}},
+                "completion_tokens": {"$sum": {"$cond": [upstream, "$completion_tokens", 0]}},
+                # Cumulative latency histogram: a fixed number of counters however many calls match
+                **{
+                    f"latency_le_{index}": {"$sum": {"$cond": [{"$and": [upstream, {"$lte": ["$latency_ms", bound]}]}, 1, 0]}}
+                    for index, bound in enumerate(LATENCY_BUCKETS_MS)
+                }
+            }},
+            {"$sort": {"prompt_tokens": -1}}
+        ])
+
+        results = []
+        async for group in cursor:
+            cumulative = [group.pop(f"latency_le_{index}") for index in range(len(LATENCY_BUCKETS_MS))]
+            p50 = latency_quantile(cumulative, group["upstream_calls"], 0.5)
+            p95 = latency_quantile(cumulative, group["upstream_calls"], 0.95)
+            results.append({
+                group_by: group.pop("_id"),
+                **group,
+                "cache_hit_rate": round(group["cache_hits"] / group["calls"], 4),
+                "p50_latency_ms": round(p50, 1) if p50 is not None else None,
+                "p95_latency_ms": round(p95, 1) if p95 is not None else None
+            })
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "buffered": len(self._buffer),
+            "recorded": self.recorded,
+            "written": self.written,
+            "dropped": self.dropped,
+            "write_errors": self.write_errors
+        }
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._batch_ready.clear()
+
+            while self._buffer:
+                if not await self.flush():
+                    # Back off until the next interval rather than retrying in a tight loop
+                    break
+
+    async def _get_collection(self):
+        if self._collection is None:
+            from database import get_database
+
+            database = await get_database()
+            self._collection = database[self.collection_name]
+        return self._collection
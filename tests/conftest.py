@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+
+# Backend modules import each other as top-level packages (services, models, ...)
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+@pytest.fixture
+def mongo(monkeypatch):
+    """In-memory MongoDB returned by database.get_database for the duration of a test"""
+    from mongomock_motor import AsyncMongoMockClient
+    import database
+
+    test_database = AsyncMongoMockClient()["craftmycv_test"]
+
+    async def get_database():
+        return test_database
+
+    monkeypatch.setattr(database, "get_database", get_database)
+    return test_database
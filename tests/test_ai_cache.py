@@ -0,0 +1,67 @@
+import asyncio
+
+from models.ai import AIContentRequest
+from services.ai_cache import AICache
+from services.ai_service import AIService
+from services.llm_backends import StubLLMBackend
+
+def test_key_ignores_insignificant_whitespace():
+    assert AICache.make_key("m", "system", "Improve:\n  this   text ") == AICache.make_key("m", "system", "Improve:\nthis text")
+    assert AICache.make_key("m", "system", "prompt") != AICache.make_key("other", "system", "prompt")
+
+def test_memory_miss_then_hit():
+    async def scenario():
+        cache = AICache(persistent=False)
+        key = AICache.make_key("m", "system", "prompt")
+
+        assert await cache.get(key) is None
+        await cache.set(key, "response")
+        assert await cache.get(key) == "response"
+        return cache.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["misses"] == 1
+    assert stats["memory_hits"] == 1
+    assert stats["hit_rate"] == 0.5
+
+def test_lru_evicts_least_recently_used():
+    async def scenario():
+        cache = AICache(max_entries=2, persistent=False)
+        await cache.set("a", "1")
+        await cache.set("b", "2")
+        await cache.get("a")
+        await cache.set("c", "3")
+        return [await cache.get(key) for key in ("a", "b", "c")]
+
+    assert asyncio.run(scenario()) == ["1", None, "3"]
+
+def test_persistent_hit_after_restart(mongo):
+    async def scenario():
+        key = AICache.make_key("m", "system", "prompt")
+        await AICache().set(key, "response")
+
+        # A new process starts with an empty memory tier
+        restarted = AICache()
+        first = await restarted.get(key)
+        second = await restarted.get(key)
+        return first, second, restarted.stats()
+
+    first, second, stats = asyncio.run(scenario())
+    assert first == second == "response"
+    assert stats["persistent_hits"] == 1
+    assert stats["memory_hits"] == 1
+
+def test_repeated_optimization_is_answered_from_cache(mongo):
+    async def scenario():
+        backend = StubLLMBackend()
+        service = AIService(backend=backend, cache=AICache(persistent=False))
+        request = AIContentRequest(section_type="summary", job_title="Engineer", existing_content="I build services.")
+
+        first = await service.optimize_content(request)
+        second = await service.optimize_content(request)
+        return backend.calls, first, second, service.cache.stats()
+
+    calls, first, second, stats = asyncio.run(scenario())
+    assert calls == 1
+    assert first == second
+    assert stats["memory_hits"] == 1
@@ -0,0 +1,85 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from services.ai_job_queue import AIJobQueue
+from services.quota_service import QuotaService
+
+PAYLOAD = {"section_type": "summary", "job_title": "Engineer", "existing_content": "I build services."}
+
+class FailingAIService:
+    async def optimize_content(self, request, tier, user_id):
+        raise RuntimeError("LLM call failed")
+
+async def _make_runnable(queue: AIJobQueue, job_id: str):
+    """Skip the retry backoff"""
+    collection = await queue._get_collection()
+    await collection.update_one({"id": job_id}, {"$set": {"available_at": datetime.utcnow() - timedelta(seconds=1)}})
+
+def test_failed_job_is_retried_then_failed_and_refunded(mongo):
+    async def scenario():
+        quotas = QuotaService()
+        queue = AIJobQueue(FailingAIService(), quotas, max_attempts=2)
+        reservation = await quotas.reserve("user", "free")
+        job = await queue.submit("user", "free", "optimize_content", PAYLOAD, reservation=reservation)
+
+        states = []
+        for _ in range(2):
+            await _make_runnable(queue, job["id"])
+            claimed = await queue._claim("worker:0")
+            await queue._run(claimed, "worker:0")
+            states.append(await queue.get(job["id"], "user"))
+
+        return states, await queue._claim("worker:0"), await quotas.usage("user", "free")
+
+    (retried, failed), claimed, usage = asyncio.run(scenario())
+    assert retried["status"] == "queued"
+    assert retried["attempts"] == 1
+    assert retried["available_at"] > datetime.utcnow()
+    assert failed["status"] == "failed"
+    assert failed["attempts"] == 2
+    assert failed["error"] == "LLM call failed"
+    assert claimed is None
+    assert usage["quotas"]["optimization"]["used"] == 0
+
+def test_job_whose_worker_keeps_dying_is_dead_lettered(mongo):
+    async def scenario():
+        quotas = QuotaService()
+        queue = AIJobQueue(FailingAIService(), quotas, max_attempts=2)
+        reservation = await quotas.reserve("user", "free")
+        job = await queue.submit("user", "free", "optimize_content", PAYLOAD, reservation=reservation)
+
+        # Simulate workers that crash mid-job: claimed twice, lease never renewed
+        collection = await queue._get_collection()
+        for attempt in range(2):
+            assert await queue._claim(f"worker:{attempt}") is not None
+            await collection.update_one(
+                {"id": job["id"]}, {"$set": {"lease_expires_at": datetime.utcnow() - timedelta(seconds=1)}}
+            )
+
+        claimed = await queue._claim("worker:2")
+        await queue._dead_letter()
+        return claimed, await queue.get(job["id"], "user"), await quotas.usage("user", "free")
+
+    claimed, job, usage = asyncio.run(scenario())
+    assert claimed is None
+    assert job["status"] == "failed"
+    assert job["dead_lettered"] is True
+    assert job["attempts"] == 2
+    assert usage["quotas"]["optimization"]["used"] == 0
+
+def test_every_waiter_sees_the_job_finish(mongo):
+    async def scenario():
+        queue = AIJobQueue(FailingAIService(), max_attempts=1)
+        job = await queue.submit("user", "free", "optimize_content", PAYLOAD)
+        claimed = await queue._claim("worker:0")
+
+        waiters = [asyncio.ensure_future(queue.wait_for_update(job["id"], timeout=5)) for _ in range(3)]
+        await asyncio.sleep(0)
+        started = asyncio.get_running_loop().time()
+        await queue._run(claimed, "worker:0")
+        await asyncio.gather(*waiters)
+        return asyncio.get_running_loop().time() - started, queue._updates
+
+    elapsed, waiters = asyncio.run(scenario())
+    assert elapsed < 1
+    assert waiters == {}
@@ -0,0 +1,18 @@
+from models.cv import CVData, CVSection
+from services.ai_cache import AICache
+from services.ai_service import AIService
+from services.llm_backends import StubLLMBackend
+
+def test_contact_details_are_not_optimized():
+    service = AIService(backend=StubLLMBackend(), cache=AICache(persistent=False))
+    cv = CVData(user_id="user", title="CV", template_id="modern", sections=[
+        CVSection(type="personal_info", title="Contact", order=0, content={
+            "full_name": "Ada Lovelace", "email": "ada@example.com", "phone": "+44 20 7946 0000"
+        }),
+        CVSection(type="experience", title="Experience", order=2, content={"description": "Led a platform team."}),
+        CVSection(type="summary", title="Summary", order=1, content={"text": "Engineer building services."}),
+        CVSection(type="skills", title="Skills", order=3, content={"text": "Python"}, is_visible=False)
+    ])
+
+    sections = service.optimizable_sections(cv)
+    assert [(index, section.type) for index, section, _ in sections] == [(2, "summary"), (1, "experience")]
@@ -0,0 +1,58 @@
+from models.ai import ATSAnalysisRequest
+from services.ats_scorer import LocalATSScorer, split_sections
+
+CV = """Ada Lovelace
+ada@example.com | +44 20 7946 0000 | linkedin.com/in/ada
+
+Summary
+Backend engineer building reliable Python services for payments and logistics teams.
+
+Experience
+Senior Engineer, Acme (2019 - present)
+Led migration of 12 services to Kubernetes, reducing deploy time by 60%
+Built a Python ingestion pipeline processing 3M events a day
+
+Skills
+Python, Docker, PostgreSQL, AWS
+
+Education
+BSc Computer Science, 2015
+"""
+
+JOB = """We are looking for a backend engineer with Python, Kubernetes and Terraform.
+Experience with PostgreSQL required. Terraform infrastructure ownership. Strong Python skills."""
+
+scorer = LocalATSScorer()
+
+def test_sections_are_split_on_headings():
+    sections = split_sections(CV)
+    assert set(sections) == {"summary", "experience", "skills", "education"}
+    assert sections["skills"] == "Python, Docker, PostgreSQL, AWS"
+
+def test_skills_are_matched_alias_aware_and_missing_ones_reported():
+    keywords, missing, density = scorer.keyword_statistics(CV.replace("Kubernetes", "k8s"), JOB)
+    assert {"Python", "Kubernetes", "Terraform", "PostgreSQL"} <= set(keywords)
+    assert "Terraform" in missing
+    assert "Kubernetes" not in missing
+    assert density["Python"] > 0
+
+def test_filler_words_are_not_keywords():
+    keywords = scorer.extract_keywords("We are looking for someone who can help build and maintain great things. Strong ownership.")
+    assert not {"looking", "someone", "help", "build", "maintain", "great", "strong"} & set(keywords)
+    assert "ownership" in keywords
+
+def test_well_formed_cv_scores_higher_than_a_bare_one():
+    full = scorer.analyze(ATSAnalysisRequest(cv_content=CV, job_description=JOB))
+    bare = scorer.analyze(ATSAnalysisRequest(cv_content="Worked on some things.", job_description=JOB))
+
+    assert full.overall_score > bare.overall_score
+    assert full.section_scores["contact_info"] == 100
+    assert full.section_scores["education"] == 100
+    assert bare.section_scores["experience"] == 20
+    assert any("Add a dedicated skills section" in suggestion for suggestion in bare.suggestions)
+
+def test_no_job_description_scores_structure_only():
+    result = scorer.analyze(ATSAnalysisRequest(cv_content=CV))
+    assert result.missing_keywords == []
+    assert result.keyword_density == {}
+    assert 0 <= result.overall_score <= 100
@@ -0,0 +1,56 @@
+from datetime import datetime
+
+from models.cv import CVData, CVSection
+from models.document import ContactBlock, EntryBlock, TagsBlock, TextBlock
+from services.document_builder import DocumentBuilder
+from services.export_service import ExportService
+from services.render_cache import RenderCache
+from services.render_pool import RenderPool
+
+def _cv(**kwargs):
+    return CVData(user_id="user", title="Ada's CV", template_id="modern", sections=[
+        CVSection(type="skills", title="Skills", order=3, content={"skills": ["Python", "", None, "SQL"]}),
+        CVSection(type="personal_info", title="Contact", order=0, content={
+            "full_name": "Ada <Lovelace>", "email": "ada@example.com", "phone": "", "summary": "Engineer"
+        }),
+        CVSection(type="experience", title="Experience", order=1, content={"experiences": [
+            {"title": "Engineer", "company": "Acme", "start_date": "2019", "description": "Built things"}
+        ]}),
+        CVSection(type="hobbies", title="Hobbies", order=2, content={"text": "Chess"}),
+        CVSection(type="education", title="Education", order=4, content={"education": []}, is_visible=False)
+    ], **kwargs)
+
+def test_visible_sections_become_typed_blocks_in_order():
+    document = DocumentBuilder().build(_cv())
+
+    assert [section.type for section in document.sections] == ["personal_info", "experience", "hobbies", "skills"]
+    contact, experience, hobbies, skills = (section.blocks for section in document.sections)
+    assert contact == [ContactBlock(items=["Ada <Lovelace>", "ada@example.com"], summary="Engineer")]
+    assert experience == [EntryBlock(
+        variant="experience", title="Engineer", organization="Acme", dates="2019 - Present", description="Built things"
+    )]
+    assert hobbies == [TextBlock(text="Chess")]
+    assert skills == [TagsBlock(items=["Python", "SQL"])]
+
+def test_documents_are_cached_per_cv_version():
+    builder = DocumentBuilder(cache_size=1)
+    cv = _cv(updated_at=datetime(2024, 1, 1))
+
+    first = builder.build(cv)
+    assert builder.build(cv) is first
+    assert builder.build(cv.copy(update={"updated_at": datetime(2024, 1, 2)})) is not first
+    # The cache holds one document, so the first version was evicted
+    builder.build(cv)
+    assert builder.stats() == {"cached_documents": 1, "hits": 1, "misses": 3, "hit_rate": 0.25}
+
+def test_every_format_renders_from_the_same_document(tmp_path):
+    service = ExportService(render_pool=RenderPool(max_workers=0), render_cache=RenderCache(directory=str(tmp_path)))
+    document = service.documents.build(_cv())
+
+    html = service.render_html(document, "modern")
+    word = service.render_word_html(document, "modern")
+    for output in (html, word):
+        # Blocks hold plain text; escaping is the renderer's job
+        assert "Ada &lt;Lovelace&gt;" in output
+        assert "Chess" in output
+    assert service.render_pdf(document, "modern").startswith(b"%PDF")
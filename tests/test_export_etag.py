@@ -0,0 +1,76 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from auth.auth import get_current_user_dependency
+from models.cv import CVData, CVSection
+from models.user import User
+from services.export_service import ExportService
+from services.render_cache import RenderCache
+from services.render_pool import RenderPool
+import routes.export_routes as export_routes
+
+@pytest.fixture
+def client(mongo, monkeypatch, tmp_path):
+    # Inline rendering keeps the test in one process
+    service = ExportService(render_pool=RenderPool(max_workers=0), render_cache=RenderCache(directory=str(tmp_path)))
+    monkeypatch.setattr(export_routes, "export_service", service)
+
+    async def get_database():
+        return mongo
+
+    app = FastAPI()
+    app.include_router(export_routes.router)
+    app.dependency_overrides[get_current_user_dependency] = lambda: User(id="user", email="user@example.com", full_name="User")
+    app.dependency_overrides[export_routes.get_database] = get_database
+
+    cv = CVData(id="cv", user_id="user", title="My CV", template_id="modern-professional", sections=[
+        CVSection(type="personal_info", title="Contact", order=0, content={"full_name": "Alex Example", "summary": "Engineer"})
+    ])
+    asyncio.run(mongo.cvs.insert_one(cv.dict()))
+    return TestClient(app)
+
+def test_unchanged_cv_revalidates_with_304(client):
+    first = client.get("/export/cv/html")
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == "private, no-cache"
+    etag = first.headers["etag"]
+
+    revalidated = client.get("/export/cv/html", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert revalidated.headers["etag"] == etag
+
+    # Weak and listed validators match too
+    assert client.get("/export/cv/html", headers={"If-None-Match": f'"other", W/{etag}'}).status_code == 304
+
+def test_cached_export_is_served_without_rendering(client):
+    first = client.get("/export/cv/html")
+    second = client.get("/export/cv/html")
+
+    assert second.content == first.content
+    assert export_routes.export_service.render_pool.stats()["rendered"] == 1
+
+def test_edited_cv_gets_a_new_etag(client, mongo):
+    etag = client.get("/export/cv/html").headers["etag"]
+    asyncio.run(mongo.cvs.update_one({"id": "cv"}, {"$set": {"updated_at": datetime.utcnow() + timedelta(minutes=1)}}))
+
+    response = client.get("/export/cv/html", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+def test_formats_have_distinct_etags(client):
+    assert client.get("/export/cv/html").headers["etag"] != client.get("/export/cv/word").headers["etag"]
+
+def test_cv_without_updated_at_is_rendered_without_etag(client, mongo):
+    asyncio.run(mongo.cvs.update_one({"id": "cv"}, {"$unset": {"updated_at": ""}}))
+
+    response = client.get("/export/cv/html")
+    assert response.status_code == 200
+    assert "etag" not in response.headers
+
+def test_missing_cv_is_404(client):
+    assert client.get("/export/missing/html").status_code == 404
@@ -0,0 +1,50 @@
+import asyncio
+
+from models.ai import AIContentRequest
+from services.ai_cache import AICache
+from services.ai_service import AIService
+from services.json_stream import JSONFieldStream
+from services.llm_backends import StubLLMBackend
+
+def test_fields_are_emitted_as_they_close():
+    stream = JSONFieldStream()
+    assert stream.feed('{"optimized_content": "Led') == []
+    assert stream.feed(' teams", "keywords_added": ["Python"') == [("optimized_content", "Led teams")]
+    assert stream.feed("]}") == [("keywords_added", ["Python"])]
+    assert stream.done
+
+def test_braces_in_prose_before_the_object_do_not_end_the_stream():
+    stream = JSONFieldStream()
+    assert stream.feed("Here is {the result}: ") == []
+    assert not stream.done
+    assert stream.feed('{"optimized_content": "Led teams"}') == [("optimized_content", "Led teams")]
+    assert stream.done
+
+def test_only_expected_fields_are_reported():
+    stream = JSONFieldStream(expected_fields=["ats_score"])
+    assert stream.feed('{"note": "draft"} then {"ats_score": 80, "extra": 1}') == [("ats_score", 80)]
+    assert stream.fields == {"ats_score": 80}
+
+def test_optimization_stream_sends_tokens_fields_then_the_result():
+    response = (
+        'Here is {the result}:\n{"optimized_content": "Led teams", "suggestions": ["Add metrics"], '
+        '"keywords_used": ["leadership"], "ats_score": 82}'
+    )
+
+    async def scenario():
+        service = AIService(
+            backend=StubLLMBackend(responder=lambda system, prompt: response, chunk_size=7),
+            cache=AICache(persistent=False)
+        )
+        request = AIContentRequest(section_type="summary", job_title="Engineer", existing_content="I lead teams.")
+        return [event async for event in service.stream_optimize_content(request)]
+
+    events = asyncio.run(scenario())
+    kinds = [kind for kind, _ in events]
+    assert kinds.index("field") > kinds.index("token")
+    assert kinds[-1] == "result"
+    assert [data["name"] for kind, data in events if kind == "field"] == [
+        "optimized_content", "suggestions", "keywords_used", "ats_score"
+    ]
+    assert "".join(data for kind, data in events if kind == "token") == response
+    assert events[-1][1]["optimized_content"] == "Led teams"
@@ -0,0 +1,26 @@
+from services.json_stream import JSONObjectExtractor, extract_json_object
+
+def test_object_embedded_in_prose():
+    text = 'Sure! Here is the result:\n```json\n{"optimized_content": "Built {things}", "improvements": ["a"]}\n```\nThanks'
+    assert extract_json_object(text) == {"optimized_content": "Built {things}", "improvements": ["a"]}
+
+def test_common_llm_mistakes_are_repaired():
+    assert extract_json_object('{"score": 80, "suggestions": ["a", "b",],}') == {"score": 80, "suggestions": ["a", "b"]}
+
+def test_truncated_object_is_rejected():
+    assert extract_json_object('{"optimized_content": "Led the team", "improvements": ["Added metr') is None
+    assert extract_json_object('{"overall_score": 80, "section_scores": {"skills": 70}, "suggestions": [') is None
+
+def test_truncated_object_is_not_completed_by_the_extractor():
+    extractor = JSONObjectExtractor()
+    assert extractor.feed('{"a": 1, "b": {"c": 2}') == []
+    assert extractor.feed("}") == ['{"a": 1, "b": {"c": 2}}']
+
+def test_validator_skips_objects_of_the_wrong_shape():
+    def require_score(data):
+        if "score" not in data:
+            raise ValueError("missing score")
+
+    text = '{"note": "first"} and then {"score": 75}'
+    assert extract_json_object(text, require_score) == {"score": 75}
+    assert extract_json_object('{"note": "only"}', require_score) is None
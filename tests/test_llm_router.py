@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from services.llm_backends import StubLLMBackend, StubLLMError
+from services.llm_router import CircuitBreaker, LLMUnavailableError, RouterLLMBackend
+
+def _router(primary, secondary=None, **kwargs):
+    routes = [("primary", primary)] + ([("secondary", secondary)] if secondary is not None else [])
+    options = {"failure_threshold": 2, "open_seconds": 30, "explore_rate": 0.0}
+    options.update(kwargs)
+    return RouterLLMBackend(routes, **options)
+
+def _healthy(name):
+    return StubLLMBackend(responder=lambda system, prompt: name, model=name)
+
+def _failing(name):
+    return StubLLMBackend(error_rate=1.0, model=name)
+
+def test_failed_call_fails_over_to_the_next_route():
+    router = _router(_failing("a"), _healthy("b"))
+    assert asyncio.run(router.complete("system", "prompt", "session")) == "b"
+
+    stats = router.stats()
+    assert stats["failovers"] == 1
+    assert stats["routes"]["primary"]["failures"] == 1
+    assert stats["routes"]["primary"]["state"] == "closed"
+
+def test_open_breaker_takes_the_route_out_of_rotation():
+    primary = _failing("a")
+    router = _router(primary, _healthy("b"))
+
+    async def scenario():
+        for _ in range(4):
+            await router.complete("system", "prompt", "session")
+
+    asyncio.run(scenario())
+    # Opened after two consecutive failures; later calls never reach it
+    assert primary.calls == 2
+    assert router.stats()["routes"]["primary"]["state"] == "open"
+    assert router.stats()["routes"]["primary"]["opens"] == 1
+
+def test_half_open_probe_closes_the_breaker_when_it_succeeds():
+    primary = _failing("a")
+    router = _router(primary, _healthy("b"), open_seconds=0.01)
+
+    async def scenario():
+        for _ in range(2):
+            await router.complete("system", "prompt", "session")
+        primary.error_rate = 0.0
+        await asyncio.sleep(0.02)
+        return await router.complete("system", "prompt", "session")
+
+    assert asyncio.run(scenario()) != "b"
+    assert router.stats()["routes"]["primary"]["state"] == "closed"
+
+def test_every_breaker_open_fails_fast():
+    primary = _failing("a")
+    router = _router(primary)
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(StubLLMError):
+                await router.complete("system", "prompt", "session")
+        with pytest.raises(LLMUnavailableError):
+            await router.complete("system", "prompt", "session")
+
+    asyncio.run(scenario())
+    assert primary.calls == 2
+
+def test_stream_fails_over_before_the_first_chunk():
+    router = _router(_failing("a"), _healthy("b"))
+
+    async def scenario():
+        return [chunk async for chunk in router.stream("system", "prompt", "session")]
+
+    assert "".join(asyncio.run(scenario())) == "b"
+    assert router.stats()["failovers"] == 1
+
+def test_breaker_opens_on_rolling_error_rate():
+    breaker = CircuitBreaker(failure_threshold=100, error_rate=0.5, min_samples=4, open_seconds=30, window=10)
+    for outcome in (True, False, True, False):
+        breaker.record_success() if outcome else breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.available()
+
+def test_only_one_probe_is_admitted_while_half_open():
+    breaker = CircuitBreaker(failure_threshold=1, error_rate=1.0, min_samples=100, open_seconds=0, window=10)
+    breaker.record_failure()
+    assert breaker.available()
+    assert breaker.before_call()
+    assert not breaker.available()
+
+    breaker.release_probe()
+    assert breaker.state == "open"
+    assert breaker.available()
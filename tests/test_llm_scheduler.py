@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from services.llm_scheduler import LLMScheduler, SchedulerOverloadedError
+
+def test_pro_waiters_are_served_before_free_waiters():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=1, max_queue_depth=10)
+        order = []
+        release = asyncio.Event()
+
+        async def call(tier, name):
+            async with scheduler.slot(tier):
+                order.append(name)
+                await release.wait()
+
+        holder = asyncio.ensure_future(call("free", "holder"))
+        await asyncio.sleep(0)
+        waiters = [
+            asyncio.ensure_future(call("free", "free-1")),
+            asyncio.ensure_future(call("free", "free-2")),
+            asyncio.ensure_future(call("pro", "pro-1"))
+        ]
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(holder, *waiters)
+        return order, scheduler.stats()
+
+    order, stats = asyncio.run(scenario())
+    assert order == ["holder", "pro-1", "free-1", "free-2"]
+    assert stats["active"] == 0
+
+def test_full_queue_sheds_load():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=1, max_queue_depth=1)
+        release = asyncio.Event()
+
+        async def call():
+            async with scheduler.slot("free"):
+                await release.wait()
+
+        running = [asyncio.ensure_future(call()) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(SchedulerOverloadedError) as overloaded:
+            await call()
+        release.set()
+        await asyncio.gather(*running)
+        return overloaded.value, scheduler.stats()
+
+    error, stats = asyncio.run(scenario())
+    assert error.retry_after >= 1
+    assert stats["tiers"]["free"]["rejected"] == 1
+    assert stats["active"] == 0
+
+def test_waiter_cancelled_while_a_slot_is_released():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=1, max_queue_depth=10)
+        holder = scheduler.slot("free")
+        await holder.__aenter__()
+
+        cancelled = asyncio.ensure_future(scheduler._acquire("free"))
+        survivor = asyncio.ensure_future(scheduler._acquire("free"))
+        await asyncio.sleep(0)
+
+        # Cancel the first waiter and free the slot before it gets to run: _release()
+        # pops the cancelled waiter, skips it and hands the slot to the next one
+        cancelled.cancel()
+        await holder.__aexit__(None, None, None)
+
+        await survivor
+        outcome = await asyncio.gather(cancelled, return_exceptions=True)
+        active = scheduler.stats()["active"]
+        scheduler._release()
+        return outcome[0], active, scheduler.stats()
+
+    outcome, active, stats = asyncio.run(scenario())
+    assert isinstance(outcome, asyncio.CancelledError)
+    assert active == 1
+    assert stats["active"] == 0
+    assert stats["tiers"]["free"]["queued"] == 0
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=1, max_queue_depth=10)
+        await scheduler._acquire("free")
+        waiter = asyncio.ensure_future(scheduler._acquire("free"))
+        await asyncio.sleep(0)
+        queued = scheduler.stats()["tiers"]["free"]["queued"]
+
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        return queued, scheduler.stats()
+
+    queued, stats = asyncio.run(scenario())
+    assert queued == 1
+    assert stats["tiers"]["free"]["queued"] == 0
+    assert stats["active"] == 1
@@ -0,0 +1,50 @@
+from services.near_duplicate import MinHasher, NearDuplicateIndex
+
+TEXT = (
+    "Led a team of eight engineers building the payments platform, cutting checkout "
+    "latency by 40% and moving settlement jobs from cron scripts to an event pipeline."
+)
+EDITED = TEXT.replace("eight", "nine")
+UNRELATED = "Taught secondary school mathematics and ran the after-school robotics club for five years."
+
+def test_similarity_tracks_how_much_text_changed():
+    hasher = MinHasher()
+    signature = hasher.signature(TEXT)
+    assert MinHasher.similarity(signature, hasher.signature(TEXT)) == 1.0
+    assert MinHasher.similarity(signature, hasher.signature(EDITED)) > 0.8
+    assert MinHasher.similarity(signature, hasher.signature(UNRELATED)) < 0.2
+
+def test_whitespace_only_change_is_served_the_prior_result():
+    index = NearDuplicateIndex(seed_threshold=0.8)
+    index.add("user", "summary", TEXT, {"optimized_content": "prior"})
+
+    outcome, entry = index.match("content_optimization", "user", "summary", "  " + TEXT.replace(" ", "\n", 3))
+    assert outcome == "serve"
+    assert entry["result"] == {"optimized_content": "prior"}
+
+def test_small_edit_seeds_a_revision_instead_of_being_served():
+    index = NearDuplicateIndex(seed_threshold=0.8)
+    index.add("user", "summary", TEXT, {"optimized_content": "prior"})
+
+    assert index.match("content_optimization", "user", "summary", EDITED)[0] == "seed"
+    assert index.match("ats_analysis", "user", "summary", EDITED, allow_seed=False) == (None, None)
+
+def test_matches_stay_within_user_and_scope():
+    index = NearDuplicateIndex(seed_threshold=0.8)
+    index.add("user", "summary", TEXT, {"optimized_content": "prior"})
+
+    assert index.match("content_optimization", "other", "summary", TEXT) == (None, None)
+    assert index.match("content_optimization", "user", "experience", TEXT) == (None, None)
+    assert index.match("content_optimization", "user", "summary", UNRELATED) == (None, None)
+
+def test_oldest_entries_and_users_are_evicted():
+    index = NearDuplicateIndex(max_users=1, entries_per_user=1)
+    index.add("user", "summary", TEXT, {})
+    index.add("user", "summary", UNRELATED, {})
+    assert index.match("content_optimization", "user", "summary", TEXT) == (None, None)
+
+    index.add("other", "summary", TEXT, {})
+    assert index.match("content_optimization", "user", "summary", UNRELATED) == (None, None)
+    stats = index.stats()
+    assert stats["users"] == 1
+    assert stats["endpoints"]["content_optimization"]["lookups"] == 2
@@ -0,0 +1,47 @@
+from services.prompt_budget import PromptBudget
+
+budget = PromptBudget()
+
+CV = "**Led** the <team> of   8 engineers.\n\n  # Not a heading, just text with #hashtags\nEqual opportunity champion"
+
+def test_cv_text_keeps_every_character():
+    content, _ = budget.fit("ats_analysis", CV)
+    assert content == "**Led** the <team> of 8 engineers.\n# Not a heading, just text with #hashtags\nEqual opportunity champion"
+
+def test_job_description_is_stripped_of_markup_boilerplate_and_repeats():
+    job_description = (
+        "<h2>About the role</h2><p>We need <b>Python</b> and Kubernetes.</p>"
+        "<ul><li>Own the API</li><li>Own the API</li></ul>"
+        "<p>We are an equal opportunity employer.</p>"
+    )
+    _, cleaned = budget.fit("ats_analysis", "CV", job_description)
+    assert cleaned == "About the role\nWe need Python and Kubernetes.\nOwn the API"
+
+def test_over_budget_job_description_keeps_its_requirement_sentences():
+    filler = " ".join(f"Our office number {index} has a lovely view of the river." for index in range(200))
+    job_description = f"{filler} You must know Python, Kubernetes and Terraform. {filler}"
+    cv = "Python engineer. " * 20
+
+    small = PromptBudget()
+    small.budgets["ats_analysis"] = 200
+    content, trimmed = small.fit("ats_analysis", cv, job_description)
+
+    assert content == cv.strip()
+    assert "You must know Python, Kubernetes and Terraform." in trimmed
+    assert small.count_tokens(trimmed) <= 200
+    stats = small.stats()["ats_analysis"]
+    assert stats["trimmed"] == 1
+    assert stats["tokens_saved"] > 0
+
+def test_job_description_keeps_a_minimum_share_when_the_cv_fills_the_budget():
+    small = PromptBudget()
+    small.budgets["ats_analysis"] = 100
+    cv = "Python engineer building services. " * 100
+    job_description = " ".join(f"Requirement {index}: Python and Docker." for index in range(50))
+
+    content, trimmed = small.fit("ats_analysis", cv, job_description)
+    assert content == cv.strip()
+    assert 0 < small.count_tokens(trimmed) <= 25
+
+def test_fit_all_only_normalizes_whitespace():
+    assert budget.fit_all("content_optimization", "a  b\n\nc", "*d*") == ["a b\nc", "*d*"]
@@ -0,0 +1,184 @@
+import asyncio
+
+import pytest
+
+from services.quota_service import QuotaExceededError, QuotaRequestTooLargeError, QuotaService
+
+def test_allowance_is_exhausted_then_rejected(mongo):
+    async def scenario():
+        quotas = QuotaService()
+        limit = quotas.limit("free", "optimization")
+        for _ in range(limit):
+            await quotas.reserve("user", "free")
+
+        # The last reservation left the in-process counter at the limit, so these are
+        # rejected without asking MongoDB
+        for _ in range(2):
+            with pytest.raises(QuotaExceededError):
+                await quotas.reserve("user", "free")
+
+        return limit, await quotas.usage("user", "free"), quotas.stats()
+
+    limit, usage, stats = asyncio.run(scenario())
+    assert usage["quotas"]["optimization"] == {"used": limit, "limit": limit, "remaining": 0}
+    assert stats["rejected"] == 2
+    assert stats["cached_rejections"] == 2
+
+def test_release_refunds_the_reservation(mongo):
+    async def scenario():
+        quotas = QuotaService()
+        limit = quotas.limit("free", "optimization")
+        reservations = [await quotas.reserve("user", "free") for _ in range(limit)]
+
+        await quotas.release(reservations[-1])
+        await quotas.reserve("user", "free")
+        return limit, await quotas.usage("user", "free")
+
+    limit, usage = asyncio.run(scenario())
+    assert usage["quotas"]["optimization"]["used"] == limit
+
+def test_failed_request_gives_its_reservation_back(mongo):
+    async def scenario():
+        quotas = QuotaService()
+        with pytest.raises(RuntimeError):
+            async with quotas.reservation("user", "free"):
+                raise RuntimeError("LLM call failed")
+
+        async with quotas.reservation("user", "free"):
+            pass
+        return await quotas.usage("user", "free")
+
+    usage = asyncio.run(scenario())
+    assert usage["quotas"]["optimization"]["used"] == 1
+
+def test_multi_unit_reservations_must_fit_entirely(mongo):
+    async def scenario():
+        quotas = QuotaService()
+        limit = quotas.limit("free", "optimization")
+        reservation = await quotas.reserve("user", "free", units=limit - 1)
+
+        with pytest.raises(QuotaExceededError):
+            await quotas.reserve("user", "free", units=2)
+        await quotas.reserve("user", "free", units=1)
+
+        await quotas.release(reservation)
+        return limit, await quotas.usage("user", "free")
+
+    limit, usage = asyncio.run(scenario())
+    assert usage["quotas"]["optimization"]["used"] == 1
+
+def test_request_larger_than_the_monthly_limit_is_not_reported_as_used_up(mongo):
+    async def scenario():
+        quotas = QuotaService()
+        limit = quotas.limit("free", "optimization")
+        with pytest.raises(QuotaRequestTooLargeError) as too_large:
+            await quotas.reserve("user", "free", units=limit + 1)
+
+        # A fresh user still has the whole allowance for smaller requests
+        await quotas.reserve("user", "free", units=limit)
+        return limit, too_large.value, await quotas.usage("user", "free")
+
+    limit, error, usage = asyncio.run(scenario())
+    assert not isinstance(error, QuotaExceededError)
+    assert (error.units, error.limit) == (limit + 1, limit)
+    assert usage["quotas"]["optimization"]["used"] == limit
+
+def test_unlimited_tier_reserves_nothing(mongo):
+    async def scenario():
+        quotas = QuotaService()
+        return await quotas.reserve("user", "pro"), await quotas.reserve("user", "free", units=0)
+
+    assert asyncio.run(scenario()) == (None, None)
+
+def test_limit_reached_on_another_instance_is_rejected_by_mongodb(mongo):
+    async def scenario():
+        # Neither instance is started; the unique index is created on first use
+        other, quotas = QuotaService(), QuotaService()
+        limit = quotas.limit("free", "optimization")
+        for _ in range(limit):
+            await other.reserve("user", "free")
+
+        with pytest.raises(QuotaExceededError):
+            await quotas.reserve("user", "free")
+        return quotas.stats(), await quotas.usage("user", "free"), await mongo["ai_quotas"].count_documents({})
+
+    stats, usage, documents = asyncio.run(scenario())
+    assert stats["rejected"] == 1
+    assert stats["cached_rejections"] == 0
+    assert usage["quotas"]["optimization"]["used"] == usage["quotas"]["optimization"]["limit"]
+    assert documents == 1
+
+def test_concurrent_reservations_never_exceed_the_limit(mongo):
+    async def scenario():
+        instances = [QuotaService() for _ in range(8)]
+        outcomes = await asyncio.gather(
+            *(quotas.reserve("user", "free") for quotas in instances), return_exceptions=True
+        )
+        return instances[0].limit("free", "optimization"), outcomes
+
+    limit, outcomes = asyncio.run(scenario())
+    assert sum(not isinstance(outcome, QuotaExceededError) for outcome in outcomes) == limit
+
+class IndexlessCollection:
+    """Collection whose index creation fails, as when MongoDB rejects the command"""
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    async def create_index(self, *args, **kwargs):
+        raise RuntimeError("index creation failed")
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+def test_reservation_is_refused_without_the_unique_index(mongo):
+    async def scenario():
+        quotas = QuotaService()
+        quotas._collection = IndexlessCollection(mongo["ai_quotas"])
+        with pytest.raises(RuntimeError):
+            await quotas.reserve("user", "free")
+        return await mongo["ai_quotas"].count_documents({})
+
+    assert asyncio.run(scenario()) == 0
+
+async def _events(*events, error=None):
+    for event in events:
+        yield event
+    if error is not None:
+        raise error
+
+def _stream_usage(monkeypatch, events, consume=None):
+    # The routes module creates its AI service on import
+    monkeypatch.setenv("AI_LLM_BACKEND", "stub")
+    from routes import ai_routes
+
+    quotas = QuotaService()
+    monkeypatch.setattr(ai_routes, "quota_service", quotas)
+
+    async def scenario():
+        reservation = await quotas.reserve("user", "free")
+        body = ai_routes._event_stream_response(events, reservation=reservation).body_iterator
+        if consume is None:
+            chunks = [chunk async for chunk in body]
+        else:
+            chunks = [await body.__anext__() for _ in range(consume)]
+            await body.aclose()
+        usage = await quotas.usage("user", "free")
+        return chunks, usage["quotas"]["optimization"]["used"]
+
+    return asyncio.run(scenario())
+
+def test_stream_with_a_result_keeps_its_reservation(mongo, monkeypatch):
+    chunks, used = _stream_usage(monkeypatch, _events(("token", "Led"), ("result", {"optimized_content": "Led"})))
+    assert chunks[-1].startswith("event: result")
+    assert used == 1
+
+def test_stream_ending_in_an_error_is_refunded(mongo, monkeypatch):
+    chunks, used = _stream_usage(monkeypatch, _events(("token", "Led"), error=RuntimeError("upstream failed")))
+    assert chunks[-1].startswith("event: error")
+    assert used == 0
+
+def test_disconnected_stream_is_refunded(mongo, monkeypatch):
+    chunks, used = _stream_usage(monkeypatch, _events(("token", "Led"), ("token", " teams")), consume=1)
+    assert len(chunks) == 1
+    assert used == 0
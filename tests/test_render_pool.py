@@ -0,0 +1,61 @@
+import asyncio
+import time
+
+import pytest
+
+from models.document import CVDocument
+from services import render_pool
+from services.render_pool import RenderPool, RenderTimeoutError, serialize_document
+
+DOCUMENT = CVDocument(title="CV")
+
+def _slow_render(format, payload, template_id):
+    time.sleep(0.3)
+    return "<html></html>"
+
+def test_inline_render_times_out_but_keeps_its_slot_until_it_finishes(monkeypatch):
+    monkeypatch.setattr(render_pool, "_render_inline", _slow_render)
+    monkeypatch.setattr(render_pool, "TIMEOUT_GRACE_SECONDS", 0)
+
+    async def scenario():
+        pool = RenderPool(max_workers=0, timeout=0.05, inline_threads=1)
+        with pytest.raises(RenderTimeoutError):
+            await pool.render("html", DOCUMENT)
+
+        # The abandoned thread cannot be stopped, so the next render waits for its slot
+        held = pool._inline_slots.locked()
+        await asyncio.sleep(0.4)
+        return held, pool._inline_slots.locked(), pool.stats()
+
+    held, still_held, stats = asyncio.run(scenario())
+    assert held
+    assert not still_held
+    assert stats["timeouts"] == 1
+    assert stats["rendered"] == 0
+
+def test_inline_render_within_the_timeout(monkeypatch):
+    monkeypatch.setattr(render_pool, "_render_inline", lambda format, payload, template_id: "<html></html>")
+
+    async def scenario():
+        pool = RenderPool(max_workers=0, timeout=5, inline_threads=1)
+        return await pool.render("html", DOCUMENT), pool.stats()
+
+    result, stats = asyncio.run(scenario())
+    assert result == "<html></html>"
+    assert stats["rendered"] == 1
+
+def test_worker_job_is_interrupted_at_the_timeout(monkeypatch):
+    class SlowService:
+        def render_html(self, document, template_id=None):
+            time.sleep(2)
+
+    # Runs the worker entry point in this process; the timer signal stops the render
+    monkeypatch.setattr(render_pool, "_worker_service", SlowService())
+    started = time.monotonic()
+    with pytest.raises(RenderTimeoutError):
+        render_pool._render_job("html", serialize_document(DOCUMENT), None, 0.05)
+    assert time.monotonic() - started < 1
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        asyncio.run(RenderPool(max_workers=0).render("odt", DOCUMENT))
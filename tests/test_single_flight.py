@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from models.ai import AIContentRequest
+from services.ai_cache import AICache
+from services.ai_service import AIService
+from services.llm_backends import StubLLMBackend
+from services.single_flight import SingleFlight
+
+def test_concurrent_callers_share_one_call():
+    async def scenario():
+        flight = SingleFlight()
+        release = asyncio.Event()
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            await release.wait()
+            return "result"
+
+        waiters = [asyncio.ensure_future(flight.do("key", fn)) for _ in range(5)]
+        await asyncio.sleep(0)
+        in_flight = flight.in_flight()
+        release.set()
+        results = await asyncio.gather(*waiters)
+        return len(calls), results, in_flight, flight.stats()
+
+    calls, results, in_flight, stats = asyncio.run(scenario())
+    assert calls == 1
+    assert results == ["result"] * 5
+    assert in_flight == 1
+    assert stats["leaders"] == 1
+    assert stats["coalesced"] == 4
+    assert stats["in_flight"] == 0
+
+def test_failure_reaches_every_waiter_and_is_not_kept():
+    async def scenario():
+        flight = SingleFlight()
+        attempts = []
+
+        async def failing():
+            attempts.append(1)
+            await asyncio.sleep(0)
+            raise RuntimeError("upstream down")
+
+        results = await asyncio.gather(*[flight.do("key", failing) for _ in range(3)], return_exceptions=True)
+        # The failed call is forgotten, so the next caller tries again
+        retried = await flight.do("key", lambda: asyncio.sleep(0, result="recovered"))
+        return results, len(attempts), retried, flight.stats()
+
+    results, attempts, retried, stats = asyncio.run(scenario())
+    assert attempts == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert retried == "recovered"
+    assert stats["failures"] == 1
+
+def test_cancelled_waiter_does_not_cancel_the_call():
+    async def scenario():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def fn():
+            await release.wait()
+            return "result"
+
+        cancelled = asyncio.ensure_future(flight.do("key", fn))
+        survivor = asyncio.ensure_future(flight.do("key", fn))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        release.set()
+        return await survivor, cancelled
+
+    result, cancelled = asyncio.run(scenario())
+    assert result == "result"
+    with pytest.raises(asyncio.CancelledError):
+        cancelled.result()
+
+def test_identical_concurrent_optimizations_make_one_llm_call(mongo):
+    async def scenario():
+        backend = StubLLMBackend(chunk_delay=0.05)
+        service = AIService(backend=backend, cache=AICache(persistent=False))
+        request = AIContentRequest(section_type="summary", job_title="Engineer", existing_content="I build services.")
+
+        results = await asyncio.gather(*[service.optimize_content(request) for _ in range(5)])
+        return backend.calls, results
+
+    calls, results = asyncio.run(scenario())
+    assert calls == 1
+    assert all(result == results[0] for result in results)
@@ -0,0 +1,40 @@
+from services.skill_matcher import SkillMatcher, tokenize
+
+matcher = SkillMatcher()
+
+def test_aliases_map_to_one_canonical_skill():
+    assert matcher.find("Built services in golang with Postgres and k8s") == {
+        "Go": 1, "PostgreSQL": 1, "Kubernetes": 1
+    }
+    assert matcher.canonicalize("ReactJS") == "React"
+
+def test_longest_overlapping_alias_wins():
+    # "node.js" is Node.js only, not also JavaScript through "js"
+    assert matcher.find("Wrote node.js and js tooling") == {"Node.js": 1, "JavaScript": 1}
+
+def test_everyday_words_are_not_skills():
+    assert matcher.find("I react quickly to incidents") == {}
+    assert matcher.find("Our values: spark joy, and rust never sleeps. Agile thinkers welcome") == {}
+    assert matcher.find("Stayed on the rails while monitoring the budget") == {}
+
+def test_everyday_words_count_in_a_skill_list():
+    assert matcher.find("Skills: Python, React and Node.js") == {"Python": 1, "React": 1, "Node.js": 1}
+    assert matcher.find("Spark, Kafka or Airflow") == {"Apache Spark": 1, "Apache Kafka": 1, "Airflow": 1}
+
+def test_job_description_prose_does_not_report_missing_skills():
+    coverage = matcher.coverage("Python developer", "We spark joy in customers. Python required.")
+    assert coverage["required_keywords"] == ["Python"]
+    assert coverage["missing_keywords"] == []
+    assert coverage["coverage"] == 1.0
+
+def test_coverage_reports_missing_skills_and_density():
+    coverage = matcher.coverage(
+        "Python engineer. Python, Docker and AWS in production.",
+        "Python, Docker, Kubernetes. Strong Python."
+    )
+    assert coverage["required_keywords"] == ["Python", "Docker", "Kubernetes"]
+    assert coverage["missing_keywords"] == ["Kubernetes"]
+    assert coverage["keyword_density"]["Python"] == round(2 * 100.0 / len(tokenize("Python engineer. Python, Docker and AWS in production.")), 2)
+
+def test_match_terms_uses_taxonomy_equivalence():
+    assert matcher.match_terms("Ran postgres on k8s", ["PostgreSQL", "Kubernetes", "Redis", "on-call"]) == ["PostgreSQL", "Kubernetes"]
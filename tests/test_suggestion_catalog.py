@@ -0,0 +1,29 @@
+import asyncio
+
+from services.ai_cache import AICache
+from services.ai_service import AIService
+from services.llm_backends import StubLLMBackend
+from services.quota_service import QuotaService
+from services.suggestion_catalog import SuggestionCatalog, normalize_title
+
+def test_titles_are_keyed_without_seniority_or_punctuation():
+    assert normalize_title("Senior Software Engineer II") == normalize_title("software engineer")
+    assert normalize_title(None) == "general"
+
+def test_unknown_section_type_is_generated_once_and_charged(mongo):
+    async def scenario():
+        backend = StubLLMBackend()
+        quotas = QuotaService()
+        catalog = SuggestionCatalog(AIService(backend=backend, cache=AICache(persistent=False)), quotas)
+
+        first = await catalog.get("Certifications", "Software Engineer", user_id="user")
+        second = await catalog.get("certifications", "Senior Software Engineer", user_id="user")
+        usage = await quotas.usage("user", "free")
+        return backend.calls, first, second, usage["quotas"]["suggestion"]["used"], catalog.stats()
+
+    calls, first, second, used, stats = asyncio.run(scenario())
+    assert first == second
+    assert calls == 1
+    assert used == 1
+    assert stats["exact_hits"] == 1
+    assert stats["generated_entries"] == 1
@@ -0,0 +1,47 @@
+from models.cv import CVTemplate
+from services.export_service import template_environment
+from services.theme_compiler import DEFAULT_STYLES, MARGIN_POINTS, ThemeCompiler
+
+def _template(styles):
+    return CVTemplate(id="custom", name="Custom", description="", category="modern", styles=styles)
+
+def test_template_styles_are_compiled_for_every_format():
+    compiler = ThemeCompiler(template_environment, templates=[_template({
+        "colors": {"accent": "#AbC", "primary": "#112233"},
+        "font_family": "Georgia, serif",
+        "font_size": "14px",
+        "spacing": "compact",
+        "margins": "narrow"
+    })])
+    theme = compiler.get("custom")
+
+    assert "#aabbcc" in theme.css and "#112233" in theme.css
+    assert "Georgia, serif" in theme.word_css
+    assert theme.stylesheet["Body"].fontName == "Times-Roman"
+    assert theme.stylesheet["Body"].fontSize == 10.5
+    assert theme.margin == MARGIN_POINTS["narrow"]
+    assert theme.item_gap < compiler.default_theme.item_gap
+
+def test_invalid_style_values_fall_back_to_the_defaults():
+    theme = ThemeCompiler(template_environment, templates=[_template({
+        "colors": {"accent": "red; } body { display: none", "unknown": "#000000"},
+        "font_family": "x; } </style><script>",
+        "font_size": "300pt"
+    })]).get("custom")
+
+    assert "display: none" not in theme.css
+    assert "<script>" not in theme.css
+    assert DEFAULT_STYLES["colors"]["accent"] in theme.css
+    assert DEFAULT_STYLES["font_family"] in theme.css
+    assert theme.stylesheet["Body"].fontSize == 11.0
+
+def test_unknown_template_gets_the_default_theme():
+    compiler = ThemeCompiler(template_environment, templates=[])
+    assert compiler.get("missing") is compiler.default_theme
+    assert compiler.get(None) is compiler.default_theme
+    assert compiler.stats() == {"themes": 0, "fallbacks": 2}
+
+def test_every_built_in_template_compiles():
+    compiler = ThemeCompiler(template_environment)
+    assert compiler.stats()["themes"] > 0
+    assert compiler.stats()["fallbacks"] == 0
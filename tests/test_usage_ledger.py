@@ -0,0 +1,34 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from services.usage_ledger import LATENCY_BUCKETS_MS, UsageLedger, latency_quantile
+
+def test_quantile_is_interpolated_within_its_bucket():
+    # 10 calls at or under 100 ms, 10 more at or under 150 ms
+    cumulative = [0, 10] + [20] * (len(LATENCY_BUCKETS_MS) - 2)
+    assert latency_quantile(cumulative, 20, 0.5) == 100
+    assert latency_quantile(cumulative, 20, 0.75) == 125
+    assert latency_quantile(cumulative, 0, 0.5) is None
+
+def test_calls_slower_than_every_bucket_report_the_last_bound():
+    assert latency_quantile([0] * len(LATENCY_BUCKETS_MS), 3, 0.95) == LATENCY_BUCKETS_MS[-1]
+
+def test_summary_percentiles_come_from_upstream_calls_only(mongo):
+    async def scenario():
+        ledger = UsageLedger()
+        for latency in range(10, 1010, 10):
+            ledger.record("content_optimization", "model", 100, 50, latency, "upstream", "ok")
+        # Cache hits are fast and spend no tokens; they must not pull the percentiles down
+        for _ in range(100):
+            ledger.record("content_optimization", "model", 100, 50, 0.1, "cache", "ok")
+        await ledger.stop()
+        return await ledger.summary("endpoint", datetime.utcnow() - timedelta(days=1))
+
+    [group] = asyncio.run(scenario())
+    assert group["calls"] == 200
+    assert group["upstream_calls"] == 100
+    assert group["prompt_tokens"] == 10000
+    assert group["cache_hit_rate"] == 0.5
+    assert 450 <= group["p50_latency_ms"] <= 550
+    assert 900 <= group["p95_latency_ms"] <= 1000
+    assert not any(key.startswith("latency_le_") for key in group)